@@ -2,6 +2,8 @@ const express = require('express')
 const cors = require('cors')
 const fs = require('fs')
 const path = require('path')
+const zlib = require('zlib')
+const crypto = require('crypto')
 
 const app = express()
 
@@ -13,6 +15,44 @@ const frontendDistPath = path.join(__dirname, '../frontend/dist')
 app.use(express.static(frontendDistPath))
 
 const RECIPES_PATH = path.join(__dirname, 'recipes_clean.json')
+// scraper/artifacts.py 生成的部署产物：内容哈希命名的语料文件、预压缩版本和指针清单
+const CORPUS_DIR = path.join(__dirname, 'corpus')
+const CORPUS_MANIFEST = 'recipes.current.json'
+const HASHED_NAME_RE = /^recipes\.[0-9a-f]+\.json$/
+const PRECOMPRESSED = [
+  ['br', '.br'],
+  ['gzip', '.gz'],
+]
+const IMMUTABLE = 'public, max-age=31536000, immutable'
+
+// /api/recipes 的响应体按数据版本缓存在内存中，数据不变时不再重复读文件和解析
+let recipesCache = null
+
+function recipesSource() {
+  // 有部署清单时读清单指向的文件，版本即内容哈希；否则退回 recipes_clean.json，版本取修改时间和大小
+  try {
+    const manifest = JSON.parse(fs.readFileSync(path.join(CORPUS_DIR, CORPUS_MANIFEST), 'utf-8'))
+    return { file: path.join(CORPUS_DIR, manifest.file), version: manifest.sha256 }
+  } catch (err) {
+    const stat = fs.statSync(RECIPES_PATH)
+    return { file: RECIPES_PATH, version: `${stat.mtimeMs}-${stat.size}` }
+  }
+}
+
+function loadRecipesResponse() {
+  const { file, version } = recipesSource()
+  if (!recipesCache || recipesCache.version !== version) {
+    const recipes = JSON.parse(fs.readFileSync(file, 'utf-8'))
+    const body = Buffer.from(JSON.stringify({ count: recipes.length, recipes }))
+    recipesCache = {
+      version,
+      etag: `"${crypto.createHash('sha1').update(body).digest('hex')}"`,
+      body,
+      gzip: zlib.gzipSync(body, { level: 9 }),
+    }
+  }
+  return recipesCache
+}
 
 app.get('/api/health', (req, res) => {
   res.json({ status: 'ok' })
@@ -22,14 +62,46 @@ app.get('/', (req, res) => {
   res.sendFile(path.join(frontendDistPath, 'index.html'))
 })
 
+app.get('/corpus/:name', (req, res, next) => {
+  const name = req.params.name
+  // 指针清单很小，每次都要求重新验证；它指向的文件内容永不改变，可以永久缓存
+  if (name === CORPUS_MANIFEST) {
+    return res.sendFile(path.join(CORPUS_DIR, name), { headers: { 'Cache-Control': 'no-cache' } }, (err) => {
+      if (err) next()
+    })
+  }
+  if (!HASHED_NAME_RE.test(name)) return next()
+
+  res.vary('Accept-Encoding')
+  const headers = { 'Cache-Control': IMMUTABLE, 'Content-Type': 'application/json; charset=utf-8' }
+  for (const [encoding, suffix] of PRECOMPRESSED) {
+    const file = path.join(CORPUS_DIR, name + suffix)
+    if (req.acceptsEncodings(encoding) === encoding && fs.existsSync(file)) {
+      return res.sendFile(file, { headers: { ...headers, 'Content-Encoding': encoding } }, (err) => {
+        if (err) next(err)
+      })
+    }
+  }
+  res.sendFile(path.join(CORPUS_DIR, name), { headers }, (err) => {
+    if (err) next()
+  })
+})
+
 app.get('/api/recipes', (req, res) => {
+  let cached
   try {
-    const raw = fs.readFileSync(RECIPES_PATH, 'utf-8')
-    const recipes = JSON.parse(raw)
-    res.json({ count: recipes.length, recipes })
+    cached = loadRecipesResponse()
   } catch (err) {
-    res.status(500).json({ error: 'failed_to_load_recipes', message: String(err) })
+    return res.status(500).json({ error: 'failed_to_load_recipes', message: String(err) })
+  }
+  res.set({ ETag: cached.etag, 'Cache-Control': 'no-cache', Vary: 'Accept-Encoding' })
+  if (req.fresh) return res.status(304).end()
+  res.type('json')
+  if (req.acceptsEncodings('gzip') === 'gzip') {
+    res.set('Content-Encoding', 'gzip')
+    return res.send(cached.gzip)
   }
+  res.send(cached.body)
 })
 
 const PORT = process.env.PORT || 4000
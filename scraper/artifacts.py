@@ -0,0 +1,170 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+
+from merge_datasets import iter_json_records
+
+try:
+    import brotli
+except ImportError:
+    # 可选依赖（pip install brotli）；没有时只生成 gzip 版本
+    brotli = None
+
+# 部署产物：把合并结果压缩成以内容哈希命名的文件，并预先生成 gzip / brotli 版本，
+# 静态服务可以对这些文件设置永久缓存、直接返回压缩好的字节；内容不变时文件名不变，客户端不必重新下载。
+# 指针清单 MANIFEST_NAME 文件名固定、内容很小，记录当前版本的文件名，客户端每次只需重新验证它。
+INPUT_FILE = 'recipes_clean.json'
+ARTIFACT_DIR = '../backend/corpus'
+ARTIFACT_PREFIX = 'recipes'
+MANIFEST_NAME = 'recipes.current.json'
+MANIFEST_VERSION = 1
+# 文件名中保留的 SHA-256 前缀长度（十六进制字符数）
+HASH_LENGTH = 16
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+# 每累积这么多段文本写出一次
+WRITE_BATCH = 2048
+# 保留最近几个版本：正在读取旧清单的客户端仍能取到对应文件
+KEEP_VERSIONS = 2
+
+
+class _Sink:
+    """同一份输出同时写入原始文件、gzip 和 brotli 压缩流，并计算 SHA-256"""
+
+    def __init__(self, paths: dict):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.files = {encoding: open(path, 'wb') for encoding, path in paths.items()}
+        # gzip 头中的文件名留空、时间戳固定为 0，同样的输入总是得到同样的字节
+        self.gzip = gzip.GzipFile(filename='', mode='wb', compresslevel=GZIP_LEVEL, fileobj=self.files['gzip'],
+                                  mtime=0)
+        self.brotli = brotli.Compressor(quality=BROTLI_QUALITY) if 'br' in self.files else None
+
+    def write(self, data: bytes):
+        self.sha256.update(data)
+        self.size += len(data)
+        self.files['raw'].write(data)
+        self.gzip.write(data)
+        if self.brotli is not None:
+            self.files['br'].write(self.brotli.process(data))
+
+    def close(self):
+        self.gzip.close()
+        if self.brotli is not None:
+            self.files['br'].write(self.brotli.finish())
+        for f in self.files.values():
+            f.close()
+
+
+def write_minified(input_file: str, paths: dict) -> tuple:
+    """流式读取菜谱，把紧凑 JSON 写到 paths 指定的各个文件（raw/gzip/br）；返回 (sha256, 字节数, 菜谱数)。
+    键顺序、字符与 recipes_clean.json 一致，只去掉空白"""
+    sink = _Sink(paths)
+    count = 0
+    try:
+        buffer = ['[']
+        for recipe in iter_json_records(input_file):
+            if count:
+                buffer.append(',')
+            buffer.append(json.dumps(recipe, ensure_ascii=False, separators=(',', ':')))
+            count += 1
+            if len(buffer) >= WRITE_BATCH:
+                sink.write(''.join(buffer).encode('utf-8'))
+                buffer.clear()
+        buffer.append(']')
+        sink.write(''.join(buffer).encode('utf-8'))
+    finally:
+        sink.close()
+    return sink.sha256.hexdigest(), sink.size, count
+
+
+def write_bytes_atomic(data: bytes, path: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_manifest(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def publish_artifacts(input_file: str = INPUT_FILE, artifact_dir: str = ARTIFACT_DIR) -> dict:
+    """生成内容哈希命名的语料文件和压缩版本，最后写指针清单；返回清单。
+
+    输出先写到临时文件，算出哈希后改名；清单最后原子写入，客户端读到新清单时文件都已就位。
+    旧版本保留 KEEP_VERSIONS 个（含当前版本），更早的删除。
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    manifest_path = os.path.join(artifact_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+
+    encodings = ['raw', 'gzip'] + (['br'] if brotli is not None else [])
+    tmp_paths = {e: os.path.join(artifact_dir, f".{ARTIFACT_PREFIX}.{os.getpid()}.{e}.tmp") for e in encodings}
+    try:
+        digest, size, count = write_minified(input_file, tmp_paths)
+        name = f"{ARTIFACT_PREFIX}.{digest[:HASH_LENGTH]}.json"
+        sizes = {}
+        for encoding, tmp_path in tmp_paths.items():
+            final = name + ENCODING_SUFFIXES.get(encoding, '')
+            sizes[encoding] = {'file': final, 'bytes': os.path.getsize(tmp_path)}
+            # 同名文件内容必然相同；替换也无妨，但保留原文件可以不改动它的修改时间（静态服务据此生成 ETag）
+            if os.path.exists(os.path.join(artifact_dir, final)):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, os.path.join(artifact_dir, final))
+    finally:
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    history = [name] + [n for n in (previous or {}).get('history', []) if n != name]
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'file': name,
+        'sha256': digest,
+        'bytes': size,
+        'count': count,
+        'encodings': {e: info for e, info in sizes.items() if e != 'raw'},
+        'history': history[:KEEP_VERSIONS],
+    }
+    write_bytes_atomic(json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'), manifest_path)
+
+    keep = set(manifest['history'])
+    for entry in os.listdir(artifact_dir):
+        base = entry
+        for suffix in ENCODING_SUFFIXES.values():
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if base.startswith(f"{ARTIFACT_PREFIX}.") and base != MANIFEST_NAME and base.endswith('.json') \
+                and base not in keep:
+            os.remove(os.path.join(artifact_dir, entry))
+    return manifest
+
+
+def main(input_file: str = INPUT_FILE, artifact_dir: str = ARTIFACT_DIR):
+    manifest = publish_artifacts(input_file, artifact_dir)
+    sizes = '，'.join(f"{encoding} {info['bytes'] / 1024:.0f} KB" for encoding, info in manifest['encodings'].items())
+    print(f"部署产物：{manifest['count']} 道菜谱 -> {manifest['file']}（{manifest['bytes'] / 1024:.0f} KB；{sizes}），"
+          f"清单 {os.path.join(artifact_dir, MANIFEST_NAME)}")
+    if brotli is None:
+        print("未安装 brotli 模块，跳过 .br 版本（pip install brotli）")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
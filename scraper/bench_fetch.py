@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import tempfile
+import random
+import asyncio
+
+from aiohttp import web
+
+import main as crawler
+from fetcher import Fetcher
+
+# 本地替身服务器：模拟下厨房的分类页与详情页，每个请求固定延迟，并按比例返回 503
+HOST = '127.0.0.1'
+PORT = 8765
+LATENCY = 0.05
+ERROR_RATE = 0.05
+RECIPE_COUNT = 200
+# 编号为它倍数的详情页，第一次请求返回残缺页面（缺少结尾），之后返回完整页面
+TRUNCATE_EVERY = 10
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+
+
+def make_app(latency: float = LATENCY, error_rate: float = ERROR_RATE, recipe_count: int = RECIPE_COUNT):
+    rng = random.Random(0)
+    truncated = set()
+
+    async def category(request):
+        await asyncio.sleep(latency)
+        # 每页 20 条，带“下一页”分页链接
+        page = int(request.query.get('page', 1))
+        ids = range((page - 1) * 20, min(page * 20, recipe_count))
+        items = ''.join(f'<li><a href="/recipe/{i}/">菜谱 {i}</a></li>' for i in ids)
+        pager = f'<div class="pager"><a class="next" href="?page={page + 1}">下一页</a></div>' \
+            if page * 20 < recipe_count else ''
+        return web.Response(text=f'<html><body><ul class="list">{items}</ul>{pager}</body></html>',
+                            content_type='text/html')
+
+    async def recipe(request):
+        await asyncio.sleep(latency)
+        if rng.random() < error_rate:
+            return web.Response(status=503)
+        rid = request.match_info['rid']
+        # 支持 ETag 条件请求，用来验证缓存的 304 重新验证路径
+        etag = f'"r{rid}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        text = f'<html><body><h1>菜谱 {rid}</h1></body></html>'
+        if int(rid) % TRUNCATE_EVERY == 0 and rid not in truncated:
+            truncated.add(rid)
+            text = text[:len(text) // 2]
+        return web.Response(text=text, content_type='text/html', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/category/{cid}/', category)
+    app.router.add_get('/recipe/{rid}/', recipe)
+    return app
+
+
+async def run_bench(levels: list):
+    runner = web.AppRunner(make_app())
+    await runner.setup()
+    await web.TCPSite(runner, HOST, PORT).start()
+    base = f'http://{HOST}:{PORT}'
+    try:
+        # 先走一遍 main.crawl 的完整流程，确认分类页解析与详情页分发可用；残缺页面解析失败，
+        # 重试失败链接时必须重新下载（不能再用缓存里的残缺正文），最终全部详情页都要解析成功
+        crawler.parse_recipe_detail = lambda url, html: {'title': url} if html.endswith('</html>') else None
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {'frontier_db': os.path.join(tmp, 'frontier.sqlite3'),
+                     'cache_dir': os.path.join(tmp, 'http_cache'),
+                     'output_file': os.path.join(tmp, 'recipes.jsonl')}
+            await crawler.crawl(f'{base}/category/40076/', concurrency=8, rate_per_host=None, **paths)
+            await crawler.crawl(f'{base}/category/40076/', concurrency=8, rate_per_host=None, retry_failed=True,
+                                **paths)
+            with open(paths['output_file'], 'r', encoding='utf-8') as f:
+                saved = sum(1 for _ in f)
+            assert saved == RECIPE_COUNT, f"重试后解析出 {saved}/{RECIPE_COUNT} 道菜谱"
+
+        urls = [f'{base}/recipe/{i}/' for i in range(RECIPE_COUNT)]
+        for concurrency in levels:
+            async with Fetcher(concurrency=concurrency, connections_per_host=concurrency,
+                               rate_per_host=None, backoff_base=0.01) as fetcher:
+                start = time.perf_counter()
+                results = await fetcher.fetch_all(urls)
+                elapsed = time.perf_counter() - start
+            ok = sum(1 for r in results if not r['error'])
+            retries = sum(r['attempts'] - 1 for r in results)
+            print(f"并发 {concurrency:>3}: {elapsed:.2f}s, {len(urls) / elapsed:.1f} 请求/秒, "
+                  f"成功 {ok}/{len(urls)}, 重试 {retries} 次")
+    finally:
+        await runner.cleanup()
+
+
+def main(levels: list = CONCURRENCY_LEVELS):
+    asyncio.run(run_bench(levels))
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or CONCURRENCY_LEVELS)
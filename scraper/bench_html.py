@@ -0,0 +1,103 @@
+import os
+import sys
+import glob
+import time
+
+from bs4 import BeautifulSoup
+
+import main as crawler
+from merge_datasets import convert_new_source_format
+from recipe_page import PARSER, extract_detail, extract_detail_soup, parse_listing, to_item
+
+# 用保存的下厨房页面对比两种解析方式：构建完整 BeautifulSoup 树再查找（原做法，作为参照实现），
+# 与 recipe_page 的选择性解析（分类页只建列表/分页器子树，详情页只收集所需区域、读完即停）。
+# 先校验两者结果一致，再计时，输出每页的平均解析耗时
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'xiachufang')
+# 每轮把全部页面各解析一遍，取最快一轮
+ROUNDS = 20
+BASE_URL = crawler.BASE_URL
+
+
+def load_pages(fixture_dir: str) -> tuple:
+    """返回 (分类页, 详情页)，每项为 (页面地址, HTML)"""
+    categories, details = [], []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        kind, _, page_id = os.path.basename(path)[:-len('.html')].partition('_')
+        if kind == 'category':
+            categories.append((f"{BASE_URL}/category/{page_id}/", html))
+        else:
+            details.append((f"{BASE_URL}/recipe/{page_id}/", html))
+    return categories, details
+
+
+def full_listing(html: str, url: str) -> tuple:
+    soup = BeautifulSoup(html, 'html.parser')
+    return crawler.extract_recipe_links(soup, url), crawler.extract_next_page(soup, url)
+
+
+def selective_listing(html: str, url: str) -> tuple:
+    soup = parse_listing(html)
+    return crawler.extract_recipe_links(soup, url), crawler.extract_next_page(soup, url)
+
+
+def full_detail(html: str, url: str) -> dict:
+    return extract_detail_soup(BeautifulSoup(html, 'html.parser'))
+
+
+def selective_detail(html: str, url: str) -> dict:
+    return extract_detail(html)
+
+
+def verify(categories: list, details: list) -> int:
+    """选择性解析与完整建树的结果必须一致，详情页还要能被合并阶段读取；返回不一致的页面数"""
+    mismatches = 0
+    for funcs, pages in (((full_listing, selective_listing), categories), ((full_detail, selective_detail), details)):
+        for url, html in pages:
+            expected, actual = funcs[0](html, url), funcs[1](html, url)
+            if actual != expected:
+                mismatches += 1
+                print(f"不一致: {url}\n  完整建树: {expected!r}\n  选择性:   {actual!r}")
+    for url, html in details:
+        item = to_item(extract_detail(html), url, crawler.CATEGORY_NAME)
+        recipe = convert_new_source_format(item) if item else None
+        if recipe is None or not recipe.name or not recipe.ingredients or not recipe.steps:
+            mismatches += 1
+            print(f"无法转换为合并格式: {url}: {item!r}")
+    return mismatches
+
+
+def best_per_page(func, pages: list, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for url, html in pages:
+            func(html, url)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages)
+
+
+def main(fixture_dir: str = FIXTURE_DIR, rounds: int = ROUNDS):
+    categories, details = load_pages(fixture_dir)
+    if not details:
+        print(f"错误：{fixture_dir} 下没有找到详情页")
+        return 1
+    mismatches = verify(categories, details)
+    print(f"解析器：{PARSER}；分类页 {len(categories)} 个，详情页 {len(details)} 个，"
+          f"结果不一致 {mismatches} 个")
+
+    for label, pages, full, selective in (('分类页', categories, full_listing, selective_listing),
+                                          ('详情页', details, full_detail, selective_detail)):
+        if not pages:
+            continue
+        size = sum(len(html.encode('utf-8')) for _, html in pages) / len(pages)
+        full_time = best_per_page(full, pages, rounds)
+        selective_time = best_per_page(selective, pages, rounds)
+        print(f"{label}（平均 {size / 1024:.1f} KB）：完整建树 {full_time * 1000:.3f}ms/页，"
+              f"选择性解析 {selective_time * 1000:.3f}ms/页，加速 {full_time / selective_time:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:2]))
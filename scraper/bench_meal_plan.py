@@ -0,0 +1,83 @@
+import sys
+import json
+import time
+import random
+
+import numpy as np
+
+from build_index import parse_ingredient_tokens, recipe_ingredient_names
+from meal_plan import MealPlanner
+from bench_recommend import scale
+
+# 随机生成手头食材清单，测量 MealPlanner 在不同规模语料上的规划耗时；
+# 小规模时对 2、3 道菜的无预算规划穷举最优解，统计贪心覆盖的食材数与最优值之比
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [2000, 100000]
+QUERY_COUNT = 300
+# 穷举时不同位掩码的上限（超过则跳过该查询，3 道菜的穷举是立方级）
+MAX_EXHAUSTIVE_MASKS = 400
+CONSTRAINTS = [
+    {},
+    {'time_budget': 120},
+    {'difficulty_budget': 10, 'max_time': 60},
+    {'category': ['meat_dish', 'vegetable_dish', '家常菜'], 'max_difficulty': 3},
+]
+
+
+def make_pantries(vocab: list, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [rng.sample(vocab, rng.randint(5, 15)) for _ in range(n)]
+
+
+def optimum(masks: np.ndarray, count: int) -> int:
+    """count 道菜最多能覆盖的食材数（穷举，count 为 1~3）"""
+    distinct = np.unique(masks)
+    best = int(np.bitwise_count(distinct).max())
+    if count >= 2:
+        pairs = distinct[:, None] | distinct[None, :]
+        best = max(best, int(np.bitwise_count(pairs).max()))
+        if count >= 3:
+            for mask in distinct:
+                best = max(best, int(np.bitwise_count(pairs | mask).max()))
+    return best
+
+
+def main(sizes: list = SIZES):
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    vocab = sorted({n for r in base for n in recipe_ingredient_names(r)})
+    pantries = make_pantries(vocab, QUERY_COUNT)
+    for size in sizes:
+        start = time.perf_counter()
+        planner = MealPlanner.from_recipes(scale(base, size))
+        build = time.perf_counter() - start
+
+        for constraints in CONSTRAINTS:
+            planner.plan(pantries[0], **constraints)
+            timings = []
+            for pantry in pantries:
+                start = time.perf_counter()
+                planner.plan(pantry, **constraints)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"{size:>7} 道菜谱（构建 {build:.2f}s）{json.dumps(constraints, ensure_ascii=False)}："
+                  f"平均 {sum(timings) / len(timings) * 1000:.2f}ms，p99 {timings[int(len(timings) * 0.99)] * 1000:.2f}ms")
+
+        if size > 5000:
+            continue
+        for count in (2, 3):
+            ratios = []
+            for pantry in pantries:
+                masks = planner.pantry_masks(parse_ingredient_tokens('\n'.join(pantry)))
+                masks = masks[masks != 0]
+                if not len(masks) or len(np.unique(masks)) > MAX_EXHAUSTIVE_MASKS:
+                    continue
+                best = optimum(masks, count)
+                got = len(planner.plan(pantry, count)['covered'])
+                ratios.append(got / best)
+            print(f"{size:>7} 道菜谱，{count} 道菜：贪心覆盖 / 最优 平均 {np.mean(ratios):.3f}，最差 {min(ratios):.3f}，"
+                  f"达到最优 {sum(r == 1 for r in ratios)}/{len(ratios)}")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,108 @@
+import sys
+import time
+import random
+
+from generate_new_data_source import TEMPLATES
+from near_duplicates import NearDuplicateIndex, recipe_features, THRESHOLD
+
+# 合成数据：从模板出发做随机改动（删/换食材、改写步骤），模拟大量“换个名字再改两笔”的近似重复菜谱
+SIZES = [1000, 10000, 100000]
+# 与两两精确比较对照时使用的数据量（两两比较是平方级，只在小数据上做）
+EXACT_CHECK_SIZE = 2000
+FILLER = '先后再把将用至约的了和入加热翻炒煮蒸炖切备匀香软烂出锅汤汁火油盐糖'
+# 模拟合并：一半是不查重、全部入索引的参照菜谱（同 HowToCook），每条重复 COPIES 份（内容相同只有名字不同）
+COPIES = 25
+
+
+def make_recipes(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(n):
+        if i % 4 == 0 or not recipes:
+            # 四分之一是全新菜谱：随机生成的食材与步骤
+            base = {
+                'ingredients': [{'name': ''.join(rng.choices(FILLER, k=3))} for _ in range(rng.randint(4, 10))],
+                'steps': [''.join(rng.choices(FILLER, k=rng.randint(12, 30))) for _ in range(rng.randint(3, 7))],
+            }
+        else:
+            base = rng.choice(TEMPLATES if rng.random() < 0.5 else recipes[-50:])
+        ingredients = [dict(ing) for ing in base['ingredients']]
+        steps = list(base['steps'])
+        for _ in range(rng.randint(0, 2)):
+            if rng.random() < 0.5 and len(ingredients) > 1:
+                ingredients[rng.randrange(len(ingredients))] = {'name': ''.join(rng.choices(FILLER, k=2))}
+            else:
+                j = rng.randrange(len(steps))
+                steps[j] = steps[j] + ''.join(rng.choices(FILLER, k=4))
+        recipes.append({'name': f'菜谱{i}', 'ingredients': ingredients, 'steps': steps})
+    return recipes
+
+
+def dedupe(recipes: list, threshold: float = THRESHOLD) -> list:
+    """返回保留下来的菜谱编号"""
+    index = NearDuplicateIndex(threshold)
+    kept = []
+    for i, recipe in enumerate(recipes):
+        sig = index.signature(recipe)
+        if index.query(sig) is None:
+            index.insert(sig)
+            kept.append(i)
+    return kept
+
+
+def dedupe_after(reference: list, recipes: list, threshold: float = THRESHOLD) -> list:
+    """先把 reference 全部插入索引（不查重），再对 recipes 去重，返回 recipes 中保留的编号"""
+    index = NearDuplicateIndex(threshold)
+    for recipe in reference:
+        index.insert(index.signature(recipe))
+    kept = []
+    for i, recipe in enumerate(recipes):
+        sig = index.signature(recipe)
+        if index.query(sig) is None:
+            index.insert(sig)
+            kept.append(i)
+    return kept
+
+
+def dedupe_exact(recipes: list, threshold: float = THRESHOLD) -> list:
+    """两两比较精确 Jaccard 的对照实现"""
+    features = [recipe_features(r) for r in recipes]
+    kept = []
+    for i, fi in enumerate(features):
+        if not any(len(fi & features[k]) / len(fi | features[k]) >= threshold for k in kept):
+            kept.append(i)
+    return kept
+
+
+def main(sizes: list = SIZES):
+    recipes = make_recipes(EXACT_CHECK_SIZE)
+    start = time.perf_counter()
+    exact = set(dedupe_exact(recipes))
+    exact_time = time.perf_counter() - start
+    start = time.perf_counter()
+    approx = set(dedupe(recipes))
+    approx_time = time.perf_counter() - start
+    print(f"{EXACT_CHECK_SIZE} 条对照：两两比较保留 {len(exact)} 条（{exact_time:.2f}s），"
+          f"MinHash/LSH 保留 {len(approx)} 条（{approx_time:.2f}s），"
+          f"结果不一致 {len(exact ^ approx)} 条")
+
+    for n in sizes:
+        recipes = make_recipes(n)
+        start = time.perf_counter()
+        kept = dedupe(recipes)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>7} 条：{elapsed:.2f}s，{n / elapsed:.0f} 条/秒，保留 {len(kept)} 条")
+
+    for n in sizes:
+        base = make_recipes(max(1, n // 2 // COPIES), seed=1)
+        reference = [dict(base[i % len(base)], name=f'参照{i}') for i in range(n // 2)]
+        recipes = make_recipes(n - n // 2)
+        start = time.perf_counter()
+        kept = dedupe_after(reference, recipes)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>7} 条（一半为参照菜谱，每条 {COPIES} 份副本）：{elapsed:.2f}s，{n / elapsed:.0f} 条/秒，"
+              f"保留 {len(kept)} 条")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,87 @@
+import sys
+import glob
+import time
+
+import parse_howtocook
+
+# 默认对 HowToCook 全量语料做对比与计时
+SOURCE_DIR = parse_howtocook.SOURCE_DIR
+# 计时重复轮数，取最快一轮
+ROUNDS = 10
+# 语料里少见、单遍扫描需要特别处理或回退的写法，与语料一起做差分校验
+EDGE_CASES = [
+    '# 甲的做法\n\n##\n- 不是标题下的列表\n\n## 操作\n\n- 炒\n',
+    '# 乙\n\n## 计算\n\n* - 盐 3g\n* **糖** 5g\n-  - 醋 2ml\n\n## 操作\n\n* - 第一步\n',
+    '# 丙\r\n\r\n## 操作\r\n\r\n- 切\r\n- 煮\r\n',
+    '# 丁\n\n## 操作\n\n- 旧步骤\n\n## 操作\n\n- 新步骤\n',
+    '# 戊\n\n## 操作\n\n- 加入 ![图\n片](a.png) 葱花\n- <b>大火</b>\n收汁\n',
+    '- 标题前的列表项\n# 己\n## 计算\n\n## 必备原料和工具\n\n  - 鸡蛋\n\t* 番茄 2 个\n### 小节\n- 葱\n',
+    '# 庚\n## 操作\n-\n- \n- *\n-不是列表项\n- 步骤\u3000\n',
+]
+
+
+def load_corpus(source_dir: str) -> list:
+    corpus = []
+    for file_path in sorted(glob.glob(f"{source_dir}/**/*.md", recursive=True)):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                corpus.append((file_path, f.read()))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"跳过 {file_path}: {e}")
+    return corpus
+
+
+def verify(corpus: list) -> int:
+    """差分校验：单遍扫描与多遍参照实现的输出必须逐字段一致，返回不一致的文件数"""
+    mismatches = 0
+    for file_path, content in corpus + [(f"edge_case_{i}.md", text) for i, text in enumerate(EDGE_CASES)]:
+        expected = parse_howtocook.extract_fields(content, file_path)
+        actual = parse_howtocook.scan_markdown(content, file_path)
+        if actual != expected:
+            mismatches += 1
+            print(f"不一致: {file_path}")
+            for key in expected:
+                if actual.get(key) != expected[key]:
+                    print(f"  {key}: {actual.get(key)!r} != {expected[key]!r}")
+    return mismatches
+
+
+def run(func, corpus: list) -> float:
+    start = time.perf_counter()
+    for file_path, content in corpus:
+        func(content, file_path)
+    return time.perf_counter() - start
+
+
+def best_times(funcs: list, corpus: list, rounds: int) -> list:
+    """各实现交替计时，每个取最快一轮，减少机器抖动对比值的影响"""
+    best = [float('inf')] * len(funcs)
+    for _ in range(rounds):
+        for i, func in enumerate(funcs):
+            best[i] = min(best[i], run(func, corpus))
+    return best
+
+
+def main(source_dir: str = SOURCE_DIR, rounds: int = ROUNDS):
+    corpus = load_corpus(source_dir)
+    if not corpus:
+        print(f"错误：{source_dir} 下没有找到 Markdown 文件")
+        return 1
+
+    print(f"共 {len(corpus)} 个文件，开始差分校验...")
+    mismatches = verify(corpus)
+    if mismatches:
+        print(f"校验失败：{mismatches} 个文件输出不一致")
+        return 1
+    print("校验通过：单遍扫描与多遍解析输出完全一致")
+
+    multi, single = best_times([parse_howtocook.extract_fields, parse_howtocook.scan_markdown], corpus, rounds)
+    n = len(corpus)
+    print(f"多遍解析: {multi * 1e6 / n:.1f} µs/文件，总计 {multi:.3f}s")
+    print(f"单遍扫描: {single * 1e6 / n:.1f} µs/文件，总计 {single:.3f}s")
+    print(f"加速比: {multi / single:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:2]))
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import random
+import resource
+import tempfile
+import multiprocessing
+from itertools import cycle
+from concurrent.futures import ProcessPoolExecutor
+
+import parse_howtocook
+import merge_datasets
+import generate_new_data_source
+
+# 流水线基准：用现有菜谱生成不同规模的合成语料，分别测 Markdown 解析、完整合并、口味关键词标注三个阶段，
+# 报告吞吐量（道/秒）、耗时和进程峰值内存，结果保存为 JSON，并与基线比较，超过阈值即视为性能回退
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [1000, 10000, 100000]
+SCENARIOS = ['parse_markdown', 'merge', 'tag_taste']
+# 每个场景重复轮数，耗时取最快一轮，内存取最大值；每轮在全新的子进程中运行，峰值内存互不干扰
+ROUNDS = 3
+# 超过该规模的语料只跑一轮（十万级合并一轮就要几分钟）
+MAX_REPEAT_SIZE = 10000
+RESULTS_FILE = 'bench_results.json'
+BASELINE_FILE = 'bench_baseline.json'
+# 吞吐量下降或峰值内存上升超过该比例视为回退
+REGRESSION_THRESHOLD = 0.2
+
+
+def render_markdown(recipe: dict) -> str:
+    """把菜谱渲染成 HowToCook 风格的 Markdown"""
+    lines = [f"# {recipe['name']}的做法", '', f"![{recipe['name']}](./{recipe['name']}.jpg)", '',
+             f"这是一道**{'、'.join(recipe.get('taste') or ['家常'])}**的菜。", '',
+             f"预估烹饪难度：{'★' * (recipe.get('difficulty') or 1)}", '']
+    if recipe.get('cooking_time'):
+        lines += [f"预计制作时长 **{recipe['cooking_time']} 分钟**。", '']
+    lines += ['## 必备原料和工具', '']
+    lines += [f"- {ing['name']}" for ing in recipe['ingredients']]
+    lines += ['', '## 计算', '', '每份：', '']
+    lines += [f"* {ing['name']} {ing.get('quantity') or ''}".rstrip() for ing in recipe['ingredients']]
+    lines += ['', '## 操作', '']
+    lines += [f"- {step}" for step in recipe['steps']]
+    lines += ['', '## 附加内容', '', '- 根据口味调整。', '']
+    return '\n'.join(lines)
+
+
+def synthetic_howtocook(base: list, n: int) -> list:
+    return [dict(base[i % len(base)], name=f"{base[i % len(base)]['name']}{i}") for i in range(n)]
+
+
+def synthetic_new_source(n: int, seed: int = 0) -> list:
+    """按 generate_new_data_source 的方式生成 n 条新数据源菜谱，随机删改部分步骤，避免全部是近似重复"""
+    rng = random.Random(seed)
+    templates = cycle(generate_new_data_source.TEMPLATES)
+    variants = cycle(generate_new_data_source.VARIANTS)
+    items = []
+    for idx in range(n):
+        item = generate_new_data_source.build_recipe(next(templates), idx, next(variants))
+        if rng.random() < 0.5:
+            item['steps'] = [s for s in item['steps'] if rng.random() < 0.6] + [f"第 {idx} 次试做的记录。"]
+        items.append(item)
+    return items
+
+
+def prepare(workdir: str, size: int):
+    """在 workdir 下生成 size 规模的全部输入：Markdown 目录、两个合并数据源"""
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    recipes = synthetic_howtocook(base, size)
+    dishes = os.path.join(workdir, 'dishes')
+    for i, recipe in enumerate(recipes):
+        folder = os.path.join(dishes, recipe.get('category') or 'other', str(i // 1000))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{i}.md"), 'w', encoding='utf-8') as f:
+            f.write(render_markdown(recipe))
+    # 合并：HowToCook 与新数据源各占一半
+    merge_datasets.write_json_atomic(recipes[:size // 2], os.path.join(workdir, 'howtocook.json'))
+    merge_datasets.write_json_atomic(synthetic_new_source(size - size // 2), os.path.join(workdir, 'new_source.json'))
+
+
+def markdown_files(workdir: str) -> list:
+    files = []
+    for root, _, names in os.walk(os.path.join(workdir, 'dishes')):
+        files.extend(os.path.join(root, name) for name in names)
+    files.sort()
+    return files
+
+
+def run_scenario(scenario: str, workdir: str) -> dict:
+    """在子进程中运行一个场景，返回 {'count', 'wall', 'peak_rss_mb'}"""
+    if scenario == 'parse_markdown':
+        parse_howtocook.SOURCE_DIR = os.path.join(workdir, 'dishes')
+        files = markdown_files(workdir)
+        start = time.perf_counter()
+        for file_path in files:
+            parse_howtocook.parse_markdown(file_path)
+        wall = time.perf_counter() - start
+        count = len(files)
+    elif scenario == 'merge':
+        merge_datasets.HOWTOCOOK_FILE = os.path.join(workdir, 'howtocook.json')
+        merge_datasets.NEW_SOURCE_FILE = os.path.join(workdir, 'new_source.json')
+        merge_datasets.OUTPUT_FILE = os.path.join(workdir, 'merged.json')
+        merge_datasets.VOCAB_FILE = os.path.join(workdir, 'vocab.json')
+        merge_datasets.TARGET_COUNT = None
+        stats = merge_datasets.new_stats()
+        vocab = merge_datasets.IngredientVocab(merge_datasets.SYNONYMS)
+        start = time.perf_counter()
+        merge_datasets.write_json_atomic(merge_datasets.merge_recipes(stats, vocab), merge_datasets.OUTPUT_FILE)
+        wall = time.perf_counter() - start
+        count = stats['howtocook'] + stats['new_source'] + stats['near_duplicates']
+    elif scenario == 'tag_taste':
+        texts = []
+        for file_path in markdown_files(workdir):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                texts.append(parse_howtocook.strip_markup(f.read()))
+        start = time.perf_counter()
+        for text in texts:
+            parse_howtocook.tag_taste(text)
+        wall = time.perf_counter() - start
+        count = len(texts)
+    else:
+        raise ValueError(f"未知场景：{scenario}")
+    return {'count': count, 'wall': wall, 'peak_rss_mb': peak_rss_mb()}
+
+
+def peak_rss_mb() -> float:
+    """本进程的峰值常驻内存（MB）。
+
+    Linux 的 ru_maxrss 会从父进程继承（子进程至少报告父进程 fork 时的峰值），优先读 /proc 中
+    只属于本进程地址空间的 VmHWM；其它系统退回 ru_maxrss（Linux 为 KB，macOS 为字节）。
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(scenario: str, workdir: str, rounds: int) -> dict:
+    best = None
+    for _ in range(rounds):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            result = pool.submit(run_scenario, scenario, workdir).result()
+        if best is None:
+            best = result
+        else:
+            best['peak_rss_mb'] = max(best['peak_rss_mb'], result['peak_rss_mb'])
+            if result['wall'] < best['wall']:
+                best['wall'] = result['wall']
+    best['throughput'] = best['count'] / best['wall'] if best['wall'] else 0.0
+    return best
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """返回回退说明列表：吞吐量下降或峰值内存上升超过 threshold 的场景"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current['throughput'] < previous['throughput'] * (1 - threshold):
+            regressions.append(f"{key}: 吞吐量 {previous['throughput']:.0f} -> {current['throughput']:.0f} 道/秒")
+        if current['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + threshold):
+            regressions.append(f"{key}: 峰值内存 {previous['peak_rss_mb']:.1f} -> {current['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def main(sizes: list = SIZES, update_baseline: bool = False, rounds: int = ROUNDS):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            prepare(workdir, size)
+            print(f"{size} 道菜谱：生成语料 {time.perf_counter() - start:.1f}s")
+            for scenario in SCENARIOS:
+                result = measure(scenario, workdir, rounds if size <= MAX_REPEAT_SIZE else 1)
+                results[f"{scenario}@{size}"] = result
+                print(f"  {scenario:<15} {result['throughput']:>10.0f} 道/秒  {result['wall']:>8.3f}s  "
+                      f"峰值内存 {result['peak_rss_mb']:.1f}MB")
+
+    output = {'python': sys.version.split()[0], 'rounds': rounds, 'results': results}
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {RESULTS_FILE}")
+
+    if update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"已更新基线 {BASELINE_FILE}")
+        return 0
+    if not os.path.exists(BASELINE_FILE):
+        print(f"没有基线文件 {BASELINE_FILE}，可加 --update-baseline 把本次结果设为基线")
+        return 0
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"性能回退（阈值 {REGRESSION_THRESHOLD:.0%}）：")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"与基线 {BASELINE_FILE} 相比没有超过 {REGRESSION_THRESHOLD:.0%} 的回退")
+    return 0
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if a != '--update-baseline']
+    sys.exit(main([int(x) for x in args] or SIZES, '--update-baseline' in sys.argv[1:]))
@@ -0,0 +1,87 @@
+import sys
+import json
+import time
+import random
+
+from build_index import parse_ingredient_tokens, recipe_ingredient_names
+from recipe_index import RecipeIndex, UNCATEGORIZED
+
+# 随机生成“手头食材”查询，对比 RecipeIndex 与逐条扫描（照搬前端 recommend() 的实现）的结果和耗时；批量查询另与逐条查询比对结果
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [2000, 100000]
+QUERY_COUNT = 5000
+CHECK_COUNT = 200
+TOP_K = 10
+
+
+def recommend_scan(recipes: list, names: list, query: str, k, category=None) -> list:
+    tokens = parse_ingredient_tokens(query)
+    if not tokens:
+        return []
+    scored = []
+    for i, r in enumerate(recipes):
+        if category is not None and (r.get('category') or UNCATEGORIZED) != category:
+            continue
+        matched = [t for t in tokens if any(n in t or t in n for n in names[i])]
+        if matched:
+            scored.append((-len(matched), r.get('difficulty') or 0, i, matched))
+    scored.sort()
+    return [(i, matched) for _, _, i, matched in scored[:k]]
+
+
+def make_queries(vocab: list, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        words = []
+        for _ in range(rng.randint(1, 6)):
+            w = rng.choice(vocab)
+            if rng.random() < 0.3:
+                start = rng.randrange(len(w))
+                w = w[start:start + rng.randint(1, 3)]
+            words.append(w)
+        queries.append(rng.choice(['，', ',', '、', '\n']).join(words))
+    return queries
+
+
+def scale(base: list, n: int) -> list:
+    return [dict(base[i % len(base)], name=f"{base[i % len(base)]['name']}#{i}") for i in range(n)]
+
+
+def main(sizes: list = SIZES):
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    vocab = sorted({n for r in base for n in recipe_ingredient_names(r)})
+    queries = make_queries(vocab, QUERY_COUNT)
+    for size in sizes:
+        recipes = scale(base, size)
+        start = time.perf_counter()
+        index = RecipeIndex(recipes)
+        build = time.perf_counter() - start
+
+        names = [recipe_ingredient_names(r) for r in recipes]
+        categories = [None, index.categories[0]]
+        start = time.perf_counter()
+        for q in queries[:CHECK_COUNT]:
+            for category in categories:
+                expected = recommend_scan(recipes, names, q, TOP_K, category)
+                got = [(r['id'], r['matched_names']) for r in index.recommend(q, TOP_K, category)]
+                assert got == expected, (q, category, got, expected)
+        scan = (time.perf_counter() - start) / (CHECK_COUNT * len(categories))
+        # 批量查询须与逐条 recommend() 完全一致（含 k=None 返回全部命中）
+        for category in categories:
+            for k in (TOP_K, None):
+                checked = queries[:CHECK_COUNT]
+                assert index.recommend_batch(checked, k, category) == \
+                    [index.recommend(q, k, category) for q in checked], (category, k)
+
+        start = time.perf_counter()
+        index.recommend_batch(queries, TOP_K)
+        batch = time.perf_counter() - start
+        print(f"{size:>7} 道菜谱：构建 {build:.2f}s；逐条扫描 {scan * 1000:.2f}ms/次；"
+              f"RecipeIndex 批量 {len(queries)} 次 {batch:.2f}s（{batch / len(queries) * 1000:.3f}ms/次），"
+              f"快 {scan / (batch / len(queries)):.0f} 倍")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+import numpy as np
+
+from search_index import SearchIndex, tokenize, TOP_K, MAX_DEPTH
+
+# 随机抽取菜名/步骤中的片段作为查询，校验 SearchIndex 的前 k 条与逐条打分排序完全相同、导出再读回的索引结果相同，
+# 单字查询命中的菜谱与子串扫描相同；统计截断查询（max_depth=MAX_DEPTH）与精确结果一致的比例，
+# 并对比逐条扫描步骤文本（子串匹配，不排序）和 SearchIndex 的查询耗时
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [2000, 100000]
+QUERY_COUNT = 2000
+CHECK_COUNT = 200
+TECHNIQUES = ['焯水', '收汁', '勾芡', '爆香', '腌制', '红烧肉', '番茄炒蛋', '小火慢炖']
+# 按单个字搜索食材
+CHARS = ['鸡', '蛋', '盐', '糖', '醋', '葱', '姜', '蒜', '肉', '鱼']
+
+
+def make_queries(recipes: list, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    queries = list(TECHNIQUES)
+    while len(queries) < n:
+        recipe = rng.choice(recipes)
+        text = rng.choice([recipe['name']] + list(recipe.get('steps') or []))
+        if len(text) < 2:
+            continue
+        start = rng.randrange(len(text) - 1)
+        queries.append(text[start:start + rng.randint(2, 6)])
+    return queries
+
+
+def exhaustive(index: SearchIndex, query: str, k: int) -> list:
+    """对全部菜谱逐一打分后排序的参照实现"""
+    tids = [index.terms[t] for t in dict.fromkeys(tokenize(query)) if t in index.terms]
+    scores = np.zeros(index.count, dtype=np.int64)
+    for tid in tids:
+        scores[index.postings[tid]] += index.impacts[tid]
+    hits = np.flatnonzero(scores)
+    ranked = hits[np.lexsort((hits, -scores[hits]))][:k]
+    return [(int(i), int(scores[i])) for i in ranked]
+
+
+def scale(base: list, n: int) -> list:
+    return [dict(base[i % len(base)], name=f"{base[i % len(base)]['name']}#{i}") for i in range(n)]
+
+
+def main(sizes: list = SIZES):
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    queries = make_queries(base, QUERY_COUNT)
+    for size in sizes:
+        recipes = scale(base, size)
+        start = time.perf_counter()
+        index = SearchIndex.build(recipes)
+        build = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'search_index.json')
+            index.save(path)
+            artifact_size = os.path.getsize(path)
+            loaded = SearchIndex.load(path)
+        steps = [' '.join(r.get('steps') or ()) for r in recipes]
+        names = [r['name'] for r in recipes]
+        truncated = 0
+        for q in queries[:CHECK_COUNT]:
+            got = index.search_ids(q, TOP_K)
+            assert loaded.search_ids(q, TOP_K) == got, q
+            assert got == exhaustive(index, q, TOP_K), q
+            assert index.search_ids(q, None) == exhaustive(index, q, index.count), q
+            results = index.search(q, TOP_K, max_depth=MAX_DEPTH)
+            same = [(r['id'], r['score']) for r in results] == [(i, round(s * index.scale, 4)) for i, s in got]
+            # 标为精确的截断结果必须与精确结果相同
+            assert same or not results[0]['exact'], q
+            truncated += same
+        for c in CHARS:
+            hits = sorted(i for i, _ in index.search_ids(c, None))
+            assert hits == [i for i in range(size) if c in names[i] or c in steps[i]], c
+        start = time.perf_counter()
+        for q in queries[:CHECK_COUNT]:
+            [i for i in range(size) if q in names[i] or q in steps[i]]
+        scan = (time.perf_counter() - start) / CHECK_COUNT
+
+        report = []
+        for label, max_depth in (('精确', None), (f"截断到 {MAX_DEPTH}", MAX_DEPTH)):
+            timings = []
+            for q in queries:
+                start = time.perf_counter()
+                index.search_ids(q, TOP_K, max_depth)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            per_query = sum(timings) / len(timings)
+            p99 = timings[int(len(timings) * 0.99)]
+            report.append(f"{label} 平均 {per_query * 1000:.3f}ms/次、p99 {p99 * 1000:.3f}ms、快 {scan / per_query:.0f} 倍")
+        print(f"{size:>7} 道菜谱：构建 {build:.2f}s，导出 {artifact_size / 1024:.0f} KB；逐条扫描 {scan * 1000:.2f}ms/次；"
+              f"SearchIndex 前 {TOP_K} 条：{'；'.join(report)}；截断结果与精确结果一致 {truncated}/{CHECK_COUNT}")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
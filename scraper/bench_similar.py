@@ -0,0 +1,76 @@
+import sys
+import json
+import time
+import random
+
+import numpy as np
+
+from similar_recipes import SimilarityBuilder, TOP_K
+from bench_pipeline import peak_rss_mb
+
+# 对比 SimilarityBuilder 与稠密矩阵逐对计算余弦相似度（参照实现）的前 k 个结果，统计召回率；
+# 并测量大规模语料的构建耗时。扩容时每个副本随机去掉约三成食材，避免所有副本完全相同
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [2000, 100000]
+# 超过该规模不跑稠密参照实现（n² 的相似度矩阵放不进内存）
+MAX_CHECK_SIZE = 5000
+DROP_RATE = 0.3
+
+
+def scale(base: list, n: int, seed: int = 0) -> list:
+    if n == len(base):
+        return base
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(n):
+        recipe = base[i % len(base)]
+        ingredients = [ing for ing in recipe['ingredients'] if rng.random() >= DROP_RATE] or recipe['ingredients']
+        recipes.append(dict(recipe, name=f"{recipe['name']}#{i}", ingredients=ingredients))
+    return recipes
+
+
+def exhaustive(builder: SimilarityBuilder, k: int) -> tuple:
+    """稠密矩阵相乘得到全部余弦相似度，每行按得分降序、编号升序取前 k（只取相似度大于 0 的）"""
+    rows, cols, weights, df = builder.matrix()
+    n = len(builder.indptr) - 1
+    dense = np.zeros((n, len(df)))
+    dense[rows, cols] = weights
+    sims = dense @ dense.T
+    np.fill_diagonal(sims, 0)
+    ids = np.arange(n)
+    neighbours, scores = [], []
+    for i in range(n):
+        hits = np.flatnonzero(sims[i] > 1e-12)
+        top = hits[np.lexsort((ids[hits], -sims[i][hits]))][:k]
+        neighbours.append(top.tolist())
+        scores.append(sims[i][top])
+    return neighbours, scores
+
+
+def main(sizes: list = SIZES):
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    for size in sizes:
+        builder = SimilarityBuilder()
+        for recipe in scale(base, size):
+            builder.add(recipe)
+        start = time.perf_counter()
+        table = builder.build(TOP_K)
+        build = time.perf_counter() - start
+        line = f"{size:>7} 道菜谱：计算 {build:.2f}s，峰值内存 {peak_rss_mb():.0f}MB"
+        if size <= MAX_CHECK_SIZE:
+            expected, expected_scores = exhaustive(builder, TOP_K)
+            hit = total = score_equal = 0
+            for i, ids in enumerate(expected):
+                got = [doc for doc, _ in table.similar(i)]
+                hit += len(set(got) & set(ids))
+                total += len(ids)
+                # 只要前 k 的相似度序列相同，就算顺序不同的同分菜谱也视为结果正确
+                got_scores = table.scores[i][:len(got)]
+                score_equal += len(got) == len(ids) and np.allclose(got_scores, expected_scores[i], atol=1e-5)
+            line += f"；召回率 {hit / total:.2%}，前 {TOP_K} 得分完全一致 {score_equal}/{size}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from recipe_table import RecipeTable
+
+# 用现有菜谱随机改动难度/时长/口味，放大到指定规模，对比列式表与逐条遍历 dict 的多条件查询耗时
+SOURCE_FILE = 'recipes_clean.json'
+SIZES = [100000, 1000000]
+ROUNDS = 20
+
+
+def make_recipes(base: list, n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    tastes = sorted({t for r in base for t in r.get('taste') or []})
+    recipes = []
+    for i in range(n):
+        r = base[i % len(base)]
+        recipes.append({
+            'name': f"{r['name']}#{i}",
+            'category': r.get('category'),
+            'source': r.get('source'),
+            'difficulty': rng.randint(0, 5),
+            'cooking_time': None if rng.random() < 0.15 else rng.randint(5, 180),
+            'taste': rng.sample(tastes, rng.randint(0, 3)),
+        })
+    return recipes
+
+
+def query_loop(recipes: list, categories: set) -> list:
+    """与 QUERY 等价的逐条遍历实现"""
+    ids = [i for i, r in enumerate(recipes)
+           if r['category'] in categories and r['difficulty'] <= 2
+           and r['cooking_time'] is not None and r['cooking_time'] <= 30
+           and '咸鲜' in r['taste']]
+    ids.sort(key=lambda i: (recipes[i]['difficulty'], -recipes[i]['cooking_time']))
+    return ids
+
+
+def query_table(table: RecipeTable, categories: list) -> np.ndarray:
+    mask = table.filter(category=categories, max_difficulty=2, max_time=30, taste_all=['咸鲜'])
+    return table.sort(mask, ['difficulty', '-cooking_time'])
+
+
+def best_time(fn, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes: list = SIZES):
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    categories = [c for c, _ in Counter(r.get('category') for r in base).most_common(5)]
+    for n in sizes:
+        recipes = make_recipes(base, n)
+        start = time.perf_counter()
+        table = RecipeTable.from_recipes(recipes)
+        build = time.perf_counter() - start
+
+        expected = query_loop(recipes, set(categories))
+        got = query_table(table, categories)
+        assert got.tolist() == expected, '列式查询结果与逐条遍历不一致'
+        # rows() 既接受行号也接受 filter() 返回的布尔掩码
+        mask = table.filter(category=categories, max_difficulty=2)
+        assert table.rows(mask, 50) == table.rows(np.flatnonzero(mask), 50), 'rows() 处理布尔掩码出错'
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'table.npz')
+            table.save(path)
+            load = best_time(lambda: RecipeTable.load(path), 3)
+            size = os.path.getsize(path)
+
+        loop = best_time(lambda: query_loop(recipes, set(categories)), max(1, ROUNDS // 10))
+        vec = best_time(lambda: query_table(table, categories), ROUNDS)
+        print(f"{n:>8} 条：构建 {build:.2f}s，加载 .npz {load * 1000:.1f}ms（{size / 1e6:.1f}MB），"
+              f"命中 {len(expected)} 条；逐条遍历 {loop * 1000:.1f}ms，列式 {vec * 1000:.2f}ms，"
+              f"快 {loop / vec:.0f} 倍")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or SIZES)
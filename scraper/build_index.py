@@ -0,0 +1,123 @@
+import re
+import json
+import os
+import sys
+
+from merge_datasets import iter_json_records
+
+# 输入：合并后的菜谱；输出：与之配套的食材倒排索引，前端用它代替逐条扫描
+INPUT_FILE = 'recipes_clean.json'
+OUTPUT_FILE = 'recipes_index.json'
+INDEX_VERSION = 1
+
+# 前端 parseIngredientTokens 的分隔符
+TOKEN_SEPARATOR_RE = re.compile('[,，、\n]')
+# JavaScript 正则 \s 匹配的字符集合（与 Python 的 str.split() 略有不同）
+JS_WHITESPACE_RE = re.compile('[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]+')
+
+
+def normalize_text(s) -> str:
+    """与前端 normalizeText 一致：去首尾空白、转小写、去掉所有空白"""
+    return JS_WHITESPACE_RE.sub('', str(s or '').lower())
+
+
+def recipe_ingredient_names(recipe: dict) -> list:
+    """与前端 recipeIngredientText 一致：菜谱里全部非空的归一化食材名，去重后按首次出现的顺序排列
+    （不用 set：集合的遍历顺序随 PYTHONHASHSEED 变化，食材编号和输出文件就不可复现）"""
+    ingredients = recipe.get('ingredients')
+    if not isinstance(ingredients, list):
+        return []
+    names = (normalize_text(ing.get('name')) for ing in ingredients if isinstance(ing, dict))
+    return list(dict.fromkeys(n for n in names if n))
+
+
+def build_index(recipes) -> dict:
+    """构建食材倒排索引。recipes 的顺序即菜谱编号（与 recipes_clean.json 中的下标一致）。
+
+    返回：
+        count:       菜谱总数，前端用来确认索引与菜谱文件配套
+        ingredients: 归一化食材名列表，下标即食材编号
+        postings:    与 ingredients 对齐，每个食材出现过的菜谱编号（升序）
+        substrings:  食材名的每个子串 -> 包含该子串的食材编号（升序）
+
+    前端匹配规则是“食材名包含输入词，或输入词包含食材名”。查询输入词 t 时，
+    substrings[t] 给出包含 t 的食材；t 的各个子串在 ingredients 中查到的是被 t 包含的食材；
+    两者并集的倒排表合并，即为命中 t 的全部菜谱。
+    """
+    vocab = {}
+    postings = []
+    count = 0
+    for rid, recipe in enumerate(recipes):
+        count = rid + 1
+        for name in recipe_ingredient_names(recipe):
+            iid = vocab.get(name)
+            if iid is None:
+                iid = vocab[name] = len(postings)
+                postings.append([])
+            postings[iid].append(rid)
+
+    substrings = {}
+    for name, iid in vocab.items():
+        # 子串按位置顺序遍历，substrings 的键顺序因此固定
+        for sub in dict.fromkeys(name[i:j] for i in range(len(name)) for j in range(i + 1, len(name) + 1)):
+            substrings.setdefault(sub, []).append(iid)
+    for ids in substrings.values():
+        ids.sort()
+
+    return {
+        'version': INDEX_VERSION,
+        'count': count,
+        'ingredients': list(vocab),
+        'postings': postings,
+        'substrings': substrings,
+    }
+
+
+def parse_ingredient_tokens(text: str) -> list:
+    """与前端 parseIngredientTokens 一致：按逗号、顿号、换行切分并归一化；去重后保持输入顺序"""
+    tokens = (normalize_text(t) for t in TOKEN_SEPARATOR_RE.split(str(text or '')))
+    return list(dict.fromkeys(t for t in tokens if t))
+
+
+def match_ingredients(index: dict, token: str, vocab: dict | None = None) -> set:
+    """返回与输入词 token 互相包含的食材编号集合"""
+    if vocab is None:
+        vocab = {name: iid for iid, name in enumerate(index['ingredients'])}
+    ids = set(index['substrings'].get(token, ()))
+    for i in range(len(token)):
+        for j in range(i + 1, len(token) + 1):
+            iid = vocab.get(token[i:j])
+            if iid is not None:
+                ids.add(iid)
+    return ids
+
+
+def match_token(index: dict, token: str, vocab: dict | None = None) -> set:
+    """返回命中输入词 token 的菜谱编号集合（与前端逐条扫描的 includes 语义一致）"""
+    matched = set()
+    for iid in match_ingredients(index, token, vocab):
+        matched.update(index['postings'][iid])
+    return matched
+
+
+def write_index(index: dict, path: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def main(input_file: str = INPUT_FILE, output_file: str = OUTPUT_FILE):
+    index = build_index(iter_json_records(input_file))
+    write_index(index, output_file)
+    print(f"索引完成：{index['count']} 道菜谱，{len(index['ingredients'])} 种食材，"
+          f"{len(index['substrings'])} 个子串，已保存到 {output_file}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,180 @@
+import time
+import random
+import asyncio
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# 全局并发上限：同时在途的请求数
+CONCURRENCY = 16
+# 每个主机保持的 keep-alive 连接数上限
+CONNECTIONS_PER_HOST = 8
+# 每个主机每秒最多发起的请求数；None 表示不限速
+RATE_PER_HOST = 5.0
+# 失败后的最大重试次数（不含首次请求）
+MAX_RETRIES = 3
+# 指数退避的基数（秒）：第 n 次重试前等待约 BACKOFF_BASE * 2**n，并加随机抖动
+BACKOFF_BASE = 0.5
+# 单个 URL 的总时间预算（秒），包含所有重试和退避等待
+REQUEST_TIMEOUT = 20
+# 这些状态码视为临时错误，会重试
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """按主机限速：同一主机相邻两次请求的发起时间至少间隔 1/rate 秒"""
+
+    def __init__(self, rate: float | None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._locks = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class Fetcher:
+    """基于 asyncio/aiohttp 的抓取引擎：全局并发上限、按主机复用连接与限速、带退避的重试、单 URL 时间预算。
+
+    用法：
+        async with Fetcher() as fetcher:
+            results = await fetcher.fetch_all(urls)
+
+    每个结果是 dict：{'url', 'status', 'text', 'headers', 'error', 'attempts', 'cache'}；
+    失败时 status 为最后一次的状态码（网络错误为 None），error 为错误描述。
+
+    传入 cache（http_cache.HttpCache）后，新鲜的缓存直接返回；过期的带 If-None-Match/If-Modified-Since
+    重新验证，304 时用缓存正文；200 响应写回缓存。'cache' 字段为 'hit'/'revalidated'/'miss'，未启用缓存时为 None。
+    offline=True 时完全不发请求，只从缓存回放，未命中记为错误。
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY, connections_per_host: int = CONNECTIONS_PER_HOST,
+                 rate_per_host: float | None = RATE_PER_HOST, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, timeout: float = REQUEST_TIMEOUT, headers: dict | None = None,
+                 cache=None, offline: bool = False):
+        self.concurrency = concurrency
+        self.connections_per_host = connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.headers = headers
+        self.cache = cache
+        self.offline = offline
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.connections_per_host)
+        self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def _request(self, url: str, timeout: float, headers: dict | None) -> dict:
+        async with self._session.get(url, headers=headers,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            body = await resp.read()
+            return {
+                'url': url,
+                'status': resp.status,
+                'text': body.decode(resp.get_encoding(), errors='replace'),
+                'headers': dict(resp.headers),
+                'error': None,
+            }
+
+    async def fetch(self, url: str, headers: dict | None = None) -> dict:
+        """抓取单个 URL（先查缓存）；不会抛出网络异常，错误记录在结果的 error 字段"""
+        if self.cache is None:
+            if self.offline:
+                return self._miss(url, '离线模式需要启用缓存')
+            result = await self._fetch_network(url, headers)
+            result['cache'] = None
+            return result
+
+        entry = self.cache.lookup(url)
+        if self.offline:
+            return self._from_cache(entry, 'hit', 0) if entry else self._miss(url, '离线模式：缓存中没有该页面')
+        if entry and entry['fresh']:
+            return self._from_cache(entry, 'hit', 0)
+
+        if entry:
+            headers = {**(headers or {}), **self.cache.conditional_headers(entry)}
+        result = await self._fetch_network(url, headers)
+        if entry and result['status'] == 304:
+            self.cache.refresh(url, result['headers'])
+            return self._from_cache(entry, 'revalidated', result['attempts'])
+        if result['status'] == 200 and not result['error']:
+            self.cache.store(url, result['status'], result['text'], result['headers'])
+        result['cache'] = 'miss'
+        return result
+
+    @staticmethod
+    def _from_cache(entry: dict, how: str, attempts: int) -> dict:
+        return {'url': entry['url'], 'status': entry['status'], 'text': entry['text'], 'headers': entry['headers'],
+                'error': None, 'attempts': attempts, 'cache': how}
+
+    @staticmethod
+    def _miss(url: str, error: str) -> dict:
+        return {'url': url, 'status': None, 'text': '', 'headers': {}, 'error': error, 'attempts': 0, 'cache': 'miss'}
+
+    async def _fetch_network(self, url: str, headers: dict | None) -> dict:
+        """带限速、重试和时间预算地发起网络请求"""
+        host = urlsplit(url).netloc
+        result = {'url': url, 'status': None, 'text': '', 'headers': {}, 'error': None}
+        attempt = 0
+        async with self._semaphore:
+            # 时间预算从拿到并发名额开始计算，排队时间不计入
+            deadline = time.monotonic() + self.timeout
+            while True:
+                attempt += 1
+                await self.rate_limiter.wait(host)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    result['error'] = result['error'] or '超出时间预算'
+                    break
+                try:
+                    result = await self._request(url, remaining, headers)
+                    if result['status'] not in RETRY_STATUSES:
+                        break
+                    result['error'] = f"HTTP {result['status']}"
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result = {'url': url, 'status': None, 'text': '', 'headers': {},
+                              'error': f"{type(e).__name__}: {e}"}
+
+                if attempt > self.max_retries:
+                    break
+                delay = self.backoff_base * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                if time.monotonic() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+
+        if result['error'] is None and result['status'] and result['status'] >= 400:
+            result['error'] = f"HTTP {result['status']}"
+        result['attempts'] = attempt
+        return result
+
+    async def fetch_all(self, urls, headers: dict | None = None) -> list:
+        """并发抓取多个 URL，结果顺序与输入一致"""
+        return await asyncio.gather(*(self.fetch(url, headers) for url in urls))
+
+    async def fetch_each(self, urls, headers: dict | None = None):
+        """并发抓取多个 URL，按完成先后依次产出结果，便于边抓边处理"""
+        tasks = [asyncio.ensure_future(self.fetch(url, headers)) for url in urls]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # 调用方提前退出或被取消时，不留下仍在运行的抓取任务
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,106 @@
+import time
+import sqlite3
+
+# URL 状态
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+# URL 类型：分类列表页 / 菜谱详情页
+CATEGORY = 'category'
+RECIPE = 'recipe'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    seq INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_status ON urls (status, kind, seq);
+"""
+
+
+class CrawlFrontier:
+    """基于 SQLite 的持久化抓取队列。
+
+    每个 URL 只记录一次（主键去重，O(1)），状态在 pending/in_progress/done/failed 之间流转，
+    每次状态变化立即落盘。进程中断后重新打开时，中断前领取但未完成的 URL 会回到 pending，
+    已完成的页面不会再抓。
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute('UPDATE urls SET status = ? WHERE status = ?', (PENDING, IN_PROGRESS))
+        row = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM urls').fetchone()
+        self._seq = row[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, urls, kind: str) -> int:
+        """加入新发现的 URL，已存在的忽略；返回真正新增的数量"""
+        now = time.time()
+        rows = []
+        for url in urls:
+            self._seq += 1
+            rows.append((url, kind, PENDING, self._seq, now))
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO urls (url, kind, status, seq, updated_at) VALUES (?, ?, ?, ?, ?)', rows)
+            return self.conn.total_changes - before
+
+    def claim(self, limit: int, kinds=(CATEGORY, RECIPE)) -> list:
+        """按 kinds 的先后（默认分类页优先）和发现顺序领取至多 limit 个待抓 URL，标记为 in_progress；
+        返回 [(url, kind)]。查询走 (status, kind, seq) 索引，不随队列长度变慢。"""
+        rows = []
+        with self.conn:
+            for kind in kinds:
+                if len(rows) >= limit:
+                    break
+                rows += self.conn.execute(
+                    'SELECT url, kind FROM urls WHERE status = ? AND kind = ? ORDER BY seq LIMIT ?',
+                    (PENDING, kind, limit - len(rows))).fetchall()
+            self.conn.executemany('UPDATE urls SET status = ?, updated_at = ? WHERE url = ?',
+                                  [(IN_PROGRESS, time.time(), url) for url, _ in rows])
+        return rows
+
+    def mark_done(self, url: str):
+        with self.conn:
+            self.conn.execute('UPDATE urls SET status = ?, attempts = attempts + 1, error = NULL, updated_at = ? '
+                              'WHERE url = ?', (DONE, time.time(), url))
+
+    def mark_failed(self, url: str, error: str):
+        with self.conn:
+            self.conn.execute('UPDATE urls SET status = ?, attempts = attempts + 1, error = ?, updated_at = ? '
+                              'WHERE url = ?', (FAILED, error, time.time(), url))
+
+    def retry_failed(self, max_attempts: int | None = None) -> int:
+        """把失败的 URL 放回队列（可限制最多尝试次数）；返回放回的数量"""
+        sql = 'UPDATE urls SET status = ? WHERE status = ?'
+        params = [PENDING, FAILED]
+        if max_attempts is not None:
+            sql += ' AND attempts < ?'
+            params.append(max_attempts)
+        with self.conn:
+            return self.conn.execute(sql, params).rowcount
+
+    def counts(self) -> dict:
+        """返回 {(kind, status): 数量}"""
+        rows = self.conn.execute('SELECT kind, status, COUNT(*) FROM urls GROUP BY kind, status')
+        return {(kind, status): n for kind, status, n in rows}
@@ -1,9 +1,25 @@
+import os
+import sys
 import json
+import random
+import shutil
 from itertools import cycle
+from concurrent.futures import ProcessPoolExecutor
+
+from merge_datasets import write_json_atomic
 
 OUTPUT_FILE = "new_data_source.json"
 TARGET_COUNT = 2300  # 生成略多于 2000，供后续去重截断
 
+# 流式大语料模式（压测用）：按编号逐条生成、写成 JSONL，内存占用与条数无关
+STREAM_OUTPUT_FILE = "synthetic_corpus.jsonl"
+STREAM_SEED = 0
+# 与更早某条菜谱完全相同（含名称）的比例、轻微改动后的近似重复比例
+DUPLICATE_RATE = 0.02
+NEAR_DUPLICATE_RATE = 0.08
+# 并行生成时每个分片的条数；各分片写临时文件，最后按顺序拼接，结果与串行生成逐字节一致
+STREAM_SHARD_SIZE = 100000
+
 # 基础模板（覆盖家常菜、卤味、面点、甜品、饮品、简餐等）
 TEMPLATES = [
     {
@@ -390,6 +406,139 @@ def generate_dataset():
     return data
 
 
+# 流式模式的组合素材：主料（名称、数量范围、单位）、配菜、调料、做法
+MAIN_INGREDIENTS = [
+    ("鸡胸肉", 150, 400, "克"), ("去骨鸡腿", 200, 500, "克"), ("猪里脊", 150, 400, "克"), ("五花肉", 200, 600, "克"),
+    ("排骨", 300, 800, "克"), ("牛腩", 300, 800, "克"), ("牛里脊", 150, 350, "克"), ("羊肉", 200, 500, "克"),
+    ("虾仁", 100, 300, "克"), ("草鱼", 500, 1200, "克"), ("鲈鱼", 400, 900, "克"), ("鱿鱼", 200, 500, "克"),
+    ("豆腐", 1, 2, "块"), ("鸡蛋", 2, 5, "个"), ("茄子", 1, 3, "根"), ("土豆", 1, 3, "个"),
+    ("花菜", 1, 1, "颗"), ("莲藕", 1, 2, "节"), ("冬瓜", 300, 600, "克"), ("南瓜", 300, 600, "克"),
+]
+SIDE_INGREDIENTS = [
+    ("青椒", 1, 2, "个"), ("红椒", 1, 2, "个"), ("洋葱", 1, 1, "个"), ("胡萝卜", 1, 2, "根"), ("黄瓜", 1, 2, "根"),
+    ("西红柿", 1, 3, "个"), ("木耳", 10, 30, "克"), ("香菇", 4, 8, "朵"), ("金针菇", 1, 1, "把"), ("豆芽", 100, 250, "克"),
+    ("芹菜", 2, 4, "根"), ("蒜苗", 2, 4, "根"), ("白菜", 200, 500, "克"), ("菠菜", 150, 300, "克"), ("玉米粒", 50, 150, "克"),
+]
+AROMATICS = ["葱花", "姜片", "蒜末", "葱段", "姜丝", "干辣椒", "花椒", "八角"]
+SEASONINGS = ["盐", "生抽", "老抽", "蚝油", "料酒", "糖", "香醋", "淀粉", "胡椒粉", "郫县豆瓣", "番茄酱", "芝麻油"]
+SEASONING_AMOUNTS = ["1/4勺", "1/3勺", "1/2勺", "1勺", "1.5勺", "2勺", "适量", "少许"]
+CUTS = ["切块", "切片", "切丝", "切丁", "切段", "拍碎"]
+METHODS = [("炒", "翻炒"), ("烧", "焖烧"), ("炖", "小火慢炖"), ("煎", "煎至两面金黄"), ("蒸", "大火蒸"), ("焖", "加盖焖")]
+HEATS = ["大火", "中火", "中小火", "小火"]
+FINISHES = ["大火收汁后出锅", "撒上葱花即可", "淋少许芝麻油出锅", "翻匀后盛盘", "关火焖两分钟再出锅"]
+STREAM_CATEGORIES = ["家常菜", "川菜", "粤菜", "砂锅", "快餐"]
+STREAM_TASTES = ["咸鲜", "香辣", "麻辣", "酸甜", "清淡", "酱香"]
+TIPS = ["喜欢软烂可以多焖几分钟。", "提前腌制口感更嫩。", "火候不要太大，以免糊锅。", "出锅前尝味再决定是否补盐。",
+        "可以用鸡胸肉替换，做法相同。", "汤汁多留一些拌饭更好吃。"]
+
+
+def _amount(rng: random.Random, low: int, high: int, unit: str) -> str:
+    if unit == "克":
+        return f"{rng.randrange(low, high + 1, 10) if high - low >= 10 else low}{unit}"
+    return f"{rng.randint(low, high)}{unit}"
+
+
+def _base_item(seed: int, idx: int) -> dict:
+    """第 idx 条的原创菜谱：随机数生成器只由 (seed, idx) 决定，任意编号可以独立重算，不依赖前面的条目"""
+    rng = random.Random(f"{seed}:{idx}")
+    mains = rng.sample(MAIN_INGREDIENTS, rng.randint(1, 2))
+    sides = rng.sample(SIDE_INGREDIENTS, rng.randint(0, 3))
+    aromatics = rng.sample(AROMATICS, rng.randint(1, 3))
+    seasonings = rng.sample(SEASONINGS, rng.randint(2, 5))
+    method, action = rng.choice(METHODS)
+    heat = rng.choice(HEATS)
+
+    ingredients = [{"name": n, "quantity": _amount(rng, lo, hi, u)} for n, lo, hi, u in mains + sides]
+    ingredients += [{"name": n, "quantity": rng.choice(["适量", "少许", "1小把", "3-4片"])} for n in aromatics]
+    ingredients += [{"name": n, "quantity": rng.choice(SEASONING_AMOUNTS)} for n in seasonings]
+    ingredients += [{"name": "食用油", "quantity": rng.choice(["1勺", "2勺", "适量"])}]
+
+    main_names = [m[0] for m in mains]
+    side_names = [s[0] for s in sides]
+    minutes = rng.randint(3, 40)
+    steps = [f"{name}洗净{rng.choice(CUTS)}，备用。" for name in main_names + side_names]
+    if rng.random() < 0.5:
+        steps.append(f"{main_names[0]}加{seasonings[0]}和{rng.choice(SEASONINGS)}抓匀，腌制{rng.randint(5, 30)}分钟。")
+    steps.append(f"锅中倒油，{heat}下{'、'.join(aromatics)}爆香。")
+    steps.append(f"放入{'和'.join(main_names)}{action}{minutes}分钟。")
+    if side_names:
+        steps.append(f"加入{'、'.join(side_names)}继续翻炒{rng.randint(1, 5)}分钟。")
+    steps.append(f"加入{'、'.join(seasonings)}调味，{rng.choice(FINISHES)}。")
+    if rng.random() < 0.3:
+        steps.append(rng.choice(TIPS))
+
+    title = f"{''.join(side_names[:1])}{method}{main_names[0]}"
+    category = rng.choice(STREAM_CATEGORIES)
+    return {
+        "title": f"{title}（{rng.choice(VARIANTS)}{idx}）",
+        "category": category,
+        "ingredients": ingredients,
+        "steps": steps,
+        "cooking_time": minutes + rng.randint(5, 20),
+        "difficulty": rng.randint(1, 4),
+        "taste": rng.sample(STREAM_TASTES, rng.randint(1, 2)),
+        "source_category": category,
+    }
+
+
+def make_item(seed: int, idx: int, duplicate_rate: float = DUPLICATE_RATE,
+              near_duplicate_rate: float = NEAR_DUPLICATE_RATE) -> dict:
+    """第 idx 条：按比例为原创菜谱、更早某条的完全重复，或更早某条的近似重复（换名、改一个用量、增删一步）"""
+    rng = random.Random(f"{seed}:{idx}:dup")
+    roll = rng.random()
+    if idx == 0 or roll >= duplicate_rate + near_duplicate_rate:
+        return _base_item(seed, idx)
+    item = make_item(seed, rng.randrange(idx), duplicate_rate, near_duplicate_rate)
+    if roll < duplicate_rate:
+        return item
+    item["title"] = f"{item['title'].split('（')[0]}（{rng.choice(VARIANTS)}{idx}）"
+    k = rng.randrange(len(item["ingredients"]))
+    item["ingredients"][k] = dict(item["ingredients"][k], quantity=rng.choice(SEASONING_AMOUNTS))
+    if len(item["steps"]) > 3 and rng.random() < 0.5:
+        del item["steps"][rng.randrange(1, len(item["steps"]))]
+    else:
+        item["steps"].append(rng.choice(TIPS))
+    return item
+
+
+def iter_corpus(count: int, seed: int = STREAM_SEED, start: int = 0, duplicate_rate: float = DUPLICATE_RATE,
+                near_duplicate_rate: float = NEAR_DUPLICATE_RATE):
+    """逐条产出编号 [start, start + count) 的合成菜谱；同样的 seed 总是得到同样的语料"""
+    for idx in range(start, start + count):
+        yield make_item(seed, idx, duplicate_rate, near_duplicate_rate)
+
+
+def _write_shard(path: str, start: int, count: int, seed: int, duplicate_rate: float,
+                 near_duplicate_rate: float) -> int:
+    return write_json_atomic(iter_corpus(count, seed, start, duplicate_rate, near_duplicate_rate), path)
+
+
+def generate_stream(count: int, output_file: str = STREAM_OUTPUT_FILE, seed: int = STREAM_SEED, workers: int = 1,
+                    duplicate_rate: float = DUPLICATE_RATE, near_duplicate_rate: float = NEAR_DUPLICATE_RATE) -> int:
+    """流式生成 count 条合成菜谱到 JSONL（也可写 .json 数组）；workers > 1 时分片并行生成再按顺序拼接"""
+    if workers <= 1 or count <= STREAM_SHARD_SIZE or not output_file.endswith(".jsonl"):
+        return write_json_atomic(iter_corpus(count, seed, 0, duplicate_rate, near_duplicate_rate), output_file)
+
+    starts = range(0, count, STREAM_SHARD_SIZE)
+    parts = [f"{output_file}.part{i}.jsonl" for i in range(len(starts))]
+    tmp_path = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_write_shard, part, start, min(STREAM_SHARD_SIZE, count - start), seed,
+                                   duplicate_rate, near_duplicate_rate) for part, start in zip(parts, starts)]
+            total = sum(f.result() for f in futures)
+        with open(tmp_path, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, output_file)
+    finally:
+        for path in parts + [tmp_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    return total
+
+
 def main():
     data = generate_dataset()
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
@@ -398,5 +547,15 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # 无参数：生成固定的 new_data_source.json；
+    # 参数 条数 [输出文件] [进程数] [seed]：流式生成大语料，如 python generate_new_data_source.py 1000000 corpus.jsonl 8
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+        output = sys.argv[2] if len(sys.argv) > 2 else STREAM_OUTPUT_FILE
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else STREAM_SEED
+        written = generate_stream(count, output, seed, workers)
+        print(f"已流式生成 {written} 条菜谱到 {output}")
+    else:
+        main()
 
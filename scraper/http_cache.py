@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# 缓存目录：index.sqlite3 记录 URL -> 响应元数据，正文按内容哈希存放在 objects/ 下（相同正文只存一份）
+CACHE_DIR = '.http_cache'
+# 缓存条目在该时长（秒）内视为新鲜，直接使用不发请求；超过后发条件请求重新验证。None 表示总是验证
+MAX_AGE = 24 * 3600
+# 正文总大小上限（字节），超出时按最近最少使用淘汰
+MAX_BYTES = 512 * 1024 * 1024
+# 淘汰时一直淘汰到总大小不超过 max_bytes 的这个比例，避免之后每次写入都触发淘汰
+LOW_WATER = 0.9
+# 每次从 entries_accessed 索引上取出并删除的最旧条目数
+EVICT_BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_body ON entries (body_hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def header_value(headers: dict, name: str) -> str | None:
+    """不区分大小写地取响应头"""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class HttpCache:
+    """内容寻址的 HTTP 响应磁盘缓存，支持 ETag/Last-Modified 条件请求、max-age 与按大小的 LRU 淘汰。
+
+    只缓存 200 响应。lookup 返回的条目包含 'text'、'status'、'headers'、'etag'、'last_modified'、
+    'fresh'（是否仍在 max_age 内）。
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_age: float | None = MAX_AGE, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # 正文总大小只在打开时汇总一次，之后随写入和删除增减
+        self.total = self.total_bytes()
+
+    def close(self):
+        self.conn.close()
+
+    def _blob_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, 'objects', body_hash[:2], body_hash)
+
+    def lookup(self, url: str) -> dict | None:
+        row = self.conn.execute(
+            'SELECT body_hash, status, headers, etag, last_modified, stored_at FROM entries WHERE url = ?',
+            (url,)).fetchone()
+        if row is None:
+            return None
+        body_hash, status, headers, etag, last_modified, stored_at = row
+        try:
+            with open(self._blob_path(body_hash), 'rb') as f:
+                body = f.read()
+        except OSError:
+            # 正文文件丢失：当作未命中，并删掉这条失效记录
+            with self.conn:
+                self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            return None
+        now = time.time()
+        with self.conn:
+            self.conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (now, url))
+        return {
+            'url': url,
+            'status': status,
+            'text': body.decode('utf-8'),
+            'headers': json.loads(headers),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresh': self.max_age is not None and now - stored_at < self.max_age,
+        }
+
+    def conditional_headers(self, entry: dict) -> dict:
+        """根据缓存条目构造重新验证用的条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, status: int, text: str, headers: dict):
+        body = text.encode('utf-8')
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        now = time.time()
+        with self.conn:
+            old = self.conn.execute('SELECT body_hash FROM entries WHERE url = ?', (url,)).fetchone()
+            if self.conn.execute('INSERT OR IGNORE INTO blobs (hash, size) VALUES (?, ?)',
+                                 (body_hash, len(body))).rowcount:
+                self.total += len(body)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (url, body_hash, status, headers, etag, last_modified, stored_at, '
+                'accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, body_hash, status, json.dumps(headers, ensure_ascii=False),
+                 header_value(headers, 'ETag'), header_value(headers, 'Last-Modified'), now, now))
+            if old and old[0] != body_hash:
+                self._drop_unreferenced_blob(old[0])
+        self.evict()
+
+    def refresh(self, url: str, headers: dict):
+        """收到 304 时调用：正文不变，更新存储时间与新的验证头"""
+        etag = header_value(headers, 'ETag')
+        last_modified = header_value(headers, 'Last-Modified')
+        with self.conn:
+            self.conn.execute(
+                'UPDATE entries SET stored_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (time.time(), etag, last_modified, url))
+
+    def invalidate(self, url: str):
+        """删除 url 的缓存条目（正文没有其他条目引用时一并删除）；内容有问题的页面下次请求时重新完整下载"""
+        with self.conn:
+            row = self.conn.execute('SELECT body_hash FROM entries WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return
+            self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._drop_unreferenced_blob(row[0])
+
+    def _drop_unreferenced_blob(self, body_hash: str):
+        if self.conn.execute('SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1', (body_hash,)).fetchone():
+            return
+        row = self.conn.execute('SELECT size FROM blobs WHERE hash = ?', (body_hash,)).fetchone()
+        if row:
+            self.conn.execute('DELETE FROM blobs WHERE hash = ?', (body_hash,))
+            self.total -= row[0]
+        try:
+            os.remove(self._blob_path(body_hash))
+        except OSError:
+            pass
+
+    def total_bytes(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def evict(self):
+        """正文总大小超过 max_bytes 时，按最近访问时间从旧到新成批淘汰条目，直到不超过 max_bytes * LOW_WATER"""
+        if self.total <= self.max_bytes:
+            return
+        # 其他进程可能也写过同一个缓存目录，淘汰前重新汇总一次
+        self.total = self.total_bytes()
+        low_water = self.max_bytes * LOW_WATER
+        while self.total > low_water:
+            with self.conn:
+                rows = self.conn.execute('SELECT url, body_hash FROM entries ORDER BY accessed_at LIMIT ?',
+                                         (EVICT_BATCH,)).fetchall()
+                if not rows:
+                    break
+                for url, body_hash in rows:
+                    self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+                    self._drop_unreferenced_blob(body_hash)
+                    if self.total <= low_water:
+                        break
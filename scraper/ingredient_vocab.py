@@ -0,0 +1,140 @@
+import os
+import re
+import sys
+import json
+
+from quantity import QUANTITY_RE
+
+VOCAB_FILE = 'ingredient_vocab.json'
+VOCAB_VERSION = 1
+
+# 刀工/形态后缀：跟在已知食材后面时只是切法不同，仍归为同一食材（葱花、姜片、蒜末、土豆丝）
+CUT_SUFFIXES = frozenset('片丝末碎段丁块花泥蓉粒条')
+# 形如“食材 + 刀工后缀”、实际是另一种食品的名称（虾片、虾条是膨化食品），不按刀工归并
+COMPOUND_FOODS = frozenset(['虾片', '虾条'])
+# 混进用料表的章节标题，不是食材，不分配编号
+NON_INGREDIENTS = frozenset(['工具', '原料', '主料', '辅料', '配料', '调料', '调味品', '小料', '必须配料', '可选配料',
+                             '进阶配料', '其他配料', '其他调料'])
+# 以这些结尾的是厨具（蒸锅、温度计、微波炉、煲汤盅……），同样不分配编号。
+# “架”“碟”单独作后缀会误伤鸡架、鸭架这类食材，只和厨具词干一起匹配（烤架、蒸架、碟子、蘸料碟）
+EQUIPMENT_SUFFIXES = ('锅', '炉', '盅', '烤架', '蒸架', '晾架', '碟子', '料碟', '容器', '模具', '烤盘', '砧板', '温度计')
+# 去掉数量后至少要有一个汉字或两个连续的拉丁字母（Masala），否则是“1”“500ml”“100°C”、表情符号之类的残片
+WORD_RE = re.compile(r'[\u3400-\u9fff]|[a-z]{2}')
+# 名称里的括号备注（“小葱（可选）”），解析前去掉
+NOTE_RE = re.compile(r'[（(][^）)]*[）)]')
+# 字典树中标记“到此为一个完整词”的键，值为规范名
+END = ''
+
+
+def is_noise(name: str) -> bool:
+    """name 不是食材：章节标题、厨具，或去掉数量后没有实际名称"""
+    if name in NON_INGREDIENTS or name.endswith(EQUIPMENT_SUFFIXES):
+        return True
+    return not WORD_RE.search(QUANTITY_RE.sub('', name.lower()))
+
+
+class IngredientVocab:
+    """规范食材词表：每个规范食材一个稳定的整数编号，编号按首次出现顺序分配，保存后只增不改。
+
+    食材名通过同义词字典树按最长匹配切分：整个名称由若干个已知写法（同义词或规范名）依次拼成，
+    每段后面可以带一个刀工后缀，就解析为这些规范食材——“姜片”→ 生姜，“葱姜蒜”→ 小葱、生姜、大蒜，
+    “姜蒜末”→ 生姜、大蒜。切不完整的名称（“蒜苗”“番茄酱”“花椒”）不拆，原样作为一个规范食材。
+    厨具、章节标题和只剩数量的残片（见 is_noise）不是食材，解析为空。同一写法只解析一次。
+
+    编号保存在 VOCAB_FILE 中并纳入版本库：编号以这个文件为准，重新克隆仓库后编号不变。
+    """
+
+    def __init__(self, synonyms: dict, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.intern(name)
+        self._trie = {}
+        for surface, canonical in synonyms.items():
+            self._add(surface, canonical)
+            self._add(canonical, canonical)
+        self._resolved = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _add(self, surface: str, canonical: str):
+        node = self._trie
+        for ch in surface:
+            node = node.setdefault(ch, {})
+        node[END] = canonical
+
+    @classmethod
+    def load(cls, path: str, synonyms: dict) -> 'IngredientVocab':
+        """读取已保存的词表（不存在时为空词表），已有编号保持不变"""
+        if not os.path.exists(path):
+            return cls(synonyms)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != VOCAB_VERSION:
+            raise ValueError(f"{path}: 词表版本 {data.get('version')} 与当前版本 {VOCAB_VERSION} 不一致")
+        return cls(synonyms, data['names'])
+
+    def save(self, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': VOCAB_VERSION, 'names': self.names}, f, ensure_ascii=False, indent=0)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def intern(self, canonical: str) -> int:
+        iid = self.ids.get(canonical)
+        if iid is None:
+            iid = len(self.names)
+            canonical = sys.intern(canonical)
+            self.names.append(canonical)
+            self.ids[canonical] = iid
+        return iid
+
+    def segment(self, name: str) -> list | None:
+        """按最长匹配把名称切成规范食材名列表（去重，保持顺序）；有切不上的字符时返回 None"""
+        parts = []
+        i = 0
+        while i < len(name):
+            start = i
+            node = self._trie
+            match = None
+            j = i
+            while j < len(name) and name[j] in node:
+                node = node[name[j]]
+                j += 1
+                if END in node:
+                    match = (j, node[END])
+            if match is None:
+                return None
+            i, canonical = match
+            if canonical not in parts:
+                parts.append(canonical)
+            if i < len(name) and name[i] in CUT_SUFFIXES and name[start:i + 1] not in COMPOUND_FOODS:
+                i += 1
+        return parts
+
+    def resolve(self, name: str) -> tuple:
+        """食材名对应的规范食材编号（复合名称可能有多个）；空名称返回 ()"""
+        ids = self._resolved.get(name)
+        if ids is None:
+            cleaned = NOTE_RE.sub('', name).strip()
+            if not cleaned or is_noise(cleaned):
+                ids = ()
+            else:
+                ids = tuple(self.intern(c) for c in self.segment(cleaned) or [cleaned])
+            self._resolved[name] = ids
+        return ids
+
+    def recipe_ids(self, recipe: dict) -> list:
+        """菜谱全部食材的规范编号，去重并按食材顺序排列"""
+        ids = []
+        for ing in recipe.get('ingredients', []):
+            for iid in self.resolve(ing.get('name', '')):
+                if iid not in ids:
+                    ids.append(iid)
+        return ids
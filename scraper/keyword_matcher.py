@@ -0,0 +1,105 @@
+import re
+
+# 关键词数量低于该值时，逐个 `k in text`（C 实现的子串查找）比 Python 逐字符走自动机更快
+SMALL_KEYWORD_COUNT = 64
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多关键词匹配：构建一次，之后每段文本只需线性扫描一遍即可找出全部命中。
+
+    keywords 为 (关键词, 标签) 序列，同一标签可对应多个关键词；扫描结果是命中关键词的标签集合，
+    与逐个 `k in text` 判断等价（包括相互重叠、互为子串的关键词）。扫描耗时只与文本长度有关，
+    不随关键词数量增长。
+    """
+
+    def __init__(self, keywords, small_keyword_count: int = SMALL_KEYWORD_COUNT):
+        keywords = [(k, label) for k, label in keywords if k]
+        self.labels = frozenset(label for _, label in keywords)
+        self._small = None
+        if len(keywords) < small_keyword_count:
+            # 小词表按标签分组，某个标签一旦命中就跳过它剩余的关键词
+            self._small = {}
+            for k, label in keywords:
+                self._small.setdefault(label, []).append(k)
+
+        goto = [{}]
+        outputs = [set()]
+        for keyword, label in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(label)
+
+        # 按 BFS 顺序计算失败指针，并把后缀状态的输出并入当前状态
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                outputs[nxt] |= outputs[fail[nxt]]
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        # 确定化后的转移表，扫描时按需填充，常见转移只需一次字典查找
+        self._delta = [dict(g) for g in goto]
+        self._outputs = [frozenset(o) for o in outputs]
+        # 不在任何关键词里的字符必然让自动机回到根状态，先用正则找出只含关键词字符的片段，只扫描这些片段
+        alphabet = ''.join(sorted({ch for g in goto for ch in g}))
+        self._runs = re.compile(f"[{re.escape(alphabet)}]+") if alphabet else None
+
+    def _step(self, state: int, ch: str) -> int:
+        """沿失败指针求 (state, ch) 的转移并写入 _delta"""
+        f = state
+        while f and ch not in self._goto[f]:
+            f = self._fail[f]
+        nxt = self._goto[f].get(ch, 0)
+        self._delta[state][ch] = nxt
+        return nxt
+
+    def _scan(self, text: str):
+        if self._runs is None:
+            return
+        delta = self._delta
+        outputs = self._outputs
+        for run in self._runs.finditer(text):
+            state = 0
+            for ch in run.group():
+                nxt = delta[state].get(ch)
+                state = self._step(state, ch) if nxt is None else nxt
+                if outputs[state]:
+                    yield outputs[state]
+
+    def find_labels(self, text: str) -> set:
+        """返回 text 中命中的全部标签"""
+        if self._small is not None:
+            found = set()
+            for label, kws in self._small.items():
+                for k in kws:
+                    if k in text:
+                        found.add(label)
+                        break
+            return found
+        found = set()
+        for labels in self._scan(text):
+            found |= labels
+            if len(found) == len(self.labels):
+                break
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """text 中是否出现任意关键词（命中即停止扫描）"""
+        if self._small is not None:
+            return any(k in text for kws in self._small.values() for k in kws)
+        for _ in self._scan(text):
+            return True
+        return False
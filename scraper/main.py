@@ -1,59 +1,148 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import json
+import asyncio
+from urllib.parse import urljoin
+
+from fetcher import Fetcher
+from frontier import CrawlFrontier, CATEGORY, RECIPE
+from http_cache import HttpCache
+from recipe_page import parse_listing, parse_detail
 
 # 目标URL：下厨房的家常菜分类页面
 BASE_URL = "https://www.xiachufang.com"
 CATEGORY_URL = f"{BASE_URL}/category/40076/"
+# 写入记录的 category / source_category
+CATEGORY_NAME = '家常菜'
 
 # HTTP请求头，模拟浏览器访问
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-def parse_recipe_detail(recipe_url):
-    """解析单个菜谱页面的详细信息 (待实现)"""
-    # TODO: 在这里实现详细页面的解析逻辑
-    print(f"准备解析: {recipe_url}")
-    return None
+# 同时抓取的详情页数量上限
+CONCURRENCY = 8
+# 对下厨房每秒最多发起的请求数，避免给对方造成压力
+RATE_PER_HOST = 4.0
+# 持久化抓取队列：记录已发现的分类页/详情页及其状态，中断后重新运行会从上次停下的地方继续
+FRONTIER_DB = 'crawl_frontier.sqlite3'
+# 每轮从队列领取的 URL 数
+BATCH_SIZE = 64
+# HTTP 响应缓存目录：重复运行时未变化的页面直接读盘或通过 304 复用；None 表示不缓存
+HTTP_CACHE_DIR = '.http_cache'
+# 离线模式：不访问网络，只从缓存回放（调试解析逻辑时使用）
+OFFLINE = False
+# 详情页解析结果：new_data_source.json 的条目格式，每解析完一页追加一行（JSONL），
+# merge_datasets 可直接读取（把 NEW_SOURCE_FILE 指向它）。中断后续跑时已完成的页面不会重复解析
+DETAIL_OUTPUT = 'xiachufang_recipes.jsonl'
+
+def parse_recipe_detail(recipe_url, html, category=CATEGORY_NAME):
+    """解析单个菜谱页面，返回 new_data_source.json 格式的一条记录；找不到菜名或用料、步骤时返回 None"""
+    item = parse_detail(html, recipe_url, category)
+    if item is None:
+        print(f"错误：{recipe_url} 未能解析出菜谱，可能是页面结构已改变。")
+    return item
+
+def open_detail_output(path):
+    """以追加方式打开 JSONL 输出；上次中断留下的不完整末行先截掉"""
+    if os.path.exists(path):
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+    return open(path, 'a', encoding='utf-8')
+
+def extract_recipe_links(soup, page_url=CATEGORY_URL):
+    """从分类页中提取菜谱详情页链接（保持页面顺序、去重），相对链接按 page_url 补全"""
+    # 查找所有包含菜谱链接的<a>标签
+    recipe_links = []
+    seen = set()
+    recipe_list_ul = soup.find('ul', class_='list')
+    if recipe_list_ul:
+        all_links = recipe_list_ul.find_all('a', href=True)
+        for link in all_links:
+            href = link['href']
+            # 确保是菜谱详情页的链接，通常以 /recipe/ 开头
+            if href and href.startswith('/recipe/'):
+                full_url = urljoin(page_url, href)
+                if full_url not in seen:
+                    seen.add(full_url)
+                    recipe_links.append(full_url)
+    return recipe_links
+
+def extract_next_page(soup, page_url=CATEGORY_URL):
+    """分类页底部分页器中的“下一页”链接，没有则返回 None"""
+    link = soup.select_one('div.pager a.next[href]') or soup.find('a', class_='next', href=True)
+    return urljoin(page_url, link['href']) if link else None
+
+def handle_category_page(frontier, page_url, html):
+    """把分类页里的详情页链接和下一页加入抓取队列"""
+    soup = parse_listing(html)
+    recipe_links = extract_recipe_links(soup, page_url)
+    if not recipe_links:
+        print(f"错误：{page_url} 未能找到任何菜谱链接，可能是页面结构已改变。")
+    added = frontier.add(recipe_links, RECIPE)
+    next_url = extract_next_page(soup, page_url)
+    if next_url:
+        frontier.add([next_url], CATEGORY)
+    print(f"{page_url}: 找到 {len(recipe_links)} 个菜谱链接，其中新链接 {added} 个。")
+
+async def crawl(category_url=CATEGORY_URL, concurrency=CONCURRENCY, rate_per_host=RATE_PER_HOST,
+                frontier_db=FRONTIER_DB, retry_failed=False, cache_dir=HTTP_CACHE_DIR, offline=OFFLINE,
+                output_file=DETAIL_OUTPUT):
+    """从分类页开始沿分页抓取，并发抓取并解析发现的全部详情页；进度持久化在 frontier_db，
+    解析出的菜谱逐条追加到 output_file"""
+    print(f"正在从 {category_url} 获取菜谱列表...")
+
+    saved = 0
+    with CrawlFrontier(frontier_db) as frontier, open_detail_output(output_file) as output:
+        frontier.add([category_url], CATEGORY)
+        if retry_failed:
+            print(f"重新排队 {frontier.retry_failed()} 个失败的链接。")
+
+        cache = HttpCache(cache_dir) if cache_dir else None
+        try:
+            async with Fetcher(concurrency=concurrency, rate_per_host=rate_per_host, headers=HEADERS,
+                               cache=cache, offline=offline) as fetcher:
+                while True:
+                    batch = dict(frontier.claim(BATCH_SIZE))
+                    if not batch:
+                        break
+
+                    # 并发抓取，按完成顺序逐个处理；每个页面处理完立即落盘
+                    async for result in fetcher.fetch_each(batch):
+                        url = result['url']
+                        if result['error']:
+                            print(f"请求失败: {url}: {result['error']}")
+                            frontier.mark_failed(url, result['error'])
+                            continue
+                        if batch[url] == CATEGORY:
+                            handle_category_page(frontier, url, result['text'])
+                        else:
+                            item = parse_recipe_detail(url, result['text'])
+                            if item is None:
+                                # 页面残缺或结构变化：记为失败，以 crawl(retry_failed=True) 运行时重新抓取。
+                                # 同时丢掉缓存的这份正文，否则重试时命中新鲜缓存，解析的还是同一份内容；
+                                # 离线模式无法重新下载，保留缓存留待解析器修好后再用
+                                if cache and not offline:
+                                    cache.invalidate(url)
+                                frontier.mark_failed(url, 'parse failed')
+                                continue
+                            # 先落盘再标记完成：标记为完成的页面，其记录一定已写入
+                            output.write(json.dumps(item, ensure_ascii=False) + '\n')
+                            output.flush()
+                            saved += 1
+                        frontier.mark_done(url)
+        finally:
+            if cache:
+                cache.close()
+
+        counts = frontier.counts()
+    summary = '，'.join(f"{kind}/{status}: {n}" for (kind, status), n in sorted(counts.items()))
+    print(f"抓取结束：{summary}；本次解析出 {saved} 道菜谱，已追加到 {output_file}")
 
 def main():
     """主函数，用于获取并处理菜谱列表"""
-    print(f"正在从 {CATEGORY_URL} 获取菜谱列表...")
-    
-    try:
-        # 发送HTTP GET请求
-        response = requests.get(CATEGORY_URL, headers=HEADERS, timeout=10)  # 增加10秒超时
-        response.raise_for_status()  # 如果请求失败则抛出异常
-
-        # 使用BeautifulSoup解析HTML内容
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 查找所有包含菜谱链接的<a>标签
-        recipe_links = []
-        recipe_list_ul = soup.find('ul', class_='list')
-        if recipe_list_ul:
-            all_links = recipe_list_ul.find_all('a', href=True)
-            for link in all_links:
-                href = link['href']
-                # 确保是菜谱详情页的链接，通常以 /recipe/ 开头
-                if href and href.startswith('/recipe/'):
-                    full_url = f"{BASE_URL}{href}"
-                    if full_url not in recipe_links:
-                        recipe_links.append(full_url)
-        
-        if not recipe_links:
-            print("错误：未能找到任何菜谱链接，可能是页面结构已改变。")
-            return
-
-        print(f"成功找到 {len(recipe_links)} 个菜谱链接。")
-
-        # 遍历链接并调用解析函数（当前只打印）
-        for url in recipe_links:
-            parse_recipe_detail(url)
-
-    except requests.exceptions.RequestException as e:
-        print(f"请求失败: {e}")
+    asyncio.run(crawl())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
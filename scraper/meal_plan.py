@@ -0,0 +1,200 @@
+import sys
+import json
+import heapq
+
+import numpy as np
+
+from merge_datasets import iter_json_records
+from build_index import parse_ingredient_tokens
+from recipe_index import RecipeIndex, bit_positions, UNCATEGORIZED
+from recipe_table import RecipeTable
+
+INPUT_FILE = 'recipes_clean.json'
+# 默认规划的菜谱数（一周）
+PLAN_SIZE = 7
+# 手头食材最多 64 种：每道菜谱用到哪些食材存成一个 uint64 位掩码
+MAX_PANTRY = 64
+# 计算时间预算时，缺失时长的菜谱按该分钟数计
+UNKNOWN_COOKING_TIME = 30
+
+
+class MealPlanner:
+    """按手头食材挑选一组菜谱：尽量用上更多食材、菜谱之间少重复，并满足分类、时长、难度的限制和总预算。
+
+    菜谱与食材的匹配规则与 RecipeIndex（前端 recommend()）相同。每道菜谱用到的手头食材表示为位掩码，
+    挑选是带预算的最大覆盖问题，用惰性贪心（CELF）求解：每步选“新覆盖的食材数 / 消耗的预算”最大的菜谱，
+    候选按上一次算出的增益排在堆里，增益只会变小，堆顶重新计算后仍是最大时即可选定，大部分候选不必重算。
+    同时按“新覆盖的食材数”跑一遍，取覆盖更多的结果（单独按比值贪心在预算很紧时可能很差）。
+    用到的食材完全相同的菜谱只保留代价最小的一道参与贪心，候选数至多为不同位掩码的个数。
+
+    所有食材都已覆盖（或剩余菜谱都带不来新食材）而菜谱数未满时，按用到的手头食材数从多到少补足。
+    """
+
+    def __init__(self, table: RecipeTable, index: RecipeIndex):
+        if len(table) != index.size:
+            raise ValueError(f"列式表（{len(table)} 道）与食材索引（{index.size} 道）不配套")
+        self.table = table
+        self.index = index
+
+    @classmethod
+    def from_recipes(cls, recipes) -> 'MealPlanner':
+        recipes = list(recipes)
+        return cls(RecipeTable.from_recipes(recipes), RecipeIndex(recipes))
+
+    @classmethod
+    def from_file(cls, path: str = INPUT_FILE) -> 'MealPlanner':
+        return cls(RecipeTable.from_recipes(iter_json_records(path)), RecipeIndex.from_file(path))
+
+    def pantry_masks(self, tokens: list) -> np.ndarray:
+        """每道菜谱用到的手头食材位掩码（第 j 位对应 tokens[j]）"""
+        if len(tokens) > MAX_PANTRY:
+            raise ValueError(f"手头食材最多 {MAX_PANTRY} 种，实际 {len(tokens)} 种")
+        masks = np.zeros(self.index.size, dtype=np.uint64)
+        for j, token in enumerate(tokens):
+            masks[bit_positions(self.index.token_bits(token), self.index.size)] |= np.uint64(1 << j)
+        return masks
+
+    def plan(self, pantry, count: int = PLAN_SIZE, category=None, max_time: int | None = None,
+             max_difficulty: int | None = None, time_budget: int | None = None,
+             difficulty_budget: int | None = None) -> dict:
+        """pantry 为输入框文本（逗号、顿号、换行分隔）或食材列表。
+
+        限制：category（单个或列表，未分类用 '未分类'）、max_time / max_difficulty（每道菜的上限，
+        指定 max_time 时缺失时长的菜谱不入选）；预算：time_budget（总分钟数）、difficulty_budget（难度之和）。
+
+        返回 {'recipes': [...], 'covered': [...], 'uncovered': [...], 'total_time', 'total_difficulty'}，
+        recipes 中每项在 RecipeTable.rows() 的字段之外带 uses（用到的手头食材）和 new（它新覆盖的食材）。
+        """
+        tokens = parse_ingredient_tokens(pantry) if isinstance(pantry, str) else \
+            parse_ingredient_tokens('\n'.join(pantry))
+        if not tokens or count <= 0:
+            return self._result(tokens, [], [])
+        if category is not None:
+            category = [category] if isinstance(category, str) else list(category)
+            category = ['' if c == UNCATEGORIZED else c for c in category]
+
+        masks = self.pantry_masks(tokens)
+        eligible = self.table.filter(category=category, max_time=max_time, max_difficulty=max_difficulty)
+        rows = np.flatnonzero(eligible & (masks != 0))
+        if not len(rows):
+            return self._result(tokens, [], [])
+
+        times = np.where(self.table.cooking_time_null[rows], UNKNOWN_COOKING_TIME,
+                         self.table.cooking_time[rows]).astype(np.int64)
+        difficulties = self.table.difficulty[rows].astype(np.int64)
+        budgets = [(times, time_budget), (difficulties, difficulty_budget)]
+        budgets = [(spent, limit) for spent, limit in budgets if limit is not None]
+        # 贪心中的代价：各预算的占用比例之和；没有预算时每道菜代价相同
+        cost = sum((spent / max(limit, 1) for spent, limit in budgets), np.zeros(len(rows)))
+        row_masks = masks[rows]
+
+        # 同一位掩码只保留代价最小（再按难度、编号）的一道
+        order = np.lexsort((rows, difficulties, cost, row_masks))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = row_masks[order][1:] != row_masks[order][:-1]
+        reps = order[first]
+
+        candidates = [(int(row_masks[i]), float(cost[i]), int(rows[i]), i) for i in reps.tolist()]
+        limits = [limit for _, limit in budgets]
+        # spends[i]：第 i 个候选在各预算上的占用
+        spends = np.stack([spent for spent, _ in budgets], axis=1) if budgets else np.zeros((len(rows), 0), np.int64)
+        variants = [self._lazy_greedy(candidates, spends, limits, count, ratio=False)]
+        if budgets:
+            variants.append(self._lazy_greedy(candidates, spends, limits, count, ratio=True))
+        chosen = max(variants, key=lambda picks: (self._union(picks, row_masks).bit_count(),
+                                                  -sum(cost[i] for i in picks)))
+
+        if len(chosen) < count:
+            chosen = self._fill(chosen, rows, row_masks, cost, spends, limits, count)
+        return self._result(tokens, [int(rows[i]) for i in chosen], [int(row_masks[i]) for i in chosen],
+                            times[chosen], difficulties[chosen])
+
+    @staticmethod
+    def _union(picks: list, row_masks: np.ndarray) -> int:
+        covered = 0
+        for i in picks:
+            covered |= int(row_masks[i])
+        return covered
+
+    @staticmethod
+    def _fits(used: list, spend, limits: list) -> bool:
+        return all(u + s <= limit for u, s, limit in zip(used, spend.tolist(), limits))
+
+    def _lazy_greedy(self, candidates: list, spends: np.ndarray, limits: list, count: int, ratio: bool) -> list:
+        """惰性贪心，返回选中的候选下标（rows 中的位置）。
+
+        堆中的键为 (-增益, 与已覆盖食材的重叠数, 代价, 菜谱编号)：增益只减不增、重叠只增不减，
+        旧键总是不差于当前真实的键，堆顶重新计算后仍不差于新堆顶即可选定。
+        """
+        heap = []
+        for mask, cost, rid, i in candidates:
+            gain = mask.bit_count()
+            heap.append((-(gain / cost if ratio and cost > 0 else gain), 0, cost, rid, i, mask))
+        heapq.heapify(heap)
+        covered = 0
+        used = [0] * len(limits)
+        picks = []
+        while heap and len(picks) < count:
+            _, _, cost, rid, i, mask = heapq.heappop(heap)
+            if not self._fits(used, spends[i], limits):
+                continue
+            gain = (mask & ~covered).bit_count()
+            if not gain:
+                continue
+            key = (-(gain / cost if ratio and cost > 0 else gain), (mask & covered).bit_count(), cost, rid, i, mask)
+            if heap and key > heap[0]:
+                heapq.heappush(heap, key)
+                continue
+            picks.append(i)
+            covered |= mask
+            used = [u + s for u, s in zip(used, spends[i].tolist())]
+        return picks
+
+    def _fill(self, chosen: list, rows, row_masks, cost, spends: np.ndarray, limits: list, count: int) -> list:
+        """菜谱数未满时，按用到的手头食材数降序、代价升序、编号升序补足（仍受预算限制）。
+        每补一道对全部候选做一次向量化的预算判断，循环次数不超过 count"""
+        chosen = list(chosen)
+        available = np.ones(len(rows), dtype=bool)
+        available[chosen] = False
+        remaining = np.array(limits, dtype=np.int64) - spends[chosen].sum(axis=0)
+        order = np.lexsort((rows, cost, -np.bitwise_count(row_masks).astype(np.int64)))
+        while len(chosen) < count:
+            feasible = available[order] & np.all(spends[order] <= remaining, axis=1)
+            if not feasible.any():
+                break
+            i = int(order[np.argmax(feasible)])
+            chosen.append(i)
+            available[i] = False
+            remaining -= spends[i]
+        return chosen
+
+    def _result(self, tokens: list, ids: list, masks: list, times=(), difficulties=()) -> dict:
+        recipes = self.table.rows(ids)
+        covered = 0
+        for recipe, mask in zip(recipes, masks):
+            recipe['uses'] = [t for j, t in enumerate(tokens) if mask >> j & 1]
+            recipe['new'] = [t for j, t in enumerate(tokens) if (mask & ~covered) >> j & 1]
+            covered |= mask
+        return {
+            'recipes': recipes,
+            'covered': [t for j, t in enumerate(tokens) if covered >> j & 1],
+            'uncovered': [t for j, t in enumerate(tokens) if not covered >> j & 1],
+            'total_time': int(sum(times)),
+            'total_difficulty': int(sum(difficulties)),
+        }
+
+
+def main(input_file: str = INPUT_FILE, pantry: str = '西红柿, 鸡蛋, 土豆, 牛肉, 青椒, 豆腐, 洋葱, 胡萝卜',
+         count: str = str(PLAN_SIZE)):
+    planner = MealPlanner.from_file(input_file)
+    result = planner.plan(pantry, int(count))
+    for r in result['recipes']:
+        print(json.dumps({k: r[k] for k in ('id', 'name', 'cooking_time', 'difficulty', 'uses', 'new')},
+                         ensure_ascii=False))
+    print(f"覆盖 {len(result['covered'])}/{len(result['covered']) + len(result['uncovered'])} 种食材，"
+          f"未用上：{'、'.join(result['uncovered']) or '无'}；总时长 {result['total_time']} 分钟，"
+          f"难度合计 {result['total_difficulty']}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:4])
@@ -1,5 +1,14 @@
 import json
 import os
+import sys
+from itertools import islice
+
+from keyword_matcher import KeywordMatcher
+from near_duplicates import NearDuplicateIndex
+from ingredient_vocab import IngredientVocab
+from quantity import quantity_fields, cache_info
+from models import Recipe, Ingredient, to_json
+from metrics import Metrics
 
 # --- 配置 ---
 
@@ -13,6 +22,26 @@ OUTPUT_FILE = 'recipes_clean.json'  # 直接覆盖
 # 目标菜谱数量
 TARGET_COUNT = 2000
 
+# 流式读取时每次从文件读入的字符数
+READ_CHUNK_SIZE = 1 << 16
+
+# 近似重复判定阈值：食材与步骤的 Jaccard 相似度（MinHash 估计）不低于该值的新菜谱视为重复；None 表示只按名称去重
+NEAR_DUP_THRESHOLD = 0.8
+
+# 是否把食材用量解析成结构化字段 amount（{'min', 'max', 'unit', 'grams_min', 'grams_max'}），原始 quantity 保留
+PARSE_QUANTITIES = True
+
+# 规范食材词表：每道菜谱输出 ingredient_ids（规范食材编号数组），编号保存在 VOCAB_FILE 中，多次运行保持不变。
+# 该文件纳入版本库、是编号的唯一来源（新食材追加在末尾）；删掉它会重新分配全部编号。None 表示不生成
+VOCAB_FILE = 'ingredient_vocab.json'
+
+# 运行指标（阶段耗时、热点函数耗时、各类剔除原因、字节数）输出文件；设为 None 关闭
+METRICS_FILE = 'metrics_merge.json'
+# 设为文件路径时用 cProfile 剖析整个合并，结果写入该文件，热点摘要并入指标
+PROFILE_FILE = None
+# 计时的热点函数（另外还有近似重复索引的 signature/query/insert 和词表的 recipe_ids）
+HOT_PATHS = ['convert_new_source_format', 'is_alcoholic_drink', 'normalize_ingredients', 'quantity_fields']
+
 # 食材同义词（可按需扩充）
 SYNONYMS = {
     '番茄': '西红柿',
@@ -38,23 +67,20 @@ ALCOHOL_KEYWORDS = [
     '鸡尾酒', '莫吉托', 'Mojito', '金汤力', '长岛冰茶', 'B52',
     '马天尼', '曼哈顿', '白酒鸡尾酒', '红酒鸡尾酒', '香槟鸡尾酒'
 ]
+ALCOHOL_MATCHER = KeywordMatcher((k, k) for k in ALCOHOL_KEYWORDS)
 
 # --- 脚本 ---
 
 def normalize_ingredient(name):
     name = name.strip()
-    return SYNONYMS.get(name, name)
+    # 食材名大量重复，驻留后所有菜谱共用同一个字符串对象
+    return sys.intern(SYNONYMS.get(name, name))
 
 def is_alcoholic_drink(recipe):
-    text_to_check = recipe.get('name', '') + ' ' + recipe.get('category', '')
-    for keyword in ALCOHOL_KEYWORDS:
-        if keyword in text_to_check:
-            return True
-    for ing in recipe.get('ingredients', []):
-        ing_name = ing.get('name', '')
-        if any(k in ing_name for k in ALCOHOL_KEYWORDS):
-            return True
-    return False
+    # 名称、分类和全部食材名用换行拼接后只扫描一遍；关键词不含换行，不会跨字段误命中
+    texts = [recipe.get('name', '') + ' ' + recipe.get('category', '')]
+    texts.extend(ing.get('name', '') for ing in recipe.get('ingredients', []))
+    return ALCOHOL_MATCHER.contains_any('\n'.join(texts))
 
 
 def normalize_taste(val):
@@ -70,58 +96,249 @@ def normalize_taste(val):
 def convert_new_source_format(item):
     name = item.get('title') or item.get('name', '')
     category = item.get('category', '') or item.get('source_category', '')
-    cooking_time = item.get('cooking_time')
-    difficulty = item.get('difficulty', 0)
-    taste = normalize_taste(item.get('taste') or item.get('tags'))
-    return {
-        'name': name,
-        'category': category,
-        'ingredients': item.get('ingredients', []),
-        'steps': item.get('steps', []),
-        'cooking_time': cooking_time,
-        'taste': taste,
-        'difficulty': difficulty,
-        'source': 'NewSource',
-        'source_path': item.get('source_path', '')
-    }
-
-def main():
-    all_recipes = []
+    return Recipe(
+        name=name,
+        category=category,
+        ingredients=[Ingredient.from_dict(i) for i in item.get('ingredients') or ()],
+        steps=item.get('steps') or (),
+        cooking_time=item.get('cooking_time'),
+        taste=normalize_taste(item.get('taste') or item.get('tags')),
+        difficulty=item.get('difficulty', 0),
+        source='NewSource',
+        source_path=item.get('source_path', ''),
+    )
+
+def iter_json_records(path, chunk_size=READ_CHUNK_SIZE):
+    """逐条读取 JSON 数组或 JSONL 文件中的记录，内存占用只与单条记录大小有关"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+
+        def fill():
+            # 丢弃已解析的部分，再读入下一块
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            return not eof
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        skip(' \t\r\n\ufeff')
+        in_array = pos < len(buf) and buf[pos] == '['
+        if in_array:
+            pos += 1
+        separators = ' \t\r\n,' if in_array else ' \t\r\n'
+
+        while True:
+            skip(separators)
+            if pos >= len(buf):
+                if in_array:
+                    raise ValueError(f"{path}: JSON 数组没有正常结束")
+                return
+            if in_array and buf[pos] == ']':
+                return
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # 记录跨越了块边界：读入更多内容后重试，已到文件末尾则说明确实格式错误
+                    if not fill():
+                        raise
+                    continue
+                # 数字可能恰好被块边界截断（如 "12|3"、"-7500.|0"），读入更多内容后重新解析确认
+                truncated = end == len(buf) or (
+                    isinstance(record, (int, float)) and buf[end] in '.eE')
+                if truncated and not eof:
+                    fill()
+                    continue
+                break
+            pos = end
+            yield record
+
+
+def normalize_ingredients(recipe, vocab=None):
+    """归一化食材名，并按需解析用量、生成规范食材编号"""
+    for ing in recipe.ingredients:
+        ing.name = normalize_ingredient(ing.name)
+        if PARSE_QUANTITIES:
+            ing.amount = quantity_fields(ing.quantity)
+    if vocab is not None:
+        recipe.ingredient_ids = vocab.recipe_ids(recipe)
+
+
+def new_stats():
+    """合并计数：两个来源各保留多少，以及各类剔除原因"""
+    return {'howtocook': 0, 'new_source': 0, 'alcohol': 0, 'missing_name': 0,
+            'duplicate_name': 0, 'near_duplicates': 0, 'truncated_at_target': 0}
+
+
+def iter_howtocook(records, vocab=None, stats=None):
+    """HowToCook 数据（records 为 iter_json_records 读出的原始记录）：剔除饮用型酒精，并归一化食材名与用量"""
+    for record in records:
+        recipe = Recipe.from_dict(record)
+        if is_alcoholic_drink(recipe):
+            if stats is not None:
+                stats['alcohol'] += 1
+            continue
+        normalize_ingredients(recipe, vocab)
+        yield recipe
+
+
+def iter_new_source(records, vocab=None, stats=None):
+    """新数据源（原始记录）：转换字段格式、剔除无名称与饮用型酒精，并归一化食材名与用量"""
+    for item in records:
+        recipe = convert_new_source_format(item)
+        reason = 'missing_name' if not recipe.name else 'alcohol' if is_alcoholic_drink(recipe) else None
+        if reason is not None:
+            if stats is not None:
+                stats[reason] += 1
+            continue
+        normalize_ingredients(recipe, vocab)
+        yield recipe
+
+
+def merge_recipes(stats, vocab=None, limit=None):
+    """按顺序产出合并后的菜谱：HowToCook 全部保留，新数据源按名称和内容近似重复去重。
+
+    近似重复簇以最先出现的菜谱为代表，HowToCook 菜谱总是代表，后来的相似菜谱被丢弃。
+    产出 limit 条后不再处理输入：消费方再取下一条时，剩余的原始记录只计数，记入 stats['truncated_at_target']，
+    不计入其他统计，也不为其中的食材分配编号。
+    """
     seen_names = set()
+    index = NearDuplicateIndex(NEAR_DUP_THRESHOLD) if NEAR_DUP_THRESHOLD is not None else None
+    howtocook = iter_json_records(HOWTOCOOK_FILE) if os.path.exists(HOWTOCOOK_FILE) else iter(())
+    new_source = iter_json_records(NEW_SOURCE_FILE) if os.path.exists(NEW_SOURCE_FILE) else iter(())
+
+    def full():
+        if limit is None or stats['howtocook'] + stats['new_source'] < limit:
+            return False
+        stats['truncated_at_target'] = sum(1 for _ in howtocook) + sum(1 for _ in new_source)
+        return True
+
+    if full():
+        return
+
+    # 1. HowToCook 数据
+    for recipe in iter_howtocook(howtocook, vocab, stats):
+        seen_names.add(recipe.name)
+        if index is not None:
+            index.insert(index.signature(recipe))
+        stats['howtocook'] += 1
+        yield recipe
+        if full():
+            return
+
+    # 2. 新数据源
+    for recipe in iter_new_source(new_source, vocab, stats):
+        if recipe.name in seen_names:
+            stats['duplicate_name'] += 1
+            continue
+        seen_names.add(recipe.name)
+        if index is not None:
+            signature = index.signature(recipe)
+            if index.query(signature) is not None:
+                stats['near_duplicates'] += 1
+                continue
+            index.insert(signature)
+        stats['new_source'] += 1
+        yield recipe
+        if full():
+            return
+
+
+def write_json_atomic(records, path, limit=None):
+    """紧凑格式流式写出 JSON 数组（.jsonl 则每行一条），先写临时文件再原子替换；返回写出条数。
+
+    limit 为写出条数上限，写满后不再从 records 读取；limit=0 时写出空数组（或空的 .jsonl 文件）。
+    """
+    jsonl = path.endswith('.jsonl')
+    if limit is not None:
+        records = islice(records, max(limit, 0))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if not jsonl:
+                f.write('[')
+            for record in records:
+                if count and not jsonl:
+                    f.write(',\n')
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=to_json))
+                if jsonl:
+                    f.write('\n')
+                count += 1
+            if not jsonl:
+                f.write(']\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def main(metrics_file=METRICS_FILE, profile_file=PROFILE_FILE):
+    metrics = Metrics('merge_datasets')
+    instrument = metrics_file is not None
+    with metrics.profiled(profile_file), \
+            metrics.instrument(sys.modules[__name__], HOT_PATHS if instrument else []), \
+            metrics.instrument(NearDuplicateIndex, ['signature', 'query', 'insert'] if instrument else []), \
+            metrics.instrument(IngredientVocab, ['recipe_ids'] if instrument else []):
+        run(metrics)
+    if metrics_file is not None:
+        metrics.write(metrics_file)
+        print(f"运行指标已保存到 {metrics_file}")
+
+
+def run(metrics):
+    # 边读边写：输入按条流过归一化、过滤、去重，写满 TARGET_COUNT 条后剩余的输入只计数、不再处理。
+    # 输出先写到临时文件，读完后才替换 OUTPUT_FILE，因此可以安全地覆盖自己的输入文件。
+    stats = new_stats()
+    with metrics.stage('load_vocab'):
+        vocab = IngredientVocab.load(VOCAB_FILE, SYNONYMS) if VOCAB_FILE is not None else None
+    known = len(vocab) if vocab is not None else 0
+    for path in (HOWTOCOOK_FILE, NEW_SOURCE_FILE):
+        if os.path.exists(path):
+            metrics.add_bytes('input', os.path.getsize(path))
+
+    recipes = merge_recipes(stats, vocab, limit=TARGET_COUNT)
+    try:
+        with metrics.stage('merge'):
+            count = write_json_atomic(recipes, OUTPUT_FILE)
+    finally:
+        recipes.close()
+    truncated = stats.pop('truncated_at_target')
+    metrics.add_bytes('output', os.path.getsize(OUTPUT_FILE))
+    metrics.counters.update({f"kept.{k}" if k in ('howtocook', 'new_source') else f"dropped.{k}": v
+                             for k, v in stats.items()})
+    metrics.count('written', count)
+    metrics.count('truncated_at_target', truncated)
 
-    # 1. 加载 HowToCook 数据
-    if os.path.exists(HOWTOCOOK_FILE):
-        with open(HOWTOCOOK_FILE, 'r', encoding='utf-8') as f:
-            howtocook_data = json.load(f)
-            for recipe in howtocook_data:
-                if not is_alcoholic_drink(recipe):
-                    for ing in recipe.get('ingredients', []):
-                        ing['name'] = normalize_ingredient(ing['name'])
-                    all_recipes.append(recipe)
-                    seen_names.add(recipe.get('name', ''))
-    print(f"从 HowToCook 加载了 {len(all_recipes)} 道菜谱。")
-
-    # 2. 加载新数据源
-    if os.path.exists(NEW_SOURCE_FILE):
-        with open(NEW_SOURCE_FILE, 'r', encoding='utf-8') as f:
-            new_data = json.load(f)
-            for item in new_data:
-                recipe = convert_new_source_format(item)
-                if recipe.get('name') and recipe['name'] not in seen_names and not is_alcoholic_drink(recipe):
-                    for ing in recipe.get('ingredients', []):
-                        ing['name'] = normalize_ingredient(ing.get('name', ''))
-                    all_recipes.append(recipe)
-                    seen_names.add(recipe['name'])
-    print(f"合并新数据源后，总计 {len(all_recipes)} 道不重复的菜谱。")
-
-    # 3. 截断到目标数量
-    final_recipes = all_recipes[:TARGET_COUNT]
-
-    # 4. 保存结果
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_recipes, f, ensure_ascii=False, indent=2)
-
-    print(f"处理完成！共 {len(final_recipes)} 道菜谱已保存到 {OUTPUT_FILE}")
+    print(f"从 HowToCook 读取了 {stats['howtocook']} 道菜谱，从新数据源读取了 {stats['new_source']} 道不重复的菜谱，"
+          f"剔除近似重复 {stats['near_duplicates']} 道。")
+    print(f"剔除饮用型酒精 {stats['alcohol']} 道，无名称 {stats['missing_name']} 道，重名 {stats['duplicate_name']} 道。")
+    if truncated:
+        print(f"已写满 {TARGET_COUNT} 道，其余 {truncated} 条输入未处理。")
+    if PARSE_QUANTITIES:
+        info = cache_info()
+        metrics.counters.update({'quantity_cache.hits': info.hits, 'quantity_cache.misses': info.misses})
+        print(f"用量解析：{info.hits + info.misses} 条，其中不同写法 {info.misses} 种（缓存命中 {info.hits} 次）。")
+    if vocab is not None:
+        with metrics.stage('save_vocab'):
+            vocab.save(VOCAB_FILE)
+        metrics.counters.update({'vocab.size': len(vocab), 'vocab.added': len(vocab) - known})
+        print(f"规范食材词表：{len(vocab)} 种（本次新增 {len(vocab) - known} 种），已保存到 {VOCAB_FILE}")
+    print(f"处理完成！共 {count} 道菜谱已保存到 {OUTPUT_FILE}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import cProfile
+import pstats
+from contextlib import contextmanager
+from functools import wraps
+
+# cProfile 结果写入指标文件时保留的函数个数（按累计耗时排序）
+PROFILE_TOP = 30
+
+
+class Metrics:
+    """流水线指标：阶段耗时、热点函数耗时、计数器（如各类剔除原因）和字节数，最后写成一个 JSON 文件。
+
+    热点函数通过 instrument() 临时替换为计时版本，不开启时没有任何额外开销；
+    计时只覆盖本进程内的调用，使用进程池并行时子进程里的调用不计入。
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.stages = {}
+        self.timings = {}
+        self.counters = {}
+        self.bytes = {}
+        self.profile = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, key: str, n: int = 1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def add_bytes(self, key: str, n: int):
+        self.bytes[key] = self.bytes.get(key, 0) + n
+
+    def _timed(self, key: str, func):
+        entry = self.timings.setdefault(key, {'calls': 0, 'seconds': 0.0})
+        perf_counter = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                entry['calls'] += 1
+                entry['seconds'] += perf_counter() - start
+        return wrapper
+
+    @contextmanager
+    def instrument(self, target, names):
+        """在 with 块内把 target（模块或类）上的这些函数替换为计时版本，退出时还原"""
+        prefix = getattr(target, '__name__', type(target).__name__)
+        originals = {}
+        try:
+            for name in names:
+                originals[name] = getattr(target, name)
+                setattr(target, name, self._timed(f"{prefix}.{name}", originals[name]))
+            yield
+        finally:
+            for name, func in originals.items():
+                setattr(target, name, func)
+
+    @contextmanager
+    def profiled(self, profile_file: str | None):
+        """profile_file 不为 None 时用 cProfile 剖析 with 块，完整结果保存到 profile_file（可用 pstats/snakeviz 查看），
+        累计耗时最高的 PROFILE_TOP 个函数同时写入指标"""
+        if profile_file is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+            rows = sorted(pstats.Stats(profiler).stats.items(), key=lambda item: item[1][3], reverse=True)
+            self.profile = {
+                'file': profile_file,
+                'top': [{'function': f"{os.path.basename(path)}:{line}({func})", 'calls': calls,
+                         'tottime': round(tottime, 6), 'cumtime': round(cumtime, 6)}
+                        for (path, line, func), (_, calls, tottime, cumtime, _) in rows[:PROFILE_TOP]],
+            }
+
+    def to_dict(self) -> dict:
+        return {
+            'pipeline': self.pipeline,
+            'started_at': self.started_at,
+            'stages': {k: round(v, 6) for k, v in self.stages.items()},
+            'timings': {k: {'calls': v['calls'], 'seconds': round(v['seconds'], 6)}
+                        for k, v in sorted(self.timings.items(), key=lambda kv: -kv[1]['seconds'])},
+            'counters': self.counters,
+            'bytes': self.bytes,
+            'profile': self.profile,
+        }
+
+    def write(self, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,133 @@
+import sys
+
+from quantity import FIELDS as AMOUNT_FIELDS
+
+# 菜谱记录的字段，顺序即输出 JSON 的键顺序（与 parse_howtocook / merge_datasets 一直以来的输出一致）
+RECIPE_FIELDS = ('name', 'category', 'ingredients', 'steps', 'cooking_time', 'taste', 'difficulty',
+                 'source', 'source_path')
+_RECIPE_KEYS = frozenset(RECIPE_FIELDS) | {'ingredient_ids'}
+_INGREDIENT_KEYS = frozenset(('name', 'quantity', 'amount'))
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _intern_all(values) -> tuple:
+    try:
+        return tuple(map(sys.intern, values))
+    except TypeError:
+        return tuple(map(_intern, values))
+
+
+class Ingredient:
+    """一条食材：name/quantity 为驻留字符串；amount 为按 quantity.FIELDS 排列的元组（解析缓存直接返回的元组，
+    同样写法的用量共用一个对象），未解析时为 None。"""
+
+    __slots__ = ('name', 'quantity', 'amount')
+
+    def __init__(self, name: str = '', quantity: str | None = '', amount: tuple | None = None):
+        self.name = sys.intern(name) if type(name) is str else name
+        self.quantity = sys.intern(quantity) if type(quantity) is str else quantity
+        self.amount = amount
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Ingredient':
+        amount = data.get('amount')
+        if amount is not None:
+            amount = tuple(amount.get(k) for k in AMOUNT_FIELDS)
+        return cls(data.get('name') or '', data.get('quantity'), amount)
+
+    def to_dict(self) -> dict:
+        data = {'name': self.name}
+        if self.quantity is not None:
+            data['quantity'] = self.quantity
+        if self.amount is not None:
+            data['amount'] = dict(zip(AMOUNT_FIELDS, self.amount))
+        return data
+
+    def get(self, key: str, default=None):
+        """与 dict.get 相同的读取方式，按 dict 读取食材的旧代码可以直接使用"""
+        return getattr(self, key) if key in _INGREDIENT_KEYS else default
+
+    def __repr__(self):
+        return f"Ingredient({self.name!r}, {self.quantity!r})"
+
+
+class Recipe:
+    """一道菜谱。各模块共用同一种记录，代替形状略有差异的 dict：
+
+    - 所有字符串（名称、分类、口味、步骤、食材名与用量）都是驻留的，同样的文本全语料只存一份；
+    - ingredients/steps/taste 用元组保存，没有列表的预留空间；
+    - 已知字段之外的键原样保存在 extra 中，输出时放在最后，读入再写出不丢字段。
+
+    提供 get()/[] 读取，按 dict 读取菜谱的函数（近似去重、词表、过滤等）无需修改即可接收 Recipe。
+    """
+
+    __slots__ = RECIPE_FIELDS + ('ingredient_ids', 'extra')
+
+    def __init__(self, name: str = '', category: str = '', ingredients=(), steps=(), cooking_time=None,
+                 taste=(), difficulty=0, source: str = '', source_path: str = '', ingredient_ids=None, extra=None):
+        self.name = _intern(name)
+        self.category = _intern(category)
+        self.ingredients = tuple(ingredients)
+        self.steps = _intern_all(steps)
+        self.cooking_time = cooking_time
+        self.taste = _intern_all(taste)
+        self.difficulty = difficulty
+        self.source = _intern(source)
+        self.source_path = source_path
+        self.ingredient_ids = ingredient_ids
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Recipe':
+        extra = None
+        if len(data.keys() - _RECIPE_KEYS):
+            extra = {k: v for k, v in data.items() if k not in _RECIPE_KEYS}
+        ingredient_ids = data.get('ingredient_ids')
+        return cls(data.get('name') or '', data.get('category') or '',
+                   [Ingredient.from_dict(i) for i in data.get('ingredients') or ()],
+                   data.get('steps') or (), data.get('cooking_time'), data.get('taste') or (),
+                   data.get('difficulty', 0), data.get('source') or '', data.get('source_path') or '',
+                   tuple(ingredient_ids) if ingredient_ids is not None else None, extra)
+
+    def to_dict(self) -> dict:
+        data = {
+            'name': self.name,
+            'category': self.category,
+            'ingredients': [i.to_dict() for i in self.ingredients],
+            'steps': list(self.steps),
+            'cooking_time': self.cooking_time,
+            'taste': list(self.taste),
+            'difficulty': self.difficulty,
+            'source': self.source,
+            'source_path': self.source_path,
+        }
+        if self.ingredient_ids is not None:
+            data['ingredient_ids'] = list(self.ingredient_ids)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, key: str, default=None):
+        if key in _RECIPE_KEYS:
+            value = getattr(self, key)
+            return default if value is None and key == 'ingredient_ids' else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def __repr__(self):
+        return f"Recipe({self.name!r}, {len(self.ingredients)} 种食材, {len(self.steps)} 步)"
+
+
+def to_json(obj):
+    """json.dump(s) 的 default 钩子：Recipe/Ingredient 转成 dict 后再序列化"""
+    if isinstance(obj, (Recipe, Ingredient)):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} 不能序列化为 JSON")
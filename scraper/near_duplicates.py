@@ -0,0 +1,155 @@
+import re
+import hashlib
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+# 签名长度（分桶数）：越大估计越准，内存开销线性增加
+NUM_PERM = 128
+# 步骤文本按字切成的 shingle 长度
+SHINGLE_SIZE = 3
+# 估计的 Jaccard 相似度不低于该值即视为近似重复
+THRESHOLD = 0.8
+
+# 切 shingle 前去掉空白和标点，只保留文字和数字
+NON_WORD_RE = re.compile(r'[\W_]+')
+EMPTY = 1 << 64
+
+
+def recipe_features(recipe: dict, shingle_size: int = SHINGLE_SIZE) -> set:
+    """菜谱的特征集合：归一化后的食材名 + 步骤文本的字符 shingle"""
+    features = {'i:' + ing.get('name', '').strip() for ing in recipe.get('ingredients', []) if ing.get('name')}
+    for step in recipe.get('steps', []):
+        text = NON_WORD_RE.sub('', str(step))
+        if len(text) <= shingle_size:
+            if text:
+                features.add('s:' + text)
+            continue
+        features.update('s:' + text[i:i + shingle_size] for i in range(len(text) - shingle_size + 1))
+    return features
+
+
+@lru_cache(maxsize=1 << 16)
+def feature_hash(feature: str) -> int:
+    """稳定的 64 位特征哈希（不受 PYTHONHASHSEED 影响），常见食材和 shingle 会反复出现，缓存结果"""
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple:
+    """选择分带数 bands 和每带行数 rows（bands * rows <= num_perm），
+    使相似度低于阈值被误选、高于阈值被漏选的概率之和最小"""
+    def integrate(f, lo, hi, steps=200):
+        width = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * width) for i in range(steps)) * width
+
+    best = None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        false_pos = integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+        false_neg = integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+        if best is None or false_pos + false_neg < best[0]:
+            best = (false_pos + false_neg, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH 近似重复检测：每条菜谱只和落在同一 LSH 桶里的候选比较，整体接近线性，
+    不需要两两比较。
+
+    签名用单次排列 MinHash（one permutation hashing）：每个特征只算一次 64 位哈希，按余数分到
+    num_perm 个桶里各取最小值；空桶用右侧最近的非空桶的值加距离偏移填充（rotation 致密化），
+    两条签名相同位置取值相同的比例仍是 Jaccard 相似度的无偏估计。计算量与特征数成正比，
+    不随 num_perm 增长。签名按 bands 段切分，任一段完全相同即成为候选，再用签名估计的
+    相似度与 threshold 比较确认：全部签名存成一个 uint64 矩阵，候选一次取出、整体比较。
+
+    与已有签名完全相同的签名不进 LSH 桶：查询时排在前面的那条总会先命中，后来的永远不会被返回。
+    内容相同、只有名字不同的菜谱（批量导入的副本）因此不会把桶撑大，拖慢每一次查询。
+
+    用法：
+        index = NearDuplicateIndex()
+        sig = index.signature(recipe)
+        if index.query(sig) is None:
+            index.insert(sig)      # 新的代表菜谱
+    """
+
+    def __init__(self, threshold: float = THRESHOLD, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # 致密化偏移的步长：大于任何桶内取值，借来的值不会与真实取值相等
+        self._stride = (1 << 64) // num_perm
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # 每个分带一个 {段哈希: [代表菜谱编号]}
+        self._buckets = [{} for _ in range(self.bands)]
+        # 第 i 行为编号 i 的签名，按倍增扩容；_count 为已用行数
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint64)
+        self._count = 0
+        # 已进桶的签名的摘要（16 字节，碰撞概率可忽略），完全相同的签名只进桶一次
+        self._distinct = set()
+
+    def __len__(self):
+        return self._count
+
+    def signature(self, recipe: dict) -> array | None:
+        """计算 MinHash 签名；没有任何特征（无食材无步骤）时返回 None，这类菜谱不参与去重"""
+        k = self.num_perm
+        bins = [EMPTY] * k
+        for f in recipe_features(recipe, self.shingle_size):
+            value, j = divmod(feature_hash(f), k)
+            if value < bins[j]:
+                bins[j] = value
+        filled = [j for j in range(k) if bins[j] != EMPTY]
+        if not filled:
+            return None
+        if len(filled) < k:
+            sig = list(bins)
+            # 从后往前扫，记住右侧（循环）最近的非空桶
+            nxt = filled[0] + k
+            for j in range(k - 1, -1, -1):
+                if bins[j] == EMPTY:
+                    sig[j] = bins[nxt % k] + (nxt - j) * self._stride
+                else:
+                    nxt = j
+            bins = sig
+        return array('Q', bins)
+
+    def _band_keys(self, signature: array):
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        for band in range(self.bands):
+            yield hash(raw[band * width:(band + 1) * width])
+
+    def similarity(self, a: array, b: array) -> float:
+        """由两个签名估计 Jaccard 相似度"""
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def query(self, signature: array | None) -> int | None:
+        """返回与之近似重复的、最早插入的代表菜谱编号；没有则返回 None"""
+        if signature is None:
+            return None
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        if not candidates:
+            return None
+        ids = np.array(sorted(candidates))
+        same = np.count_nonzero(self._signatures[ids] == np.frombuffer(signature, dtype=np.uint64), axis=1)
+        hits = np.flatnonzero(same / self.num_perm >= self.threshold)
+        return int(ids[hits[0]]) if len(hits) else None
+
+    def insert(self, signature: array | None) -> int | None:
+        """把签名作为新的代表菜谱加入索引，返回其编号（插入顺序，从 0 开始）"""
+        if signature is None:
+            return None
+        idx = self._count
+        if idx == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[idx] = np.frombuffer(signature, dtype=np.uint64)
+        self._count += 1
+        digest = hashlib.blake2b(signature.tobytes(), digest_size=16).digest()
+        if digest not in self._distinct:
+            self._distinct.add(digest)
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, []).append(idx)
+        return idx
@@ -3,6 +3,13 @@ import re
 import json
 import glob
 import signal
+import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from keyword_matcher import KeywordMatcher
+from metrics import Metrics
+from models import Recipe, to_json
 
 # 当输出被管道（例如 head）提前关闭时，避免 BrokenPipeError 让程序崩溃
 signal.signal(signal.SIGPIPE, signal.SIG_DFL)
@@ -10,7 +17,39 @@ signal.signal(signal.SIGPIPE, signal.SIG_DFL)
 SOURCE_DIR = '/tmp/how-to-cook/dishes'
 OUTPUT_FILE = 'recipes_clean.json'
 
+# 并行解析的进程数：1 表示串行；0 或 None 表示使用全部 CPU 核心
+WORKERS = 1
+# 每次派发给子进程的文件数，文件很多时适当调大可减少进程间通信开销
+CHUNK_SIZE = 32
+
+# 增量解析缓存：记录 path -> 内容哈希 -> 解析结果，只重新解析新增/变更的文件；设为 None 关闭
+CACHE_FILE = '.parse_cache.json'
+# 解析逻辑变更时递增，旧缓存会被整体作废
+PARSER_VERSION = 1
+
+# 运行指标（阶段耗时、热点函数耗时、剔除原因、字节数）输出文件；设为 None 关闭
+METRICS_FILE = 'metrics_parse.json'
+# 设为文件路径时用 cProfile 剖析整个运行，结果写入该文件，热点摘要并入指标
+PROFILE_FILE = None
+# 计时的热点函数（只统计主进程内的调用，WORKERS != 1 时解析在子进程中进行，不计入）
+HOT_PATHS = ['scan_list_items', 'item_texts', 'tag_taste', 'extract_fields']
+
 SECTION_TITLE_RE = re.compile(r'^##\s+(.+?)\s*$', re.MULTILINE)
+NAME_ZUOFA_RE = re.compile(r'^#\s+(.+?)\s*的做法\s*$', re.MULTILINE)
+NAME_RE = re.compile(r'^#\s+(.+?)\s*$', re.MULTILINE)
+DIFFICULTY_RE = re.compile(r'预估烹饪难度：\s*(★+)')
+COOKING_TIME_RE = re.compile(r'预计.*?时长\s*\*\*(\d+)\s*分钟\*\*')
+IMAGE_RE = re.compile(r'!\[[^\]]*]\([^)]*\)')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+LIST_ITEM_RE = re.compile(r'^\s*[\-\*]\s+')
+LIST_PREFIX_RE = re.compile(r'^[\-\*]\s*')
+# 单遍扫描的词法规则：一次 findall 只取出二级标题和列表项，得到 (## 后的空白, 标题, 列表符号, 列表项文字)。
+# 标题部分与 SECTION_TITLE_RE 相同，列表项与 LIST_ITEM_RE 相同（限定在一行内）
+MARKDOWN_TOKEN_RE = re.compile(r'^(?:##(\s+)(.+?)\s*|[^\S\n]*([\-\*])[^\S\n]+(.*))$', re.MULTILINE)
+# str.splitlines() 额外切分的换行符：出现时逐行扫描与多遍解析的语义不同，回退到 extract_fields
+IRREGULAR_BREAK_RE = re.compile('[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+# 单遍扫描只收集这几个章节里的列表项
+LIST_SECTIONS = ('计算', '必备原料和工具', '操作')
 
 TASTE_KEYWORDS = [
     ('辣', ['辣', '麻辣', '香辣', '辣椒', '剁椒']),
@@ -22,6 +61,8 @@ TASTE_KEYWORDS = [
     ('孜然', ['孜然']),
     ('咖喱', ['咖喱']),
 ]
+# 全部口味关键词构建成一个自动机，一次扫描得到所有口味标签
+TASTE_MATCHER = KeywordMatcher((k, tag) for tag, kws in TASTE_KEYWORDS for k in kws)
 
 
 def split_sections(markdown: str) -> dict:
@@ -37,9 +78,9 @@ def split_sections(markdown: str) -> dict:
 
 
 def extract_name(markdown: str, file_path: str) -> str:
-    m = re.search(r'^#\s+(.+?)\s*的做法\s*$', markdown, re.MULTILINE)
+    m = NAME_ZUOFA_RE.search(markdown)
     if not m:
-        m = re.search(r'^#\s+(.+?)\s*$', markdown, re.MULTILINE)
+        m = NAME_RE.search(markdown)
     if m:
         return m.group(1).strip()
     # fallback
@@ -48,21 +89,21 @@ def extract_name(markdown: str, file_path: str) -> str:
 
 
 def extract_difficulty(markdown: str) -> int:
-    m = re.search(r'预估烹饪难度：\s*(★+)', markdown)
+    m = DIFFICULTY_RE.search(markdown)
     return len(m.group(1)) if m else 0
 
 
 def extract_cooking_time_minutes(markdown: str) -> int | None:
     # 常见格式：预计制作制作时长 **200 分钟**。
-    m = re.search(r'预计.*?时长\s*\*\*(\d+)\s*分钟\*\*', markdown)
+    m = COOKING_TIME_RE.search(markdown)
     if m:
         return int(m.group(1))
     return None
 
 
 def clean_inline_markup(s: str) -> str:
-    s = re.sub(r'!\[[^\]]*]\([^)]*\)', '', s)  # remove images
-    s = re.sub(r'<[^>]+>', '', s)  # remove html tags
+    s = IMAGE_RE.sub('', s)  # remove images
+    s = HTML_TAG_RE.sub('', s)  # remove html tags
     s = s.replace('**', '')
     s = s.replace('*', '')
     return s.strip()
@@ -74,7 +115,7 @@ def parse_ingredient_line(line: str) -> dict | None:
     if not line:
         return None
     # 去掉前缀 - 或 *
-    line = re.sub(r'^[\-\*]\s*', '', line).strip()
+    line = LIST_PREFIX_RE.sub('', line).strip()
     if not line:
         return None
 
@@ -98,7 +139,7 @@ def extract_ingredients(sections: dict) -> list:
 
     if '计算' in sections:
         block = sections['计算']
-        lines = [l for l in block.splitlines() if re.match(r'^\s*[\-\*]\s+', l)]
+        lines = [l for l in block.splitlines() if LIST_ITEM_RE.match(l)]
         for l in lines:
             ing = parse_ingredient_line(l)
             if ing:
@@ -108,7 +149,7 @@ def extract_ingredients(sections: dict) -> list:
 
     if '必备原料和工具' in sections:
         block = sections['必备原料和工具']
-        lines = [l for l in block.splitlines() if re.match(r'^\s*[\-\*]\s+', l)]
+        lines = [l for l in block.splitlines() if LIST_ITEM_RE.match(l)]
         for l in lines:
             ing = parse_ingredient_line(l)
             if ing:
@@ -124,26 +165,118 @@ def extract_steps(sections: dict) -> list:
 
     block = sections['操作']
     # 列表项：- xxx 或 * xxx
-    lines = [l for l in block.splitlines() if re.match(r'^\s*[\-\*]\s+', l)]
+    lines = [l for l in block.splitlines() if LIST_ITEM_RE.match(l)]
     steps = []
     for l in lines:
         l = clean_inline_markup(l)
-        l = re.sub(r'^[\-\*]\s*', '', l).strip()
+        l = LIST_PREFIX_RE.sub('', l).strip()
         if l:
             steps.append(l)
     return steps
 
 
+def tag_taste(text: str) -> list:
+    """返回 text 中出现的口味标签，顺序与 TASTE_KEYWORDS 一致"""
+    found = TASTE_MATCHER.find_labels(text)
+    return [tag for tag, _ in TASTE_KEYWORDS if tag in found]
+
+
 def extract_taste(markdown: str) -> list:
-    text = clean_inline_markup(markdown)
-    tags = []
-    for tag, kws in TASTE_KEYWORDS:
-        if any(k in text for k in kws):
-            tags.append(tag)
-    return tags
+    return tag_taste(clean_inline_markup(markdown))
+
+
+def extract_fields(markdown: str, file_path: str) -> dict:
+    """多遍解析：先切分章节再逐个字段提取。作为 scan_markdown 的参照实现和边界情况下的回退路径"""
+    sections = split_sections(markdown)
+    return {
+        'name': extract_name(markdown, file_path),
+        'difficulty': extract_difficulty(markdown),
+        'cooking_time': extract_cooking_time_minutes(markdown),
+        'ingredients': extract_ingredients(sections),
+        'steps': extract_steps(sections),
+        'taste': extract_taste(markdown),
+    }
+
+
+def strip_markup(s: str) -> str:
+    """与 clean_inline_markup 等价，只在确实含有图片/标签时才调用正则"""
+    if '![' in s:
+        s = IMAGE_RE.sub('', s)
+    if '<' in s:
+        s = HTML_TAG_RE.sub('', s)
+    if '*' in s:
+        s = s.replace('*', '')
+    return s.strip()
+
+
+def scan_list_items(markdown: str) -> dict | None:
+    """单遍扫描出 LIST_SECTIONS 各章节的列表项 {章节: [(列表符号, 符号后的文字)]}；
+    同名章节以最后一个为准，与 split_sections 一致。需要回退到 extract_fields 时返回 None"""
+    if IRREGULAR_BREAK_RE.search(markdown):
+        return None
+    items = {}
+    current = None
+    for space, title, marker, item in MARKDOWN_TOKEN_RE.findall(markdown):
+        if title:
+            # 只有 ## 的行：SECTION_TITLE_RE 的 \s+ 会越过换行把下一行当作标题
+            if '\n' in space:
+                return None
+            title = title.strip()
+            current = items[title] = [] if title in LIST_SECTIONS else None
+        elif current is not None:
+            current.append((marker, item))
+    return items
+
+
+def list_item_text(marker: str, item: str) -> str:
+    """与 LIST_PREFIX_RE.sub('', clean_inline_markup(整行)).strip() 相同。
+    符号为 * 时它会被当作强调符号去掉，原实现接着会把文字开头的 - 当作列表符号再去掉一次"""
+    text = strip_markup(item)
+    if marker == '*' and text[:1] == '-':
+        text = text[1:].strip()
+    return text
+
+
+def item_texts(items: list) -> list:
+    """列表项清理后的文字（空的去掉）；不含标记的项直接 strip，不调用 list_item_text"""
+    texts = []
+    for marker, item in items:
+        if marker == '-' and '*' not in item and '<' not in item and '![' not in item:
+            text = item.strip()
+        else:
+            text = list_item_text(marker, item)
+        if text:
+            texts.append(text)
+    return texts
+
+
+def scan_markdown(markdown: str, file_path: str) -> dict:
+    """单遍解析：结果与 extract_fields 完全相同。
+
+    列表项由 scan_list_items 一次扫描得到，不再切分章节、逐行匹配，清理标记只在确实含有标记时调用正则；
+    菜名、难度、时长和口味仍是对全文的一次正则查找。遇到 scan_list_items 无法处理的写法时回退到 extract_fields。
+    """
+    items = scan_list_items(markdown)
+    if items is None:
+        return extract_fields(markdown, file_path)
+    ingredients = []
+    for key in ('计算', '必备原料和工具'):
+        for text in item_texts(items.get(key, ())):
+            parts = text.split()
+            ingredients.append({'name': parts[0], 'quantity': ' '.join(parts[1:])})
+        if ingredients:
+            break
+    return {
+        'name': extract_name(markdown, file_path),
+        'difficulty': extract_difficulty(markdown),
+        'cooking_time': extract_cooking_time_minutes(markdown),
+        'ingredients': ingredients,
+        'steps': item_texts(items.get('操作', ())),
+        'taste': tag_taste(strip_markup(markdown)),
+    }
 
 
-def parse_markdown(file_path: str) -> dict:
+def parse_markdown(file_path: str) -> Recipe:
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
 
@@ -159,47 +292,169 @@ def parse_markdown(file_path: str) -> dict:
         'source_path': os.path.relpath(file_path, '/tmp/how-to-cook')
     }
 
-    recipe['name'] = extract_name(content, file_path)
-
     relative_path = os.path.relpath(file_path, SOURCE_DIR)
     parts = relative_path.split(os.sep)
     recipe['category'] = parts[0] if len(parts) > 1 else ''
 
-    recipe['difficulty'] = extract_difficulty(content)
-    recipe['cooking_time'] = extract_cooking_time_minutes(content)
-
-    sections = split_sections(content)
-    recipe['ingredients'] = extract_ingredients(sections)
-    recipe['steps'] = extract_steps(sections)
-    recipe['taste'] = extract_taste(content)
-
-    return recipe
-
-
-def main():
+    recipe.update(scan_markdown(content, file_path))
+
+    return Recipe.from_dict(recipe)
+
+
+def parse_markdown_safe(file_path: str) -> tuple:
+    """解析单个文件并捕获异常，返回 (recipe, error)，供进程池使用（异常对象不一定能跨进程传递）"""
+    try:
+        return parse_markdown(file_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def iter_parsed(markdown_files: list, workers: int | None = WORKERS):
+    """按输入顺序依次产出 (file_path, recipe, error)；workers != 1 时使用进程池并行解析"""
+    if workers is not None and workers <= 0:
+        workers = None
+    if workers == 1 or len(markdown_files) <= 1:
+        for file_path in markdown_files:
+            yield (file_path, *parse_markdown_safe(file_path))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Executor.map 按提交顺序返回结果，输出顺序与串行一致
+        results = pool.map(parse_markdown_safe, markdown_files, chunksize=CHUNK_SIZE)
+        for file_path, (recipe, error) in zip(markdown_files, results):
+            yield file_path, recipe, error
+
+
+def content_hash(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def load_parse_cache(cache_file: str | None) -> dict:
+    """读取增量缓存，返回 {path: {'hash', 'mtime_ns', 'size', 'recipe'}}；版本不符或文件损坏时返回空缓存"""
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != PARSER_VERSION or data.get('source_dir') != SOURCE_DIR:
+        return {}
+    return data.get('entries', {})
+
+
+def save_parse_cache(cache_file: str | None, entries: dict):
+    if not cache_file:
+        return
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': PARSER_VERSION, 'source_dir': SOURCE_DIR, 'entries': entries},
+                  f, ensure_ascii=False, separators=(',', ':'), default=to_json)
+    os.replace(tmp_file, cache_file)
+
+
+def lookup_cache(cache: dict, file_path: str) -> tuple:
+    """返回 (命中的 recipe 或 None, 新的缓存条目骨架)。
+
+    先比较 mtime/size，未变化时直接复用，无需读文件；变化时再比较内容哈希。
+    """
+    st = os.stat(file_path)
+    entry = {'hash': None, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'recipe': None}
+    old = cache.get(file_path)
+    if old and old['mtime_ns'] == st.st_mtime_ns and old['size'] == st.st_size:
+        entry['hash'] = old['hash']
+        return Recipe.from_dict(old['recipe']), entry
+
+    entry['hash'] = content_hash(file_path)
+    if old and old['hash'] == entry['hash']:
+        return Recipe.from_dict(old['recipe']), entry
+    return None, entry
+
+
+def main(workers: int | None = WORKERS, cache_file: str | None = CACHE_FILE,
+         metrics_file: str | None = METRICS_FILE, profile_file: str | None = PROFILE_FILE):
+    metrics = Metrics('parse_howtocook')
+    hot_paths = HOT_PATHS if metrics_file else []
+    with metrics.profiled(profile_file), metrics.instrument(sys.modules[__name__], hot_paths):
+        count = run(workers, cache_file, metrics)
+    if metrics_file:
+        metrics.write(metrics_file)
+        print(f"运行指标已保存到 {metrics_file}")
+    return count
+
+
+def run(workers: int | None, cache_file: str | None, metrics: Metrics) -> int:
     all_recipes = []
-    markdown_files = glob.glob(f"{SOURCE_DIR}/**/*.md", recursive=True)
+    with metrics.stage('discover'):
+        markdown_files = glob.glob(f"{SOURCE_DIR}/**/*.md", recursive=True)
+    metrics.count('files', len(markdown_files))
 
     print(f"找到 {len(markdown_files)} 个菜谱文件，开始解析...")
 
-    for i, file_path in enumerate(markdown_files):
-        try:
-            recipe_data = parse_markdown(file_path)
-            # 过滤掉模板/异常：至少要有 name + steps + ingredients
-            if recipe_data.get('name') and recipe_data.get('steps') and recipe_data.get('ingredients'):
-                all_recipes.append(recipe_data)
+    # 只保留本次仍存在的文件，已删除文件的缓存条目随之淘汰
+    with metrics.stage('cache_lookup'):
+        cache = load_parse_cache(cache_file)
+        new_cache = {}
+        parsed = {}
+        pending = []
+        for file_path in markdown_files:
+            try:
+                recipe_data, entry = lookup_cache(cache, file_path)
+            except OSError as e:
+                parsed[file_path] = (None, str(e))
+                continue
+            new_cache[file_path] = entry
+            metrics.add_bytes('input', entry['size'])
+            if recipe_data is not None:
+                entry['recipe'] = recipe_data
+                parsed[file_path] = (recipe_data, None)
+            else:
+                pending.append(file_path)
+    metrics.count('cache_hits', len(new_cache) - len(pending))
+    metrics.count('parsed', len(pending))
+
+    if cache_file:
+        print(f"缓存命中 {len(markdown_files) - len(pending)} 个，需要重新解析 {len(pending)} 个")
+
+    with metrics.stage('parse'):
+        for file_path, recipe_data, error in iter_parsed(pending, workers):
+            parsed[file_path] = (recipe_data, error)
+            if error is None:
+                new_cache[file_path]['recipe'] = recipe_data
             else:
-                pass
+                # 出错的文件不缓存，下次重新尝试并再次报告
+                new_cache.pop(file_path, None)
+
+    with metrics.stage('filter'):
+        for i, file_path in enumerate(markdown_files):
+            recipe_data, error = parsed[file_path]
+            if error is not None:
+                metrics.count('dropped.error')
+                print(f"处理 {file_path} 时发生错误: {error}")
+                continue
+
+            # 过滤掉模板/异常：至少要有 name + steps + ingredients（剔除原因按缺失的第一个字段计）
+            for field in ('name', 'steps', 'ingredients'):
+                if not recipe_data.get(field):
+                    metrics.count(f"dropped.missing_{field}")
+                    break
+            else:
+                all_recipes.append(recipe_data)
 
             if (i + 1) % 50 == 0:
                 print(f"已处理 {i + 1}/{len(markdown_files)}")
-        except Exception as e:
-            print(f"处理 {file_path} 时发生错误: {e}")
+    metrics.count('kept', len(all_recipes))
+
+    with metrics.stage('write'):
+        save_parse_cache(cache_file, new_cache)
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_recipes, f, ensure_ascii=False, indent=2)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(all_recipes, f, ensure_ascii=False, indent=2, default=to_json)
+    metrics.add_bytes('output', os.path.getsize(OUTPUT_FILE))
 
     print(f"解析完成！共 {len(all_recipes)} 个菜谱已保存到 {OUTPUT_FILE}")
+    return len(all_recipes)
 
 
 if __name__ == '__main__':
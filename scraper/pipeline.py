@@ -0,0 +1,253 @@
+import os
+import sys
+import glob
+import json
+import shutil
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import parse_howtocook
+import merge_datasets
+import generate_new_data_source
+import publish
+import artifacts
+
+# 数据流水线入口：各阶段声明输入和输出，按依赖关系（某阶段的输出是另一阶段的输入）组成有向无环图。
+# 每个阶段的指纹 = 全部输入（数据文件和阶段代码）的内容哈希；指纹与上次成功运行时相同、且输出未被改动的阶段直接跳过，
+# 互不依赖的阶段并行运行。没有任何改动时重建只需检查文件状态；只改了某个输入时，只重跑受影响的阶段。
+#
+# 与手工逐个运行脚本不同，HowToCook 解析结果单独写到 HOWTOCOOK_OUTPUT，合并阶段从那里读取，
+# 不再覆盖自己的输入，重复运行结果不变。
+
+# 记录各阶段指纹和输出哈希的状态文件
+STATE_FILE = '.pipeline_state.json'
+STATE_VERSION = 1
+# 同时运行的阶段数上限
+WORKERS = 4
+HOWTOCOOK_OUTPUT = 'recipes_howtocook.json'
+FRONTEND_DATA_DIR = '../frontend/public/data'
+COPY_TARGETS = ['../backend/recipes_clean.json', '../frontend/public/recipes_clean.json']
+
+
+def stage_generate():
+    generate_new_data_source.main()
+
+
+def stage_parse():
+    parse_howtocook.OUTPUT_FILE = HOWTOCOOK_OUTPUT
+    parse_howtocook.main()
+
+
+def stage_merge():
+    merge_datasets.HOWTOCOOK_FILE = HOWTOCOOK_OUTPUT
+    merge_datasets.main()
+
+
+def stage_publish():
+    publish.main(merge_datasets.OUTPUT_FILE, FRONTEND_DATA_DIR)
+
+
+def stage_artifacts():
+    artifacts.main(merge_datasets.OUTPUT_FILE, artifacts.ARTIFACT_DIR)
+
+
+def stage_copy():
+    for target in COPY_TARGETS:
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(merge_datasets.OUTPUT_FILE, tmp_path)
+        os.replace(tmp_path, target)
+    print(f"已复制 {merge_datasets.OUTPUT_FILE} 到 {', '.join(COPY_TARGETS)}")
+
+
+# 输入可以是文件、目录（递归）或 glob 模式；阶段代码（含依赖的本地模块）也列为输入，改代码同样触发重跑
+STAGES = [
+    {'name': 'generate', 'run': stage_generate,
+     'inputs': ['generate_new_data_source.py', 'merge_datasets.py'],
+     'outputs': [generate_new_data_source.OUTPUT_FILE]},
+    {'name': 'parse', 'run': stage_parse,
+     'inputs': [f"{parse_howtocook.SOURCE_DIR}/**/*.md", 'parse_howtocook.py', 'keyword_matcher.py', 'metrics.py',
+                'models.py', 'quantity.py'],
+     'outputs': [HOWTOCOOK_OUTPUT]},
+    {'name': 'merge', 'run': stage_merge,
+     'inputs': [HOWTOCOOK_OUTPUT, generate_new_data_source.OUTPUT_FILE, 'merge_datasets.py', 'keyword_matcher.py',
+                'near_duplicates.py', 'ingredient_vocab.py', 'quantity.py', 'models.py', 'metrics.py'],
+     'outputs': [merge_datasets.OUTPUT_FILE, merge_datasets.VOCAB_FILE]},
+    {'name': 'publish', 'run': stage_publish,
+     'inputs': [merge_datasets.OUTPUT_FILE, merge_datasets.VOCAB_FILE, 'publish.py', 'build_index.py', 'search_index.py',
+                'similar_recipes.py', 'ingredient_vocab.py', 'quantity.py', 'merge_datasets.py'],
+     'outputs': [FRONTEND_DATA_DIR]},
+    {'name': 'artifacts', 'run': stage_artifacts,
+     'inputs': [merge_datasets.OUTPUT_FILE, 'artifacts.py', 'merge_datasets.py'],
+     'outputs': [artifacts.ARTIFACT_DIR]},
+    {'name': 'copy', 'run': stage_copy,
+     'inputs': [merge_datasets.OUTPUT_FILE],
+     'outputs': COPY_TARGETS},
+]
+
+
+def load_state(path: str = STATE_FILE) -> dict:
+    """{'files': {path: {'mtime_ns', 'size', 'hash'}}, 'stages': {name: {'fingerprint', 'outputs'}}}"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+    return {'version': STATE_VERSION, 'files': {}, 'stages': {}}
+
+
+def save_state(state: dict, path: str = STATE_FILE):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def file_hash(path: str, files: dict) -> str:
+    """文件内容哈希；mtime 和大小都没变时直接用上次的结果，不重新读文件"""
+    st = os.stat(path)
+    entry = files.get(path)
+    if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        return entry['hash']
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    files[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'hash': h.hexdigest()}
+    return h.hexdigest()
+
+
+def expand(spec: str) -> list | None:
+    """把输入/输出声明展开成文件列表；不存在时返回 None"""
+    if any(ch in spec for ch in '*?['):
+        return sorted(glob.glob(spec, recursive=True))
+    if os.path.isdir(spec):
+        paths = []
+        for root, _, names in os.walk(spec):
+            paths.extend(os.path.join(root, name) for name in names)
+        return sorted(paths)
+    if os.path.isfile(spec):
+        return [spec]
+    return None
+
+
+def digest(specs: list, files: dict) -> str | None:
+    """一组声明的合并哈希（路径 + 内容）；有声明不存在时返回 None"""
+    h = hashlib.sha1()
+    for spec in specs:
+        paths = expand(spec)
+        if paths is None:
+            return None
+        h.update(f"{spec}\0".encode('utf-8'))
+        for path in paths:
+            h.update(f"{os.path.relpath(path, spec) if path != spec else ''}\0{file_hash(path, files)}\n".encode('utf-8'))
+    return h.hexdigest()
+
+
+def dependencies(stages: list) -> dict:
+    """阶段名 -> 它依赖的阶段名集合；依赖有环时报错"""
+    producers = {}
+    for stage in stages:
+        for output in stage['outputs']:
+            if output in producers:
+                raise ValueError(f"输出 {output} 同时由 {producers[output]} 和 {stage['name']} 产生")
+            producers[output] = stage['name']
+    deps = {s['name']: {producers[i] for i in s['inputs'] if i in producers and producers[i] != s['name']}
+            for s in stages}
+
+    visiting, visited = set(), set()
+
+    def visit(name):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"阶段依赖存在环：{name}")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+def run_pipeline(stages: list = STAGES, workers: int = WORKERS, force=(), state_file: str = STATE_FILE) -> dict:
+    """运行流水线，返回 {阶段名: 'ran' | 'skipped'}；force 中的阶段无论指纹如何都重跑"""
+    deps = dependencies(stages)
+    state = load_state(state_file)
+    files, records = state['files'], state['stages']
+    result = {}
+    running = {}
+    fingerprints = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while len(result) < len(stages):
+            # 依赖都已完成的阶段：最新的直接跳过，否则提交运行；跳过可能让更多阶段就绪，所以循环到没有新进展为止
+            progressed = True
+            while progressed:
+                progressed = False
+                for stage in stages:
+                    name = stage['name']
+                    if name in result or name in running.values() or not deps[name] <= result.keys():
+                        continue
+                    fingerprint = digest(stage['inputs'], files)
+                    if fingerprint is None:
+                        missing = [spec for spec in stage['inputs'] if expand(spec) is None]
+                        raise FileNotFoundError(f"阶段 {name} 缺少输入：{', '.join(missing)}")
+                    record = records.get(name)
+                    if (name not in force and record and record['fingerprint'] == fingerprint
+                            and digest(stage['outputs'], files) == record['outputs']):
+                        print(f"[{name}] 输入与输出均未变化，跳过")
+                        result[name] = 'skipped'
+                        progressed = True
+                        continue
+                    print(f"[{name}] 开始运行")
+                    future = pool.submit(stage['run'])
+                    running[future] = name
+                    records.pop(name, None)
+                    fingerprints[name] = fingerprint
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                stage = next(s for s in stages if s['name'] == name)
+                try:
+                    future.result()
+                except BaseException:
+                    save_state(state, state_file)
+                    print(f"[{name}] 运行失败，流水线中止")
+                    raise
+                outputs = digest(stage['outputs'], files)
+                if outputs is None:
+                    raise FileNotFoundError(f"阶段 {name} 运行后缺少输出：{', '.join(stage['outputs'])}")
+                records[name] = {'fingerprint': fingerprints[name], 'outputs': outputs}
+                save_state(state, state_file)
+                result[name] = 'ran'
+                print(f"[{name}] 完成")
+
+    # 只保留仍存在的文件的哈希缓存
+    state['files'] = {path: entry for path, entry in files.items() if os.path.exists(path)}
+    save_state(state, state_file)
+    return result
+
+
+def main(force=()):
+    names = {s['name'] for s in STAGES}
+    unknown = set(force) - names
+    if unknown:
+        print(f"未知阶段：{', '.join(sorted(unknown))}（可选：{', '.join(s['name'] for s in STAGES)}）")
+        return 1
+    result = run_pipeline(force=set(force))
+    ran = [name for name, status in result.items() if status == 'ran']
+    print(f"流水线完成：运行 {len(ran)} 个阶段（{', '.join(ran) or '无'}），跳过 {len(result) - len(ran)} 个")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+
+from merge_datasets import iter_json_records, SYNONYMS, VOCAB_FILE
+from build_index import build_index, write_index
+from search_index import SearchIndexBuilder
+from similar_recipes import SimilarityBuilder
+from ingredient_vocab import IngredientVocab
+
+# 发布阶段：把 recipes_clean.json 拆成前端按需加载的几部分
+#   summary.json         列表页所需的精简清单（每道菜一行）+ 分类计数，首屏只下载它
+#   shards/NNNN.json     完整菜谱（食材、步骤），每 SHARD_SIZE 道一片，打开详情时才下载
+#   recipes_index.json   食材倒排索引（见 build_index.py），搜索不再需要完整菜谱
+#   search_index.json    菜名和步骤的全文索引（见 search_index.py），按 BM25 排序
+#   similar_recipes.json 每道菜谱的相似菜谱（见 similar_recipes.py），详情页据此推荐
+INPUT_FILE = 'recipes_clean.json'
+PUBLISH_DIR = 'publish'
+SHARD_SIZE = 50
+MANIFEST_VERSION = 1
+
+# 清单每行的字段顺序；菜谱编号即行号，也是在分片中的位置：第 id // shard_size 片的第 id % shard_size 条
+SUMMARY_FIELDS = ['name', 'category', 'difficulty', 'cooking_time', 'taste']
+
+
+def summary_row(recipe: dict) -> list:
+    return [recipe.get(field) for field in SUMMARY_FIELDS]
+
+
+def write_json(data, path: str):
+    """紧凑格式写出，先写临时文件再原子替换"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def shard_name(number: int) -> str:
+    return f"{number:04d}.json"
+
+
+def publish(input_file: str = INPUT_FILE, publish_dir: str = PUBLISH_DIR, shard_size: int = SHARD_SIZE) -> dict:
+    """流式读一遍菜谱，写出分片、索引，最后写清单；返回清单。
+
+    清单最后写入，读到新清单时它引用的分片都已就位；上次发布留下、这次用不到的分片随后删除。
+    """
+    shard_dir = os.path.join(publish_dir, 'shards')
+    os.makedirs(shard_dir, exist_ok=True)
+    rows = []
+    categories = {}
+    shard = []
+    shards = []
+    search = SearchIndexBuilder()
+    similar = SimilarityBuilder(IngredientVocab.load(VOCAB_FILE, SYNONYMS))
+
+    def flush():
+        name = shard_name(len(shards))
+        write_json(shard, os.path.join(shard_dir, name))
+        shards.append(name)
+        shard.clear()
+
+    def recipes():
+        for recipe in iter_json_records(input_file):
+            rows.append(summary_row(recipe))
+            category = recipe.get('category') or '未分类'
+            categories[category] = categories.get(category, 0) + 1
+            shard.append(recipe)
+            search.add(recipe)
+            similar.add(recipe)
+            if len(shard) >= shard_size:
+                flush()
+            yield recipe
+
+    index = build_index(recipes())
+    if shard:
+        flush()
+    write_index(index, os.path.join(publish_dir, 'recipes_index.json'))
+    search.build().save(os.path.join(publish_dir, 'search_index.json'))
+    similar.build().save(os.path.join(publish_dir, 'similar_recipes.json'))
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'count': len(rows),
+        'shard_size': shard_size,
+        'shards': shards,
+        'fields': SUMMARY_FIELDS,
+        'rows': rows,
+        'categories': sorted(categories.items(), key=lambda kv: -kv[1]),
+    }
+    write_json(manifest, os.path.join(publish_dir, 'summary.json'))
+
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name not in shards:
+            os.remove(os.path.join(shard_dir, name))
+    return manifest
+
+
+def main(input_file: str = INPUT_FILE, publish_dir: str = PUBLISH_DIR):
+    manifest = publish(input_file, publish_dir)
+    summary_size = os.path.getsize(os.path.join(publish_dir, 'summary.json'))
+    print(f"发布完成：{manifest['count']} 道菜谱，{len(manifest['categories'])} 个分类，"
+          f"{len(manifest['shards'])} 个分片；清单 {summary_size / 1024:.1f} KB，已保存到 {publish_dir}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
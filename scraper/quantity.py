@@ -0,0 +1,242 @@
+import re
+import sys
+from functools import lru_cache
+
+# 同一用量字符串在数据里反复出现（“半个”“少许”“10克”……），解析结果缓存，最多保留这么多种
+QUANTITY_CACHE_SIZE = 8192
+
+# 质量单位 -> 换算成克
+MASS_UNITS = {
+    'g': 1, '克': 1, 'mg': 0.001, '毫克': 0.001,
+    'kg': 1000, '千克': 1000, '公斤': 1000, '斤': 500, '两': 50,
+}
+# 体积单位 -> 换算成毫升（茶匙/汤匙按常用的 5ml/15ml）
+VOLUME_UNITS = {
+    'ml': 1, '毫升': 1, 'l': 1000, '升': 1000,
+    '茶匙': 5, '小勺': 5, 'tsp': 5, '汤匙': 15, '大勺': 15, 'tbsp': 15,
+}
+# 计数/容器类单位，原样作为规范单位，不换算
+COUNT_UNITS = [
+    '人份', '小把', '小撮', '小块', '小碗', '小包', '小颗', '小片', '小段',
+    '个', '只', '根', '片', '瓣', '颗', '粒', '块', '把', '包', '袋', '条', '头', '棵', '株', '碗', '杯', '勺',
+    '盒', '罐', '瓶', '张', '枚', '段', '朵', '撮', '节', '串', '份', '滴', '扎', '束', '支', '捆', '盘', '尾',
+]
+UNIT_ALIASES = {'毫升': 'ml', 'l': 'ml', '升': 'ml', '克': 'g', '毫克': 'g', 'mg': 'g', 'kg': 'g',
+                '千克': 'g', '公斤': 'g', '斤': 'g', '两': 'g', '茶匙': 'ml', '小勺': 'ml', 'tsp': 'ml',
+                '汤匙': 'ml', '大勺': 'ml', 'tbsp': 'ml'}
+
+CN_DIGITS = {'一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+# 斜杠连接两个数是分数（1/2），三个及以上是并列的几种用量（1/2/3 勺：1～3 勺）
+ARABIC_NUM = r'\d+(?:\.\d+)?(?:/\d+(?:\.\d+)?)*'
+CN_NUM = r'[半一二两三四五六七八九十]+'
+RANGE_SEP = r'(?:-|~|～|—|–|至|到)'
+
+
+def _unit_pattern(units) -> str:
+    return '|'.join(re.escape(u) for u in sorted(units, key=len, reverse=True))
+
+
+def _range_pattern(num: str, units: str, unit_required: bool) -> str:
+    """数字（或范围）+ 单位，共 6 个分组：(数1, 单位1, 半1, 数2, 单位2, 半2)。
+    范围两侧都可以带单位（30g-50g、500g-1kg），也可以只在末尾带（30-50g）；单位后的“半”表示再加半个单位"""
+    unit = rf'({units})(?![a-z])(半)?'
+    tail = unit if unit_required else rf'(?:{unit})?'
+    return rf'({num})(?:\s*{unit})?(?:\s*{RANGE_SEP}\s*({num}))?\s*{tail}'
+
+
+ALL_UNITS = _unit_pattern(list(MASS_UNITS) + list(VOLUME_UNITS) + COUNT_UNITS)
+# 阿拉伯数字的单位可省略；中文数字必须跟单位（避免“一般”“两面”，也让“二两”回溯成 二 + 两）。
+# 拉丁字母单位后面不能紧跟字母（garlic 的 g 不是克），数字前不能是字母、数字、小数点或“数字/”（T1、1/2/3 的中段）
+QUANTITY_RE = re.compile(
+    rf'(?<![a-z\d.])(?<!\d/)(?:{_range_pattern(ARABIC_NUM, ALL_UNITS, False)}|{_range_pattern(CN_NUM, ALL_UNITS, True)})')
+MASS_RE = re.compile(
+    rf'(?<![a-z\d.])(?<!\d/)(?:{_range_pattern(ARABIC_NUM, _unit_pattern(MASS_UNITS), True)}'
+    rf'|{_range_pattern(CN_NUM, _unit_pattern(MASS_UNITS), True)})')
+
+# 解析结果的字段；min/max 为规范单位下的数量，grams_min/grams_max 为能确定时的克数
+FIELDS = ('min', 'max', 'unit', 'grams_min', 'grams_max')
+EMPTY = (None,) * len(FIELDS)
+
+
+def parse_number(text: str) -> float | None:
+    """阿拉伯数字、分数（1/2）或中文数字（半、两、十二）"""
+    if text[0].isdigit():
+        if '/' in text:
+            num, den = text.split('/')
+            return float(num) / float(den) if float(den) else None
+        return float(text)
+    if text == '半':
+        return 0.5
+    if '半' in text:
+        return None
+    if text == '十':
+        return 10.0
+    if '十' in text:
+        tens, _, ones = text.partition('十')
+        if len(tens) > 1 or len(ones) > 1:
+            return None
+        return float(CN_DIGITS.get(tens, 1) * 10 + CN_DIGITS.get(ones, 0))
+    if len(text) == 1:
+        return float(CN_DIGITS[text])
+    return None
+
+
+def _clean(value: float | None) -> float | int | None:
+    if value is None:
+        return None
+    value = round(value, 3)
+    return int(value) if value == int(value) else value
+
+
+def _side(text: str) -> tuple | None:
+    """范围一侧的数字 -> (最小, 最大)；只有“1/2/3”这种并列写法两者不同"""
+    if text[0].isdigit() and text.count('/') >= 2:
+        values = [float(v) for v in text.split('/')]
+        return min(values), max(values)
+    value = parse_number(text)
+    return None if value is None else (value, value)
+
+
+def _factor(unit: str | None) -> float:
+    return MASS_UNITS.get(unit) or VOLUME_UNITS.get(unit) or 1
+
+
+def _amount(groups: tuple) -> tuple | None:
+    """_range_pattern 的 6 个分组 -> (最小, 最大, 单位)，数量已按各自的单位换算为规范单位。
+    两侧单位不可比（1个-200g）时只取前一侧"""
+    num1, unit1, half1, num2, unit2, half2 = groups
+    first = _side(num1)
+    if first is None:
+        return None
+    if num2 is None:
+        unit = unit1 or unit2
+        half = 0.5 if half1 or half2 else 0
+        factor = _factor(unit)
+        return (first[0] + half) * factor, (first[1] + half) * factor, unit
+    second = _side(num2)
+    low_unit, high_unit = unit1 or unit2, unit2 or unit1
+    low = (first[0] + (0.5 if half1 else 0)) * _factor(low_unit)
+    if second is None or UNIT_ALIASES.get(low_unit, low_unit) != UNIT_ALIASES.get(high_unit, high_unit):
+        return low, (first[1] + (0.5 if half1 else 0)) * _factor(low_unit), low_unit
+    high = (second[1] + (0.5 if half2 else 0)) * _factor(high_unit)
+    return (low, high, low_unit) if low <= high else (high, low, low_unit)
+
+
+def _match_amount(m) -> tuple | None:
+    """QUANTITY_RE / MASS_RE 的匹配（阿拉伯数字、中文数字两个分支各 6 个分组）"""
+    groups = m.groups()
+    return _amount(groups[:6] if groups[0] is not None else groups[6:])
+
+
+def _grams_hint(text: str, count: tuple | None) -> tuple | None:
+    """从说明文字里找克数：'共约 240g' 是总量；'每个约 100g' 乘以个数；否则取第一个质量"""
+    per_unit = None
+    first = None
+    for m in MASS_RE.finditer(text):
+        amount = _match_amount(m)
+        if amount is None:
+            continue
+        grams = amount[:2]
+        before = text[max(0, m.start() - 6):m.start()]
+        if '共' in before:
+            return grams
+        if '每' in before and per_unit is None:
+            per_unit = grams
+        elif first is None:
+            first = grams
+    if per_unit is not None and count is not None:
+        return per_unit[0] * count[0], per_unit[1] * count[1]
+    return first if first is not None else per_unit
+
+
+@lru_cache(maxsize=QUANTITY_CACHE_SIZE)
+def _parse(text: str) -> tuple:
+    text = text.strip().lower()
+    main = None
+    bare = None
+    for m in QUANTITY_RE.finditer(text):
+        amount = _match_amount(m)
+        if amount is None:
+            continue
+        unit = amount[2]
+        # 中文数字必须带单位（由正则保证），阿拉伯数字不带单位时先记下，没有更好的再用
+        if unit:
+            main = (m, amount)
+            break
+        if bare is None:
+            bare = (m, amount)
+    if main is None:
+        main = bare
+    if main is None:
+        return EMPTY
+
+    m, (low, high, unit) = main
+    grams = None
+    if unit in MASS_UNITS:
+        grams = (low, high)
+    elif unit not in VOLUME_UNITS:
+        # 计数类单位：看看括号或等号后面有没有给出克数
+        grams = _grams_hint(text[m.end():], (low, high))
+    unit = UNIT_ALIASES.get(unit, unit)
+    return (_clean(low), _clean(high), unit,
+            _clean(grams[0]) if grams else None, _clean(grams[1]) if grams else None)
+
+
+def quantity_fields(text) -> tuple:
+    """与 parse_quantity 相同，但返回按 FIELDS 排列的元组；同样的写法返回同一个（缓存中的）元组对象"""
+    if not isinstance(text, str) or not text.strip():
+        return EMPTY
+    return _parse(text)
+
+
+def parse_quantity(text) -> dict:
+    """把自由格式的用量解析成 {'min', 'max', 'unit', 'grams_min', 'grams_max'}。
+
+    unit 为规范单位：质量统一为 'g'，体积统一为 'ml'，计数类保留原单位（'个'、'瓣'……），
+    没有单位时为 None；grams_* 是能确定的克数（质量单位直接换算，计数单位取说明里的克数），
+    “适量”“少许”等无法量化的全部字段为 None。解析按字符串缓存，相同写法只解析一次。
+    """
+    return dict(zip(FIELDS, quantity_fields(text)))
+
+
+def cache_info():
+    return _parse.cache_info()
+
+
+# 回归用例：写法 -> FIELDS 各字段；python quantity.py 逐条核对
+EXAMPLES = {
+    '30g-50g': (30, 50, 'g', 30, 50),
+    '100g 到 200g': (100, 200, 'g', 100, 200),
+    '600ml-900ml': (600, 900, 'ml', None, None),
+    '10克至20克': (10, 20, 'g', 10, 20),
+    '500g-1kg': (500, 1000, 'g', 500, 1000),
+    '30-50g': (30, 50, 'g', 30, 50),
+    '1 份-2 份（看鸡蛋大小）': (1, 2, '份', None, None),
+    '1斤半': (750, 750, 'g', 750, 750),
+    '一斤半': (750, 750, 'g', 750, 750),
+    '1勺半': (1.5, 1.5, '勺', None, None),
+    '1/2/3勺': (1, 3, '勺', None, None),
+    '1/2勺': (0.5, 0.5, '勺', None, None),
+    '二两': (100, 100, 'g', 100, 100),
+    '2个（每个约100g-150g）': (2, 2, '个', 200, 300),
+    '1个-200g': (1, 1, '个', None, None),
+    'T1：1.5 分钟/500ml 水体积': (500, 500, 'ml', None, None),
+    '适量': EMPTY,
+}
+
+
+def check_examples() -> int:
+    """返回与 EXAMPLES 不符的写法数"""
+    failures = 0
+    for text, expected in EXAMPLES.items():
+        actual = quantity_fields(text)
+        if actual != expected:
+            failures += 1
+            print(f"不一致: {text!r}: {actual} != {expected}")
+    return failures
+
+
+if __name__ == '__main__':
+    failed = check_examples()
+    print(f"用量解析：{len(EXAMPLES) - failed}/{len(EXAMPLES)} 个用例通过")
+    sys.exit(1 if failed else 0)
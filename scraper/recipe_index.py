@@ -0,0 +1,287 @@
+import sys
+import json
+
+import numpy as np
+
+from merge_datasets import iter_json_records
+from build_index import build_index, match_ingredients, parse_ingredient_tokens
+
+INPUT_FILE = 'recipes_clean.json'
+# 默认返回的推荐条数
+TOP_K = 10
+UNCATEGORIZED = '未分类'
+# 批量查询时每次一起计算的查询数（按输入词个数排序后分组，组内补齐到同样的词数）
+BATCH_SIZE = 256
+# 每个字节中 1 的个数，numpy 没有 bitwise_count（< 2.0）时用来计数
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def bitset(ids, size: int) -> int:
+    """把编号集合打包成位图（Python 大整数，第 i 位表示编号 i）"""
+    buf = np.zeros((size + 7) // 8 * 8, dtype=np.uint8)
+    buf[np.fromiter(ids, dtype=np.int64)] = 1
+    return int.from_bytes(np.packbits(buf, bitorder='little').tobytes(), 'little')
+
+
+def bitset_words(positions, words: int) -> np.ndarray:
+    """与 bitset 相同的位图，存成 uint64 字数组（第 i 位在第 i // 64 个字的第 i % 64 位）"""
+    buf = np.zeros(words * 64, dtype=np.uint8)
+    buf[positions] = 1
+    return np.packbits(buf, bitorder='little').view('<u8')
+
+
+def bit_positions(bits: int, size: int) -> np.ndarray:
+    """位图中为 1 的编号，升序"""
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """uint64 数组逐元素的 1 的个数"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return POPCOUNT[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1)
+
+
+class RecipeIndex:
+    """进程内的“按手头食材推荐菜谱”查询引擎，结果与前端 App.vue 的 recommend() 一致。
+
+    菜谱 × 食材关系按食材存成菜谱位图（每个食材一个大整数）；输入词先按子串规则展开成食材，
+    再把这些食材的位图按位或，得到命中该词的菜谱位图（同一输入词的结果会缓存，批量查询时复用）。
+    命中个数用位切片计数器累加：levels[i] 是“命中数第 i 位为 1”的菜谱位图，整批菜谱一次位运算。
+    取前 k 条时按命中数从高到低、难度从低到高依次取出对应的位图桶，桶内按菜谱编号升序，
+    凑满 k 条即停止，不需要对全部命中结果排序。
+
+    批量查询另存一份 uint64 字数组形式的位图，位序按（难度, 编号）重排，同一命中数的桶按位升序取出
+    就是名次顺序；一组查询的计数、分桶和取前 k 条都是对（查询, 字）二维数组的整体运算。
+
+    排序规则：命中数降序，难度（缺失按 0）升序，其余按菜谱在文件中的顺序。
+    """
+
+    def __init__(self, recipes):
+        self.recipes = []
+        for recipe in recipes:
+            self.recipes.append({
+                'name': recipe.get('name', ''),
+                'category': recipe.get('category') or UNCATEGORIZED,
+                'difficulty': recipe.get('difficulty') or 0,
+                'ingredients': recipe.get('ingredients'),
+            })
+        size = len(self.recipes)
+        self.size = size
+        index = build_index(self.recipes)
+        self._index = index
+        self._vocab = {name: iid for iid, name in enumerate(index['ingredients'])}
+        self._ingredient_bits = [bitset(ids, size) for ids in index['postings']]
+        for r in self.recipes:
+            del r['ingredients']
+
+        by_difficulty, by_category = {}, {}
+        for i, r in enumerate(self.recipes):
+            by_difficulty.setdefault(r['difficulty'], []).append(i)
+            by_category.setdefault(r['category'], []).append(i)
+        self._difficulty_bits = [(d, bitset(ids, size)) for d, ids in sorted(by_difficulty.items())]
+        self._category_bits = {c: bitset(ids, size) for c, ids in by_category.items()}
+        self._token_bits = {}
+
+        # 批量查询用：第 p 位对应菜谱 self._order[p]
+        self._words = (size + 63) // 64
+        self._order = np.array(sorted(range(size), key=lambda i: self.recipes[i]['difficulty']), dtype=np.int64)
+        position = np.empty(size, dtype=np.int64)
+        position[self._order] = np.arange(size)
+        self._ingredient_words = np.zeros((len(index['postings']), self._words), dtype='<u8')
+        for iid, ids in enumerate(index['postings']):
+            self._ingredient_words[iid] = bitset_words(position[np.fromiter(ids, dtype=np.int64)], self._words)
+        self._category_words = {c: bitset_words(position[ids], self._words) for c, ids in by_category.items()}
+        self._token_words = {}
+
+    @classmethod
+    def from_file(cls, path: str = INPUT_FILE) -> 'RecipeIndex':
+        return cls(iter_json_records(path))
+
+    @property
+    def categories(self) -> list:
+        return list(self._category_bits)
+
+    @staticmethod
+    def tokens(query) -> list:
+        """输入框文本或输入词列表 -> 归一化、去重后的输入词"""
+        if isinstance(query, str):
+            return parse_ingredient_tokens(query)
+        return parse_ingredient_tokens('\n'.join(query))
+
+    def token_bits(self, token: str) -> int:
+        """命中输入词（已归一化）的菜谱位图"""
+        bits = self._token_bits.get(token)
+        if bits is None:
+            bits = 0
+            for iid in match_ingredients(self._index, token, self._vocab):
+                bits |= self._ingredient_bits[iid]
+            self._token_bits[token] = bits
+        return bits
+
+    @staticmethod
+    def _count(bitsets: list) -> list:
+        """位切片计数：返回 levels，菜谱 i 的命中数 = sum(((levels[b] >> i) & 1) << b)"""
+        levels = []
+        for carry in bitsets:
+            for b, level in enumerate(levels):
+                levels[b] = level ^ carry
+                carry &= level
+                if not carry:
+                    break
+            if carry:
+                levels.append(carry)
+        return levels
+
+    def recommend(self, query, k: int | None = TOP_K, category: str | None = None) -> list:
+        """query 为输入框文本（逗号、顿号、换行分隔）或输入词列表；category 为分类预筛选
+        （未分类的菜谱用 '未分类'）；k 为 None 时返回全部命中。
+
+        返回 [{'id', 'name', 'category', 'difficulty', 'matched_count', 'input_count', 'matched_names'}]。
+        """
+        tokens = self.tokens(query)
+        if not tokens:
+            return []
+        token_bits = [self.token_bits(t) for t in tokens]
+        candidates = 0
+        for bits in token_bits:
+            candidates |= bits
+        if category is not None:
+            candidates &= self._category_bits.get(category, 0)
+        if not candidates:
+            return []
+        levels = self._count(token_bits)
+
+        limit = self.size if k is None else k
+        ids = []
+        # 计数器只有 len(levels) 位，更大的命中数不存在（也无法用这些位区分）
+        for matched in range(min(len(tokens), (1 << len(levels)) - 1), 0, -1):
+            # 命中数恰为 matched 的菜谱：逐位比较计数器
+            bucket = candidates
+            for b, level in enumerate(levels):
+                bucket &= level if matched >> b & 1 else ~level
+            if not bucket:
+                continue
+            candidates &= ~bucket
+            for _, diff_bits in self._difficulty_bits:
+                sub = bucket & diff_bits
+                if sub:
+                    ids.extend((int(i), matched) for i in bit_positions(sub, self.size)[:limit - len(ids)])
+                    if len(ids) >= limit:
+                        break
+            if len(ids) >= limit or not candidates:
+                break
+
+        return [self._result(i, matched, tokens, [t for t, bits in zip(tokens, token_bits) if bits >> i & 1])
+                for i, matched in ids]
+
+    def _result(self, i: int, matched: int, tokens: list, matched_names: list) -> dict:
+        r = self.recipes[i]
+        return {
+            'id': i,
+            'name': r['name'],
+            'category': r['category'],
+            'difficulty': r['difficulty'],
+            'matched_count': matched,
+            'input_count': len(tokens),
+            'matched_names': matched_names,
+        }
+
+    def token_words(self, token: str) -> np.ndarray:
+        """命中输入词的菜谱位图（批量查询的位序）"""
+        words = self._token_words.get(token)
+        if words is None:
+            iids = sorted(match_ingredients(self._index, token, self._vocab))
+            words = np.bitwise_or.reduce(self._ingredient_words[iids], axis=0) if iids else \
+                np.zeros(self._words, dtype='<u8')
+            self._token_words[token] = words
+        return words
+
+    def recommend_batch(self, queries, k: int | None = TOP_K, category: str | None = None) -> list:
+        """批量查询，结果与逐条调用 recommend() 相同，返回与 queries 对齐的列表。
+
+        查询按输入词个数排序后每 BATCH_SIZE 条一组，组内补齐到同样的词数，整组一起计算。
+        """
+        queries = [self.tokens(q) for q in queries]
+        mask = None
+        if category is not None:
+            mask = self._category_words.get(category, np.zeros(self._words, dtype='<u8'))
+        limit = self.size if k is None else k
+        empty = np.zeros((1, self._words), dtype='<u8')
+
+        results = [[] for _ in queries]
+        order = sorted((i for i, tokens in enumerate(queries) if tokens), key=lambda i: len(queries[i]))
+        for start in range(0, len(order), BATCH_SIZE):
+            group = order[start:start + BATCH_SIZE]
+            width = len(queries[group[-1]])
+            rows = {t: None for i in group for t in queries[i]}
+            matrix = np.concatenate([np.stack([self.token_words(t) for t in rows]), empty])
+            for row, t in enumerate(rows):
+                rows[t] = row
+            ids = np.full((len(group), width), len(rows), dtype=np.int64)  # 补齐的位置指向全 0 行
+            for g, i in enumerate(group):
+                ids[g, :len(queries[i])] = [rows[t] for t in queries[i]]
+            hits = matrix[ids]  # (查询, 输入词, 字)
+            g, positions, matched = self._top_batch(hits, mask, limit)
+            # 每条结果命中了哪些输入词：(结果, 输入词)
+            flags = hits[g, :, positions >> 6] >> (positions & 63).astype('<u8')[:, None] & 1
+            for g, i, matched, flags in zip(g.tolist(), self._order[positions].tolist(), matched.tolist(),
+                                             flags.astype(bool).tolist()):
+                tokens = queries[group[g]]
+                results[group[g]].append(self._result(i, matched, tokens, [t for t, f in zip(tokens, flags) if f]))
+        return results
+
+    @staticmethod
+    def _top_batch(hits: np.ndarray, mask, limit: int):
+        """一组查询各自的前 limit 条，返回按查询、名次排好的 (组内序号, 位序, 命中数) 三个数组"""
+        n, width, _ = hits.shape
+        candidates = np.bitwise_or.reduce(hits, axis=1)
+        if mask is not None:
+            candidates &= mask
+        # 位切片计数，与 _count 相同，只是每一位都是（查询, 字）数组
+        levels = np.zeros((width.bit_length(), *candidates.shape), dtype=candidates.dtype)
+        for j in range(width):
+            carry = hits[:, j].copy()
+            for b in range(len(levels)):
+                levels[b], carry = levels[b] ^ carry, levels[b] & carry
+
+        need = np.full(n, limit, dtype=np.int64)
+        picked = []
+        for matched in range(width, 0, -1):
+            active = np.flatnonzero((need > 0) & candidates.any(axis=1))
+            if not active.size:
+                break
+            bucket = candidates[active]
+            for b, level in enumerate(levels):
+                bucket &= level[active] if matched >> b & 1 else ~level[active]
+            candidates[active] &= ~bucket
+            # 每条查询只需展开前 need 个 1 所在的字
+            pop = popcount(bucket).astype(np.int64)
+            before = np.cumsum(pop, axis=1) - pop
+            rows, cols = np.nonzero((pop > 0) & (before < need[active, None]))
+            if not rows.size:
+                continue
+            bits = np.unpackbits(bucket[rows, cols].view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+            rank = np.cumsum(bits, axis=1) - 1 + before[rows, cols][:, None]
+            r, bit = np.nonzero(bits & (rank < need[active[rows], None]))
+            q = active[rows[r]]
+            picked.append((q, cols[r] * 64 + bit, np.full(q.size, matched)))
+            need -= np.bincount(q, minlength=n)
+
+        if not picked:
+            return (np.zeros(0, dtype=np.int64),) * 3
+        q, positions, matched = (np.concatenate(a) for a in zip(*picked))
+        # 各桶按命中数从高到低依次取出，稳定排序后同一查询内仍是名次顺序
+        order = np.argsort(q, kind='stable')
+        return q[order], positions[order], matched[order]
+
+
+def main(input_file: str = INPUT_FILE, query: str = '西红柿, 鸡蛋, 葱'):
+    index = RecipeIndex.from_file(input_file)
+    for r in index.recommend(query):
+        print(json.dumps(r, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,291 @@
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from parse_howtocook import tag_taste
+
+try:
+    from lxml import etree
+except ImportError:
+    # 可选依赖（pip install lxml）；没有时用标准库 html.parser，结果相同，只是慢一些
+    etree = None
+
+# 下厨房页面解析：分类页只构建菜谱列表和分页器的子树，详情页不建树，
+# 扫描标签事件时只收集菜名、用料表、步骤、时长和分类标签所在的区域，这几个区域都出现后就停止读取页面
+# （评论、推荐、页脚等占页面的大部分）。装有 lxml 时用它的 C 解析器产生事件，否则用 html.parser。
+PARSER = 'lxml' if etree is not None else 'html.parser'
+# 分类页中需要的元素：ul.list（菜谱链接）、div.pager / a.next（下一页）
+LISTING_STRAINER = SoupStrainer(attrs={'class': ['list', 'pager', 'next']})
+
+# 详情页各区域的 class；时长用 schema.org 微数据标注
+TITLE_CLASS = 'page-title'
+INGREDIENTS_CLASS = 'ings'
+STEPS_CLASS = 'steps'
+TAGS_CLASS = 'recipe-cats'
+TIME_ITEMPROPS = ('totalTime', 'cookTime')
+# 参照实现读取的全部区域；都已读完时不再继续解析后面的内容。
+# 时长可能排在分类标签之后（侧栏、评论区下方），也要等它出现；页面没有时长时读到结尾
+REQUIRED_REGIONS = ('title', 'ingredients', 'steps', 'tags', 'time')
+# 每次送入解析器的字符数：读完所需区域后，剩余部分不再送入
+FEED_CHUNK = 16384
+# 没有结束标签的元素，不入栈
+VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                           'param', 'source', 'track', 'wbr'])
+
+ISO_DURATION_RE = re.compile(r'^P(?:\d+D)?T?(?:(\d+)H)?(?:(\d+)M)?', re.IGNORECASE)
+HOURS_RE = re.compile(r'(\d+)\s*(?:小时|h)', re.IGNORECASE)
+MINUTES_RE = re.compile(r'(\d+)\s*(?:分钟|min)', re.IGNORECASE)
+# 两侧都是非 ASCII 字符（中文、全角标点）的空白是排版换行留下的，直接去掉
+CJK_SPACE_RE = re.compile(r'(?<=[^\x00-\x7f])\s+(?=[^\x00-\x7f])')
+
+
+def clean_text(s: str) -> str:
+    """合并连续空白（含换行、&nbsp;）为一个空格，中文之间的空白去掉，并去掉首尾空白"""
+    return ' '.join(CJK_SPACE_RE.sub('', s).split())
+
+
+def parse_duration(value: str) -> int | None:
+    """时长转为分钟数：支持 ISO 8601（PT1H30M）和“1小时30分钟”“20 min”这类文本"""
+    value = value.strip()
+    m = ISO_DURATION_RE.match(value)
+    if m and (m.group(1) or m.group(2)):
+        return int(m.group(1) or 0) * 60 + int(m.group(2) or 0)
+    hours, minutes = HOURS_RE.search(value), MINUTES_RE.search(value)
+    if not hours and not minutes:
+        return None
+    return (int(hours.group(1)) * 60 if hours else 0) + (int(minutes.group(1)) if minutes else 0)
+
+
+def parse_listing(html: str) -> BeautifulSoup:
+    """分类页只解析菜谱列表和分页器，返回的 soup 可直接交给 main.extract_recipe_links / extract_next_page"""
+    return BeautifulSoup(html, PARSER, parse_only=LISTING_STRAINER)
+
+
+class DetailTarget:
+    """详情页的标签事件处理器（接口与 lxml 解析器的 target 相同：start / end / data / close）。
+
+    区域外的标签只看一眼 class 和 itemprop；进入区域后记录打开的标签，对应的结束标签出现时区域结束。
+    html.parser 不补全缺失的结束标签，结束标签按名字向上匹配，中间未闭合的标签一并弹出。
+    """
+
+    def __init__(self):
+        self.title = None
+        self.ingredients = []
+        self.steps = []
+        self.tags = []
+        self.cooking_time = None
+        self.finished = set()
+        # 当前区域及其中打开的标签
+        self.region = None
+        self.stack = []
+        self.parts = []
+        # 区域内当前收集文字的位置：(列表, 所在元素的栈深度)；row / step 为当前的用料行 / 步骤
+        self.cell = None
+        self.row = None
+        self.step = None
+
+    @property
+    def done(self) -> bool:
+        return all(r in self.finished for r in REQUIRED_REGIONS)
+
+    def _enter(self, tag: str, attrs: dict) -> str | None:
+        classes = (attrs.get('class') or '').split()
+        if TITLE_CLASS in classes:
+            return 'title'
+        if INGREDIENTS_CLASS in classes:
+            return 'ingredients'
+        if STEPS_CLASS in classes:
+            return 'steps'
+        if TAGS_CLASS in classes:
+            return 'tags'
+        if attrs.get('itemprop') in TIME_ITEMPROPS:
+            # 与参照实现一致，只看第一个时长元素：有 content 属性（或是 <meta> 这类空元素）时取属性值，否则取文字
+            if 'time' in self.finished or not (attrs.get('content') or tag in VOID_ELEMENTS):
+                return 'time'
+            self.cooking_time = parse_duration(attrs.get('content') or '')
+            self.finished.add('time')
+        return None
+
+    def start(self, tag, attrs):
+        if self.region is None:
+            region = self._enter(tag, attrs)
+            # 同一区域只取第一次出现（推荐列表里也可能有同名 class）
+            if region is None or region in self.finished or tag in VOID_ELEMENTS:
+                return
+            self.region = region
+            self.stack = [tag]
+            self.parts = []
+            return
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        depth = len(self.stack)
+        classes = (attrs.get('class') or '').split()
+        if self.region == 'ingredients':
+            if tag == 'tr':
+                self.row = {'name': [], 'unit': []}
+                self.ingredients.append(self.row)
+            elif tag == 'td' and self.row is not None:
+                for key in ('name', 'unit'):
+                    if key in classes:
+                        self.cell = (self.row[key], depth)
+        elif self.region == 'steps':
+            if tag == 'li':
+                self.step = {'text': [], 'all': [], 'has_text': False, 'depth': depth}
+                self.steps.append(self.step)
+                self.cell = (self.step['all'], depth)
+            elif tag == 'p' and 'text' in classes and self.step is not None:
+                self.step['has_text'] = True
+                self.cell = (self.step['text'], depth)
+        elif self.region == 'tags' and tag == 'a':
+            self.cell = ([], depth)
+            self.tags.append(self.cell[0])
+
+    def end(self, tag):
+        if self.region is None or tag not in self.stack:
+            return
+        while self.stack.pop() != tag:
+            pass
+        depth = len(self.stack)
+        if self.cell is not None and self.cell[1] > depth:
+            self.cell = None
+            # 步骤中的 p.text 结束后，回到所在 li 继续收集
+            if self.step is not None and self.step['depth'] <= depth:
+                self.cell = (self.step['all'], self.step['depth'])
+        if self.step is not None and self.step['depth'] > depth:
+            self.step = None
+        if not self.stack:
+            self._finish()
+
+    def _finish(self):
+        text = clean_text(''.join(self.parts))
+        if self.region == 'title':
+            self.title = text
+        elif self.region == 'time':
+            self.cooking_time = parse_duration(text)
+        self.finished.add(self.region)
+        self.region = None
+        self.cell = self.row = self.step = None
+
+    def data(self, data):
+        if self.region is None:
+            return
+        if self.region in ('title', 'time'):
+            self.parts.append(data)
+        elif self.cell is not None:
+            self.cell[0].append(data)
+
+    def close(self):
+        if self.region is not None:
+            self._finish()
+        return self.fields()
+
+    def fields(self) -> dict:
+        ingredients = []
+        for row in self.ingredients:
+            name = clean_text(''.join(row['name']))
+            if name:
+                ingredients.append({'name': name, 'quantity': clean_text(''.join(row['unit']))})
+        steps = []
+        for step in self.steps:
+            # 有 p.text 时只取其中的文字（li 里的图片说明等不算）
+            text = clean_text(''.join(step['text'] if step['has_text'] else step['all']))
+            if text:
+                steps.append(text)
+        return {
+            'title': self.title or '',
+            'ingredients': ingredients,
+            'steps': steps,
+            'cooking_time': self.cooking_time,
+            'tags': [t for t in (clean_text(''.join(parts)) for parts in self.tags) if t],
+        }
+
+
+class _EventParser(HTMLParser):
+    """把 html.parser 的回调转给 DetailTarget"""
+
+    def __init__(self, target: DetailTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def extract_detail(html: str) -> dict:
+    """详情页的原始字段：title, ingredients[{name, quantity}], steps, cooking_time, tags"""
+    target = DetailTarget()
+    parser = etree.HTMLParser(target=target) if etree is not None else _EventParser(target)
+    for start in range(0, len(html), FEED_CHUNK):
+        parser.feed(html[start:start + FEED_CHUNK])
+        if target.done:
+            return target.fields()
+    parser.close()
+    return target.fields()
+
+
+def extract_detail_soup(soup) -> dict:
+    """在完整的 BeautifulSoup 树上取同样的字段；作为 extract_detail 的参照实现（见 bench_html.py）"""
+    title = soup.find(class_=TITLE_CLASS)
+    ingredients = []
+    ings = soup.find(class_=INGREDIENTS_CLASS)
+    for tr in ings.find_all('tr') if ings else ():
+        name, unit = tr.find('td', class_='name'), tr.find('td', class_='unit')
+        name = clean_text(name.get_text()) if name else ''
+        if name:
+            ingredients.append({'name': name, 'quantity': clean_text(unit.get_text()) if unit else ''})
+    steps = []
+    block = soup.find(class_=STEPS_CLASS)
+    for li in block.find_all('li') if block else ():
+        texts = li.find_all('p', class_='text')
+        text = clean_text(''.join(p.get_text() for p in texts) if texts else li.get_text())
+        if text:
+            steps.append(text)
+    cooking_time = None
+    node = soup.find(attrs={'itemprop': TIME_ITEMPROPS})
+    if node is not None:
+        cooking_time = parse_duration(node.get('content') or node.get_text())
+    cats = soup.find(class_=TAGS_CLASS)
+    tags = [t for t in (clean_text(a.get_text()) for a in cats.find_all('a')) if t] if cats else []
+    return {
+        'title': clean_text(title.get_text()) if title else '',
+        'ingredients': ingredients,
+        'steps': steps,
+        'cooking_time': cooking_time,
+        'tags': tags,
+    }
+
+
+def to_item(fields: dict, url: str, category: str) -> dict | None:
+    """映射为 new_data_source.json 的条目格式（merge_datasets.convert_new_source_format 读取）。
+
+    下厨房没有难度，记为 0；口味与 HowToCook 一样按关键词从菜名、分类标签、用料和步骤中识别；
+    分类标签只用于识别口味，不写入 tags 字段（convert_new_source_format 会把 tags 当作口味）。
+    没有菜名或用料、步骤都为空时返回 None。
+    """
+    if not fields['title'] or not (fields['ingredients'] or fields['steps']):
+        return None
+    text = '\n'.join([fields['title'], *fields['tags'], *(i['name'] for i in fields['ingredients']),
+                      *fields['steps']])
+    return {
+        'title': fields['title'],
+        'category': category,
+        'ingredients': fields['ingredients'],
+        'steps': fields['steps'],
+        'cooking_time': fields['cooking_time'],
+        'difficulty': 0,
+        'taste': tag_taste(text),
+        'source_category': category,
+        'source_path': url,
+    }
+
+
+def parse_detail(html: str, url: str, category: str) -> dict | None:
+    return to_item(extract_detail(html), url, category)
@@ -0,0 +1,206 @@
+import sys
+
+import numpy as np
+
+from merge_datasets import iter_json_records
+
+INPUT_FILE = 'recipes_clean.json'
+TABLE_FILE = 'recipes_table.npz'
+TABLE_VERSION = 1
+# 口味用 uint64 位掩码表示，最多支持 64 种
+MAX_TASTES = 64
+
+
+class RecipeTable:
+    """列式菜谱表：每列一个 NumPy 数组，筛选和排序都是整列向量运算，不逐条遍历 dict。
+
+    列：
+        difficulty          int8
+        cooking_time        int32，缺失处为 0，并由 cooking_time_null（bool）标记
+        category / source   整数编码（按词表大小取最小的无符号类型），对应 categories / sources 词表
+        taste               uint64 位掩码，第 i 位对应 tastes[i]
+        名称                UTF-8 字节拼接 + 偏移量（不依赖 pickle，便于保存）
+
+    行号即菜谱在 recipes_clean.json 中的下标，与食材索引、发布清单的编号一致。
+    """
+
+    def __init__(self, columns: dict):
+        self.difficulty = columns['difficulty']
+        self.cooking_time = columns['cooking_time']
+        self.cooking_time_null = columns['cooking_time_null']
+        self.category = columns['category']
+        self.source = columns['source']
+        self.taste = columns['taste']
+        self.name_data = columns['name_data']
+        self.name_offsets = columns['name_offsets']
+        self.categories = [str(x) for x in columns['categories']]
+        self.sources = [str(x) for x in columns['sources']]
+        self.tastes = [str(x) for x in columns['tastes']]
+        self._category_codes = {c: i for i, c in enumerate(self.categories)}
+        self._source_codes = {s: i for i, s in enumerate(self.sources)}
+        self._taste_bits = {t: np.uint64(1 << i) for i, t in enumerate(self.tastes)}
+
+    def __len__(self):
+        return len(self.difficulty)
+
+    @classmethod
+    def from_recipes(cls, recipes) -> 'RecipeTable':
+        """从菜谱 dict 序列构建（可以是流式迭代器）"""
+        difficulty, cooking_time, category, source, taste = [], [], [], [], []
+        names = bytearray()
+        offsets = [0]
+        categories, sources, tastes = {}, {}, {}
+        for recipe in recipes:
+            difficulty.append(recipe.get('difficulty') or 0)
+            cooking_time.append(recipe.get('cooking_time'))
+            category.append(categories.setdefault(recipe.get('category') or '', len(categories)))
+            source.append(sources.setdefault(recipe.get('source') or '', len(sources)))
+            mask = 0
+            for t in recipe.get('taste') or []:
+                bit = tastes.setdefault(str(t), len(tastes))
+                if bit >= MAX_TASTES:
+                    raise ValueError(f"口味种类超过 {MAX_TASTES} 种，无法用 uint64 位掩码表示")
+                mask |= 1 << bit
+            taste.append(mask)
+            names += str(recipe.get('name', '')).encode('utf-8')
+            offsets.append(len(names))
+
+        null = np.array([t is None for t in cooking_time], dtype=bool)
+        return cls({
+            'difficulty': np.array(difficulty, dtype=np.int8),
+            'cooking_time': np.array([t or 0 for t in cooking_time], dtype=np.int32),
+            'cooking_time_null': null,
+            'category': np.array(category, dtype=np.min_scalar_type(len(categories))),
+            'source': np.array(source, dtype=np.min_scalar_type(len(sources))),
+            'taste': np.array(taste, dtype=np.uint64),
+            'name_data': np.frombuffer(bytes(names), dtype=np.uint8),
+            'name_offsets': np.array(offsets, dtype=np.int64),
+            'categories': np.array(list(categories), dtype=str),
+            'sources': np.array(list(sources), dtype=str),
+            'tastes': np.array(list(tastes), dtype=str),
+        })
+
+    def save(self, path: str = TABLE_FILE):
+        """保存为未压缩的 .npz，加载时直接读入数组，不需要解析 JSON"""
+        np.savez(path, version=np.array(TABLE_VERSION),
+                 difficulty=self.difficulty, cooking_time=self.cooking_time,
+                 cooking_time_null=self.cooking_time_null, category=self.category, source=self.source,
+                 taste=self.taste, name_data=self.name_data, name_offsets=self.name_offsets,
+                 categories=np.array(self.categories, dtype=str), sources=np.array(self.sources, dtype=str),
+                 tastes=np.array(self.tastes, dtype=str))
+
+    @classmethod
+    def load(cls, path: str = TABLE_FILE) -> 'RecipeTable':
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != TABLE_VERSION:
+                raise ValueError(f"{path}: 表格版本 {int(data['version'])} 与当前版本 {TABLE_VERSION} 不一致")
+            return cls({key: data[key] for key in data.files})
+
+    def name(self, i: int) -> str:
+        start, end = self.name_offsets[i], self.name_offsets[i + 1]
+        return self.name_data[start:end].tobytes().decode('utf-8')
+
+    def taste_mask(self, tastes) -> np.uint64 | None:
+        """口味列表对应的位掩码；含未知口味时返回 None"""
+        mask = np.uint64(0)
+        for t in tastes:
+            bit = self._taste_bits.get(t)
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+    def filter(self, category=None, source=None, min_difficulty=None, max_difficulty=None,
+               min_time=None, max_time=None, taste_all=(), taste_any=()) -> np.ndarray:
+        """按条件筛选，返回 bool 掩码（各条件取交集）。
+
+        category/source 可以是单个值或列表；min/max 为闭区间，指定了时间条件时缺失时长的菜谱不入选；
+        taste_all 要求包含全部口味，taste_any 要求至少包含其一。
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            mask &= self._isin(self.category, self._category_codes, category)
+        if source is not None:
+            mask &= self._isin(self.source, self._source_codes, source)
+        if min_difficulty is not None:
+            mask &= self.difficulty >= min_difficulty
+        if max_difficulty is not None:
+            mask &= self.difficulty <= max_difficulty
+        if min_time is not None or max_time is not None:
+            mask &= ~self.cooking_time_null
+            if min_time is not None:
+                mask &= self.cooking_time >= min_time
+            if max_time is not None:
+                mask &= self.cooking_time <= max_time
+        if taste_all:
+            bits = self.taste_mask(taste_all)
+            if bits is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= (self.taste & bits) == bits
+        if taste_any:
+            bits = self.taste_mask(t for t in taste_any if t in self._taste_bits) or np.uint64(0)
+            mask &= (self.taste & bits) != 0
+        return mask
+
+    @staticmethod
+    def _isin(column: np.ndarray, codes: dict, values) -> np.ndarray:
+        if isinstance(values, str):
+            values = [values]
+        # 按编码查 bool 表，一次 take 完成，比 np.isin 或逐个比较再求或更快
+        lookup = np.zeros(len(codes), dtype=bool)
+        lookup[[codes[v] for v in values if v in codes]] = True
+        return np.take(lookup, column)
+
+    def sort(self, rows: np.ndarray, keys) -> np.ndarray:
+        """按 keys 对行号排序（稳定排序），返回排好序的行号。
+
+        keys 为列名序列，第一个为主键，前缀 '-' 表示降序，如 ['difficulty', '-cooking_time']；
+        可用列：difficulty、cooking_time（缺失的总排在最后）、category、source。
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        sort_keys = []
+        for key in keys:
+            descending = key.startswith('-')
+            column = key.lstrip('-')
+            values = getattr(self, column)[rows].astype(np.int64)
+            if descending:
+                values = -values
+            if column == 'cooking_time':
+                values = np.where(self.cooking_time_null[rows], np.iinfo(np.int64).max, values)
+            sort_keys.append(values)
+        if not sort_keys:
+            return rows
+        # lexsort 以最后一个键为主键
+        return rows[np.lexsort(sort_keys[::-1])]
+
+    def rows(self, rows, limit: int | None = None) -> list:
+        """把行号（或 filter() 返回的布尔掩码）转换成精简的菜谱 dict，供展示或输出"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        result = []
+        for i in rows[:limit]:
+            taste_bits = int(self.taste[i])
+            result.append({
+                'id': int(i),
+                'name': self.name(i),
+                'category': self.categories[self.category[i]],
+                'source': self.sources[self.source[i]],
+                'difficulty': int(self.difficulty[i]),
+                'cooking_time': None if self.cooking_time_null[i] else int(self.cooking_time[i]),
+                'taste': [t for b, t in enumerate(self.tastes) if taste_bits >> b & 1],
+            })
+        return result
+
+
+def main(input_file: str = INPUT_FILE, table_file: str = TABLE_FILE):
+    table = RecipeTable.from_recipes(iter_json_records(input_file))
+    table.save(table_file)
+    print(f"列式表已保存到 {table_file}：{len(table)} 道菜谱，{len(table.categories)} 个分类，"
+          f"{len(table.tastes)} 种口味")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
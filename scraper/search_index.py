@@ -0,0 +1,250 @@
+import os
+import re
+import sys
+import json
+import math
+
+import numpy as np
+
+from merge_datasets import iter_json_records
+
+INPUT_FILE = 'recipes_clean.json'
+OUTPUT_FILE = 'search_index.json'
+SEARCH_INDEX_VERSION = 2
+TOP_K = 10
+
+# BM25 参数；菜名命中按 NAME_WEIGHT 倍词频计入（同时计入文档长度），菜名里出现的词排得更靠前
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3
+# 每个 (词, 菜谱) 的 BM25 得分在构建时算好，并量化为 1..IMPACT_LEVELS 的整数：
+# 查询只需把整数相加，导出文件里也只存小整数；内存中的索引与从文件读回的索引排序完全相同
+IMPACT_LEVELS = 255
+# 截断查询（search(..., max_depth=MAX_DEPTH)）时每个词最多读按得分排序的前 MAX_DEPTH 条（冠军表），
+# 单次查询的工作量有与菜谱总数无关的上界，但结果可能与精确排序不同；默认的精确查询不截断
+MAX_DEPTH = 256
+
+# 中文连续段切成字二元组，英文/数字按整词；与 Lucene CJKBigramFilter 一样，查询里孤立的单个汉字保留为单字词。
+# 另有单字字段：每个汉字都单独索引（长度归一化与二元组字段分开算），单字查询能命中所有含这个字的菜谱
+TOKEN_RE = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+')
+CJK_RE = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+
+def tokenize(text) -> list:
+    """文本 -> 词列表（含重复，顺序同原文）"""
+    tokens = []
+    for run in TOKEN_RE.findall(str(text or '').lower()):
+        if len(run) > 1 and CJK_RE.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def is_char_term(term: str) -> bool:
+    """单个汉字的词属于单字字段，其余属于二元组字段"""
+    return len(term) == 1 and CJK_RE.match(term) is not None
+
+
+def index_tokens(text) -> list:
+    """文本在两个字段中的词：二元组（及英文/数字词）和每一个汉字；孤立汉字只计入单字字段"""
+    text = str(text or '').lower()
+    return [t for t in tokenize(text) if not is_char_term(t)] + CJK_RE.findall(text)
+
+
+def recipe_term_freqs(recipe) -> dict:
+    """菜谱的加权词频：菜名中的词按 NAME_WEIGHT 计，步骤中的按 1 计"""
+    tf = {}
+    for token in index_tokens(recipe.get('name')):
+        tf[token] = tf.get(token, 0) + NAME_WEIGHT
+    for step in recipe.get('steps') or ():
+        for token in index_tokens(step):
+            tf[token] = tf.get(token, 0) + 1
+    return tf
+
+
+class SearchIndexBuilder:
+    """逐条加入菜谱，最后一次性算出量化后的 BM25 得分；发布阶段边流式读取边构建，不必先读入全部菜谱"""
+
+    def __init__(self):
+        self.terms = {}
+        self.docs = []
+        self.freqs = []
+        self.lengths = []
+        self.char_lengths = []
+
+    def add(self, recipe):
+        doc = len(self.lengths)
+        tf = recipe_term_freqs(recipe)
+        for term, freq in tf.items():
+            tid = self.terms.get(term)
+            if tid is None:
+                tid = self.terms[term] = len(self.docs)
+                self.docs.append([])
+                self.freqs.append([])
+            self.docs[tid].append(doc)
+            self.freqs[tid].append(freq)
+        self.lengths.append(sum(freq for term, freq in tf.items() if not is_char_term(term)))
+        self.char_lengths.append(sum(freq for term, freq in tf.items() if is_char_term(term)))
+
+    def build(self) -> 'SearchIndex':
+        count = len(self.lengths)
+        norms, char_norms = (self._norms(lengths) for lengths in (self.lengths, self.char_lengths))
+        scores = []
+        for term, docs, freqs in zip(self.terms, self.docs, self.freqs):
+            norm = char_norms if is_char_term(term) else norms
+            tf = np.asarray(freqs, dtype=np.float64)
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores.append(idf * tf * (BM25_K1 + 1) / (tf + norm[docs]))
+        top = max((float(s.max()) for s in scores), default=0.0) or 1.0
+        scale = top / IMPACT_LEVELS
+        impacts = [np.maximum(np.rint(s / scale), 1).astype(np.uint8) for s in scores]
+        postings = [np.asarray(docs, dtype=np.int32) for docs in self.docs]
+        return SearchIndex(list(self.terms), postings, impacts, count, scale)
+
+    @staticmethod
+    def _norms(lengths: list) -> np.ndarray:
+        lengths = np.asarray(lengths, dtype=np.float64)
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.any() else 1.0
+        return BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+
+
+class SearchIndex:
+    """菜名和步骤的全文检索：字二元组 + 单字两个字段，BM25 排序。
+
+    每个词的倒排表按菜谱编号升序存 (菜谱编号, 量化得分)，另存一份按得分降序的下标。
+    取前 k 条用阈值算法：各查询词的倒排表按得分从高往低同步读到深度 d，读到的菜谱算出完整得分；
+    深度 d 处各词得分之和是尚未读到的菜谱能达到的上限，第 k 名的得分严格高于它就可以停止，否则 d 翻倍再来。
+    结果与对全部菜谱逐一打分后排序完全相同。传入 max_depth 时最深只读到 max_depth（k 更大时为 k），
+    查询耗时有与菜谱总数无关的上界；读到上限仍未停止（常见词组成的长查询、大量同分菜谱）时返回读到的候选中
+    得分最高的 k 条，结果可能不精确，search 的结果中 exact 为 False。
+
+    排序规则：得分降序，得分相同按菜谱编号升序。菜谱编号即在 recipes_clean.json 中的下标。
+    """
+
+    def __init__(self, terms: list, postings: list, impacts: list, count: int, scale: float):
+        self.terms = {term: tid for tid, term in enumerate(terms)}
+        self.postings = postings
+        self.impacts = impacts
+        self.count = count
+        self.scale = scale
+        self._orders = [None] * len(postings)
+
+    @classmethod
+    def build(cls, recipes) -> 'SearchIndex':
+        builder = SearchIndexBuilder()
+        for recipe in recipes:
+            builder.add(recipe)
+        return builder.build()
+
+    @classmethod
+    def from_file(cls, path: str = INPUT_FILE) -> 'SearchIndex':
+        return cls.build(iter_json_records(path))
+
+    @classmethod
+    def load(cls, path: str = OUTPUT_FILE) -> 'SearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SEARCH_INDEX_VERSION:
+            raise ValueError(f"{path} 的版本 {data.get('version')} 与当前版本 {SEARCH_INDEX_VERSION} 不一致")
+        postings = [np.cumsum(np.asarray(gaps, dtype=np.int32), dtype=np.int32) for gaps in data['postings']]
+        impacts = [np.asarray(values, dtype=np.uint8) for values in data['impacts']]
+        return cls(data['terms'], postings, impacts, data['count'], data['scale'])
+
+    def to_dict(self) -> dict:
+        """导出格式：倒排表存相邻编号之差（小整数，JSON 中更短），与 impacts 一一对应"""
+        return {
+            'version': SEARCH_INDEX_VERSION,
+            'count': self.count,
+            'scale': self.scale,
+            'terms': list(self.terms),
+            'postings': [np.diff(docs, prepend=0).tolist() for docs in self.postings],
+            'impacts': [values.tolist() for values in self.impacts],
+        }
+
+    def save(self, path: str = OUTPUT_FILE):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _order(self, tid: int) -> np.ndarray:
+        order = self._orders[tid]
+        if order is None:
+            # 稳定排序：得分相同的保持编号升序
+            order = self._orders[tid] = np.argsort(-self.impacts[tid].astype(np.int16), kind='stable')
+        return order
+
+    def _score(self, tids: list, docs: np.ndarray) -> np.ndarray:
+        """docs（升序、去重）的完整量化得分"""
+        total = np.zeros(len(docs), dtype=np.int64)
+        for tid in tids:
+            postings = self.postings[tid]
+            pos = np.searchsorted(postings, docs)
+            pos[pos == len(postings)] = 0
+            hit = postings[pos] == docs
+            total += np.where(hit, self.impacts[tid][pos], 0)
+        return total
+
+    def search_ids(self, query: str, k: int | None = TOP_K, max_depth: int | None = None) -> list:
+        """返回 [(菜谱编号, 量化得分)]，k 为 None 时返回全部命中；max_depth 见类说明"""
+        return self._search_ids(query, k, max_depth)[0]
+
+    def _search_ids(self, query: str, k: int | None = TOP_K, max_depth: int | None = None) -> tuple:
+        """返回 ([(菜谱编号, 量化得分)], 结果是否精确)"""
+        tids = [self.terms[t] for t in dict.fromkeys(tokenize(query)) if t in self.terms]
+        if not tids:
+            return [], True
+        longest = max(len(self.postings[tid]) for tid in tids)
+        limit = longest * len(tids) if k is None else k
+        if limit <= 0:
+            return [], True
+        max_depth = longest if k is None or max_depth is None else min(max(max_depth, k), longest)
+        depth = min(limit, max_depth)
+        while True:
+            seen = []
+            bound = 0
+            for tid in tids:
+                order = self._order(tid)
+                seen.append(self.postings[tid][order[:depth]])
+                if depth < len(order):
+                    bound += int(self.impacts[tid][order[depth]])
+            docs = np.unique(np.concatenate(seen))
+            scores = self._score(tids, docs)
+            # 得分降序、编号升序
+            ranked = np.lexsort((docs, -scores))[:limit]
+            stopped = len(ranked) == limit and scores[ranked[-1]] > bound
+            if stopped or depth >= max_depth:
+                # 读完全部倒排表或满足停止条件时结果精确
+                exact = bool(stopped) or depth >= longest
+                return [(int(docs[i]), int(scores[i])) for i in ranked], exact
+            depth = min(depth * 2, max_depth)
+
+    def search(self, query: str, k: int | None = TOP_K, max_depth: int | None = None) -> list:
+        """返回 [{'id', 'score', 'exact'}]，score 为 BM25 得分（量化后的近似值）；
+        exact 为 False 表示 max_depth 截断了查询，排序可能与精确结果不同"""
+        ids, exact = self._search_ids(query, k, max_depth)
+        return [{'id': doc, 'score': round(score * self.scale, 4), 'exact': exact} for doc, score in ids]
+
+
+def main(input_file: str = INPUT_FILE, query: str | None = None, output_file: str = OUTPUT_FILE):
+    if query is None:
+        index = SearchIndex.from_file(input_file)
+        index.save(output_file)
+        size = os.path.getsize(output_file)
+        print(f"全文索引完成：{index.count} 道菜谱，{len(index.terms)} 个词，"
+              f"{sum(len(p) for p in index.postings)} 条倒排记录，{size / 1024:.1f} KB，已保存到 {output_file}")
+        return
+    index = SearchIndex.load(output_file) if os.path.exists(output_file) else SearchIndex.from_file(input_file)
+    names = [recipe.get('name') for recipe in iter_json_records(input_file)]
+    for r in index.search(query):
+        print(json.dumps({'id': r['id'], 'name': names[r['id']], 'score': r['score']}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
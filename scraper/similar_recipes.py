@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+from array import array
+
+import numpy as np
+
+from merge_datasets import iter_json_records, SYNONYMS, VOCAB_FILE
+from ingredient_vocab import IngredientVocab
+
+INPUT_FILE = 'recipes_clean.json'
+OUTPUT_FILE = 'similar_recipes.json'
+SIMILAR_VERSION = 1
+# 每道菜谱保留的相似菜谱数
+TOP_K = 8
+# 口味标签相对食材的权重（在 IDF 之上再乘）
+TASTE_WEIGHT = 0.5
+# 出现在超过 MAX_DF 道菜谱中的特征（盐、油、咸鲜之类）不参与生成候选，只在给候选打分时计入；
+# 候选生成的计算量因此不超过 非零元个数 × MAX_DF，不随菜谱数平方增长
+MAX_DF = 500
+# 分块矩阵乘法每块的行数，控制每块中间结果的内存
+BLOCK_ROWS = 1024
+SCORE_DIGITS = 4
+
+
+class SimilarityBuilder:
+    """逐条加入菜谱，build() 计算每道菜谱的前 k 个相似菜谱。
+
+    特征为规范食材（优先使用合并阶段输出的 ingredient_ids，没有时用词表现算）和口味标签，
+    权重为 IDF（出现即计 1，不看次数），口味再乘 TASTE_WEIGHT，每道菜谱的向量归一化为单位长度，
+    相似度为余弦相似度。
+    """
+
+    def __init__(self, vocab: IngredientVocab | None = None):
+        self.vocab = vocab if vocab is not None else IngredientVocab(SYNONYMS)
+        self.tastes = {}
+        # CSR 形式累积：第 i 道菜谱的特征是 features[indptr[i]:indptr[i + 1]]，口味编码为 -1 - 口味编号
+        self.indptr = array('q', [0])
+        self.features = array('q')
+
+    def add(self, recipe):
+        ids = recipe.get('ingredient_ids')
+        if ids is None:
+            ids = self.vocab.recipe_ids(recipe)
+        self.features.extend(dict.fromkeys(ids))
+        for taste in dict.fromkeys(recipe.get('taste') or ()):
+            tid = self.tastes.get(taste)
+            if tid is None:
+                tid = self.tastes[taste] = len(self.tastes)
+            self.features.append(-1 - tid)
+        self.indptr.append(len(self.features))
+
+    def matrix(self):
+        """返回 (行号, 列号, 权重, 各列文档频率)：按行排列的非零元，列号为紧凑编号"""
+        n = len(self.indptr) - 1
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        features = np.frombuffer(self.features, dtype=np.int64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        uniq, cols = np.unique(features, return_inverse=True)
+        df = np.bincount(cols, minlength=len(uniq))
+        idf = np.log((1 + n) / (1 + df)) + 1
+        weights = idf[cols] * np.where(features < 0, TASTE_WEIGHT, 1.0)
+        norms = np.sqrt(np.bincount(rows, weights * weights, minlength=n))
+        weights /= np.where(norms > 0, norms, 1)[rows]
+        return rows, cols, weights, df
+
+    def build(self, k: int = TOP_K) -> 'SimilarRecipes':
+        n = len(self.indptr) - 1
+        rows, cols, weights, df = self.matrix()
+
+        # 常见特征：稠密小矩阵（n × 常见特征数），候选打分时补上它们的贡献
+        common = np.flatnonzero(df > MAX_DF)
+        common_col = np.full(len(df), -1, dtype=np.int64)
+        common_col[common] = np.arange(len(common))
+        dense = np.zeros((n, len(common)), dtype=np.float64)
+        is_common = common_col[cols] >= 0
+        dense[rows[is_common], common_col[cols[is_common]]] = weights[is_common]
+
+        # 其余特征按列排成倒排表（CSC），供分块乘法展开
+        rare = ~is_common
+        r_rows, r_cols, r_weights = rows[rare], cols[rare], weights[rare]
+        order = np.argsort(r_cols, kind='stable')
+        post_docs, post_weights = r_rows[order], r_weights[order]
+        colptr = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(r_cols, minlength=len(df)), out=colptr[1:])
+        row_starts = np.searchsorted(r_rows, np.arange(n + 1))
+
+        neighbours = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            end = min(start + BLOCK_ROWS, n)
+            lo, hi = row_starts[start], row_starts[end]
+            b_rows, b_cols, b_weights = r_rows[lo:hi], r_cols[lo:hi], r_weights[lo:hi]
+            # 块内每个非零元 (行, 列) 展开成该列倒排表中的每道菜谱：块 × Xᵀ 的全部非零乘积
+            lengths = colptr[b_cols + 1] - colptr[b_cols]
+            total = int(lengths.sum())
+            if not total:
+                continue
+            src = np.repeat(np.arange(len(b_cols)), lengths)
+            offsets = np.cumsum(lengths) - lengths
+            pos = colptr[b_cols][src] + np.arange(total) - offsets[src]
+            docs = post_docs[pos]
+            pair_rows = b_rows[src]
+            keep = docs != pair_rows
+            keys = (pair_rows[keep] - start) * n + docs[keep]
+            products = b_weights[src][keep] * post_weights[pos][keep]
+            keys, inverse = np.unique(keys, return_inverse=True)
+            partial = np.bincount(inverse, products, minlength=len(keys))
+            pair_rows, docs = keys // n + start, keys % n
+            total_scores = partial + np.einsum('ij,ij->i', dense[pair_rows], dense[docs])
+
+            # 每行按得分降序、编号升序取前 k
+            ranked = np.lexsort((docs, -total_scores, pair_rows))
+            pair_rows, docs, total_scores = pair_rows[ranked], docs[ranked], total_scores[ranked]
+            firsts = np.searchsorted(pair_rows, pair_rows)
+            rank = np.arange(len(pair_rows)) - firsts
+            top = rank < k
+            neighbours[pair_rows[top], rank[top]] = docs[top]
+            scores[pair_rows[top], rank[top]] = total_scores[top]
+        return SimilarRecipes(neighbours, scores)
+
+
+class SimilarRecipes:
+    """相似菜谱表：neighbours[i] 为菜谱 i 的相似菜谱编号（按相似度降序，不足 k 个时以 -1 补齐），
+    scores[i] 为对应的余弦相似度。菜谱编号即在 recipes_clean.json 中的下标。
+
+    与某道菜谱只有常见特征（见 MAX_DF）相同的菜谱不会成为它的候选，这类菜谱的相似度本来就很低。
+    """
+
+    def __init__(self, neighbours: np.ndarray, scores: np.ndarray):
+        self.neighbours = neighbours
+        self.scores = scores
+
+    @property
+    def count(self) -> int:
+        return len(self.neighbours)
+
+    @classmethod
+    def build(cls, recipes, vocab: IngredientVocab | None = None, k: int = TOP_K) -> 'SimilarRecipes':
+        builder = SimilarityBuilder(vocab)
+        for recipe in recipes:
+            builder.add(recipe)
+        return builder.build(k)
+
+    @classmethod
+    def from_file(cls, path: str = INPUT_FILE, vocab_file: str = VOCAB_FILE) -> 'SimilarRecipes':
+        """读取合并结果；没有 ingredient_ids 的菜谱用 vocab_file 中的词表现算（编号与合并阶段一致）"""
+        return cls.build(iter_json_records(path), IngredientVocab.load(vocab_file, SYNONYMS))
+
+    def similar(self, rid: int) -> list:
+        """[(菜谱编号, 相似度)]"""
+        return [(int(doc), float(score)) for doc, score in zip(self.neighbours[rid], self.scores[rid]) if doc >= 0]
+
+    def to_dict(self) -> dict:
+        """导出格式：每道菜谱一行，只列出实际存在的相似菜谱"""
+        neighbours, scores = [], []
+        for ids, values in zip(self.neighbours.tolist(), self.scores.tolist()):
+            size = next((i for i, doc in enumerate(ids) if doc < 0), len(ids))
+            neighbours.append(ids[:size])
+            scores.append([round(v, SCORE_DIGITS) for v in values[:size]])
+        return {
+            'version': SIMILAR_VERSION,
+            'count': self.count,
+            'k': self.neighbours.shape[1],
+            'neighbours': neighbours,
+            'scores': scores,
+        }
+
+    def save(self, path: str = OUTPUT_FILE):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def main(input_file: str = INPUT_FILE, output_file: str = OUTPUT_FILE):
+    table = SimilarRecipes.from_file(input_file)
+    table.save(output_file)
+    found = int((table.neighbours >= 0).sum())
+    print(f"相似菜谱完成：{table.count} 道菜谱，共 {found} 条相似关系，已保存到 {output_file}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])